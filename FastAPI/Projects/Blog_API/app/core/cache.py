@@ -0,0 +1,268 @@
+# app/core/cache.py
+
+import logging
+import threading
+import time
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import get_settings
+from app.core.lru import BoundedLRU
+
+logger = logging.getLogger(__name__)
+
+# --- BACKENDS ---
+class LRUCache:
+    """In-process LRU cache with per-entry TTL. Safe to share between threads."""
+
+    blocking = False # Pure in-memory: cheap enough to call from the event loop
+
+    def __init__(self, maxsize: int | None = None):
+        self._lru: BoundedLRU[str, bytes] = BoundedLRU(
+            maxsize if maxsize is not None else get_settings().cache_max_entries
+        )
+        # Generation counters live outside the LRU so they can never be evicted
+        self._counters: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def maxsize(self) -> int:
+        return self._lru.maxsize
+
+    def get(self, key: str) -> bytes | None:
+        return self._lru.get(key)
+
+    def set(self, key: str, value: bytes, ttl: int) -> None:
+        self._lru.put(key, value, time.monotonic() + ttl)
+
+    def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._lru.pop(key)
+
+    def get_counter(self, key: str) -> int:
+        return self._counters.get(key, 0)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def clear(self) -> None:
+        self._lru.clear()
+        with self._lock:
+            self._counters.clear()
+
+    def stats(self) -> dict:
+        return {'size': len(self._lru), 'maxsize': self.maxsize, 'evictions': self._lru.evictions}
+
+
+class RedisCache:
+    """
+    Cache backed by any Redis-compatible client (redis.Redis, fakeredis.FakeRedis, ...).
+
+    Every key is namespaced with 'prefix', so several services can share one server.
+    """
+
+    blocking = True # Network round trips: keep them off the event loop
+
+    def __init__(self, client, prefix: str = 'blog_api:'):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key: str) -> bytes | None:
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes, ttl: int) -> None:
+        self.client.set(self.prefix + key, value, ex=ttl)
+
+    def delete(self, *keys: str) -> None:
+        if keys:
+            self.client.delete(*(self.prefix + key for key in keys))
+
+    def get_counter(self, key: str) -> int:
+        return int(self.client.get(self.prefix + key) or 0)
+
+    def incr(self, key: str) -> int:
+        return self.client.incr(self.prefix + key)
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(match=self.prefix + '*'))
+        if keys:
+            self.client.delete(*keys)
+
+    def stats(self) -> dict:
+        try:
+            evictions = self.client.info('stats').get('evicted_keys', 0)
+        except Exception:
+            evictions = 0 # Fakes and some Redis-compatible servers don't implement INFO
+        return {'evictions': evictions}
+
+
+class NullCache:
+    """Backend that stores nothing (CACHE_BACKEND=none)."""
+
+    blocking = False
+
+    def get(self, key: str) -> None:
+        return None
+
+    def set(self, key: str, value: bytes, ttl: int) -> None:
+        pass
+
+    def delete(self, *keys: str) -> None:
+        pass
+
+    def get_counter(self, key: str) -> int:
+        return 0
+
+    def incr(self, key: str) -> int:
+        return 0
+
+    def clear(self) -> None:
+        pass
+
+    def stats(self) -> dict:
+        return {'evictions': 0}
+
+
+# --- RESPONSE CACHE ---
+class ResponseCache:
+    """
+    Read-through cache of serialized ShowBlog / ShowUser payloads.
+
+    A ShowBlog embeds its creator's blog list, so a write to one post makes every cached
+    post of that user stale. Instead of tracking those keys, each entry is stamped with
+    its owner's generation counter; a write bumps the owner's generation, which turns all
+    of that user's entries into misses at once.
+
+    Callers read the generation (generation()) before loading what they store, and pass it
+    to set_blog/set_user: a write racing the load then bumps past it, and the entry it stores
+    is already stale instead of passing for current until the TTL runs out.
+    """
+
+    def __init__(self, backend=None, ttl: int | None = None):
+        self._backend = backend # None: built from CACHE_BACKEND on first use
+        self._ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = build_backend()
+        return self._backend
+
+    @backend.setter
+    def backend(self, backend) -> None:
+        self._backend = backend
+
+    @property
+    def enabled(self) -> bool:
+        """False with CACHE_BACKEND=none: nothing is ever stored."""
+        return not isinstance(self.backend, NullCache)
+
+    @property
+    def ttl(self) -> int:
+        if self._ttl is None:
+            self._ttl = get_settings().cache_ttl_seconds
+        return self._ttl
+
+    @staticmethod
+    def _generation_key(user_id: int | None) -> str:
+        return f'gen:user:{user_id or 0}'
+
+    def _get(self, key: str) -> tuple[str, bytes] | None:
+        raw = self.backend.get(key)
+        if raw is not None:
+            owner, generation, etag, payload = raw.split(b'|', 3)
+            if int(generation) == self.backend.get_counter(self._generation_key(int(owner))):
+                self.hits += 1
+                return etag.decode(), payload
+            # The owner changed one of their posts since this entry was stored
+            self.backend.delete(key)
+            self.stale += 1
+        self.misses += 1
+        return None
+
+    def _set(self, key: str, owner_id: int | None, generation: int, etag: str, payload: bytes) -> None:
+        header = b'%d|%d|%s|' % (owner_id or 0, generation, etag.encode())
+        self.backend.set(key, header + payload, self.ttl)
+
+    # --- READS ---
+    # Entries are (etag, payload) pairs, so a conditional GET can be answered from the cache
+    def generation(self, user_id: int | None) -> int:
+        """Returns a user's current generation; read it before loading what set_blog/set_user store."""
+        return self.backend.get_counter(self._generation_key(user_id))
+
+    def get_blog(self, id: int) -> tuple[str, bytes] | None:
+        return self._get(f'blog:{id}')
+
+    def set_blog(self, id: int, user_id: int | None, generation: int, etag: str, payload: bytes) -> None:
+        self._set(f'blog:{id}', user_id, generation, etag, payload)
+
+    def get_user(self, id: int) -> tuple[str, bytes] | None:
+        return self._get(f'user:{id}')
+
+    def set_user(self, id: int, generation: int, etag: str, payload: bytes) -> None:
+        self._set(f'user:{id}', id, generation, etag, payload)
+
+    # --- INVALIDATION ---
+    def invalidate_user(self, user_id: int | None) -> None:
+        """Invalidates a user's payload and every cached post that embeds their blog list."""
+        self.backend.incr(self._generation_key(user_id))
+        if user_id is not None:
+            self.backend.delete(f'user:{user_id}')
+
+    def invalidate_blog(self, id: int, user_id: int | None) -> None:
+        """Invalidates a post along with its creator's cached entries."""
+        self.backend.delete(f'blog:{id}')
+        self.invalidate_user(user_id)
+
+    # --- HELPERS ---
+    async def run(self, fn, *args):
+        """Calls a cache method from async code, off the event loop if the backend does I/O."""
+        if self.backend.blocking:
+            return await run_in_threadpool(fn, *args)
+        return fn(*args)
+
+    async def after_write(self, fn, *args) -> None:
+        """
+        Runs an invalidate_* method once a write has committed. A backend error is logged,
+        not raised: the write stands, and the stale entries expire with CACHE_TTL_SECONDS.
+        """
+        try:
+            await self.run(fn, *args)
+        except Exception:
+            logger.exception('Cache invalidation failed after a committed write (%s%r)', fn.__name__, args)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> dict:
+        """Returns hit/miss counters, the hit ratio and the backend's eviction count."""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'stale': self.stale,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+            **self.backend.stats(),
+        }
+
+
+def build_backend(name: str | None = None):
+    """Creates a cache backend ('memory', 'redis' or 'none'; defaults to CACHE_BACKEND)."""
+    settings = get_settings()
+    name = name or settings.cache_backend
+    if name == 'redis':
+        import redis # Optional dependency, only needed for CACHE_BACKEND=redis
+        return RedisCache(redis.Redis.from_url(settings.redis_url))
+    if name == 'none':
+        return NullCache()
+    return LRUCache()
+
+
+# Shared instance used by the routers and repositories.
+# Tests can swap the backend, e.g. response_cache.backend = RedisCache(fakeredis.FakeRedis())
+response_cache = ResponseCache()
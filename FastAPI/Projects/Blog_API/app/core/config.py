@@ -0,0 +1,203 @@
+# app/core/config.py
+
+import os
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+from dotenv import load_dotenv
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.lower() in ('1', 'true', 'yes')
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return default if value is None or value == '' else int(value)
+
+def _env_list(name: str) -> tuple[str, ...]:
+    return tuple(item.strip() for item in os.getenv(name, '').split(',') if item.strip())
+
+
+def _default_hash_workers() -> int:
+    return min(4, os.cpu_count() or 1)
+
+def _default_web_workers() -> int:
+    return os.cpu_count() or 1
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    Every setting the application reads from the environment (or the .env file).
+
+    Built once by get_settings(); nothing else in the app calls os.getenv.
+    """
+
+    # --- DATABASE ---
+    database_url: str = 'sqlite:///./test.db'
+    # Serve requests through SQLAlchemy's asyncio extension
+    async_db: bool = False
+    # Defaults to database_url mapped onto its async driver
+    async_database_url: str | None = None
+    # Apply pending migrations (app/migrate.py) in the lifespan startup. Turn off when several
+    # workers start at once and run 'python -m app.migrate' before starting them instead.
+    auto_create_schema: bool = True
+
+    # --- DATABASE ENGINE ---
+    # SQLite PRAGMAs applied to every connection: 'default' (SQLite's own), 'production'
+    # (WAL, synchronous=NORMAL, larger cache, mmap, busy timeout) or 'durable' (the same,
+    # fsyncing every commit); see app/database.py. WAL is stored in the database file.
+    db_profile: str = 'default'
+    # Connection pool of server databases (PostgreSQL...); SQLite keeps SQLAlchemy's default
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout_seconds: int = 30
+    # Replace connections older than this, before the server or a proxy drops them (-1: never)
+    db_pool_recycle_seconds: int = 1800
+    # Test each connection with a round trip when it's checked out of the pool
+    db_pool_pre_ping: bool = False
+
+    # --- READ REPLICAS ---
+    # Read-only routes rotate over the replicas that pass their health check (SELECT 1 every
+    # replica_check_interval_seconds); writes always go to database_url. The response cache is
+    # only ever filled from the primary, and bypassed by clients pinned after a write.
+    replica_urls: tuple[str, ...] = ()
+    replica_check_interval_seconds: int = 5
+    # After a successful write, that client's reads (its token's user, or its cookie) stay on
+    # the primary this long (0: never)
+    read_your_writes_seconds: int = 5
+
+    # --- AUTHENTICATION ---
+    secret_key: str | None = None
+    algorithm: str = 'HS256'
+    access_token_expire_minutes: int = 30
+    # Maximum number of verified tokens kept in memory (0 disables the cache)
+    token_cache_size: int = 10000
+    # Maximum number of email -> user id entries kept to validate tokens without a query
+    identity_cache_size: int = 10000
+
+    # --- ARGON2 ---
+    # Defaults match passlib's own, so existing hashes stay valid. Raising any of them makes
+    # older hashes "outdated"; they are rehashed transparently on the user's next login.
+    argon2_time_cost: int = 3
+    argon2_memory_cost: int = 65536 # In KiB
+    argon2_parallelism: int = 4
+    hash_workers: int = field(default_factory=_default_hash_workers)
+    # Hashes allowed in flight (running + queued) before new ones are rejected with a 503
+    hash_max_pending: int | None = None
+
+    # --- RESPONSE CACHE ---
+    cache_backend: str = 'memory' # 'memory', 'redis' or 'none'
+    cache_max_entries: int = 10000
+    # Upper bound on how long an entry may live, even if an invalidation is missed
+    cache_ttl_seconds: int = 300
+    redis_url: str = 'redis://localhost:6379/0'
+
+    # --- RATE LIMITING ---
+    # Token buckets in front of the routes that run Argon2. '..._per_minute' is the sustained
+    # rate, '..._burst' how many attempts may arrive at once; a rate of 0 disables that limit.
+    rate_limit_backend: str = 'memory' # 'memory', 'redis' (shared by every worker) or 'none'
+    login_ip_per_minute: int = 30
+    login_ip_burst: int = 10
+    login_user_per_minute: int = 10
+    login_user_burst: int = 5
+    register_ip_per_minute: int = 10
+    register_ip_burst: int = 5
+    # Memory backend: independent locks, and the most buckets kept before the idlest go
+    rate_limit_shards: int = 64
+    rate_limit_max_keys: int = 100000
+
+    # --- WRITE BATCHING ---
+    # Queue concurrent POST /blog/ requests and insert them together, in one transaction,
+    # once write_batch_max_items are waiting or write_batch_window_ms after the first one
+    write_batching: bool = False
+    write_batch_window_ms: int = 2
+    write_batch_max_items: int = 100
+
+    # --- SERVER (python -m app.serve) ---
+    web_bind: str = '127.0.0.1:9000'
+    web_workers: int = field(default_factory=_default_web_workers)
+    # Replace a worker after this many requests (0: never); each worker's limit is
+    # jittered by up to 10% so they don't all restart at once
+    web_max_requests: int = 10000
+    # Replace a worker once its resident memory grew this much since it started (0: never)
+    web_max_memory_mb: int = 0
+    # How long a stopping worker (shutdown, recycling, reload) may finish in-flight requests
+    web_graceful_timeout_seconds: int = 30
+    web_pidfile: str = 'blog_api.pid'
+    # Latest posts rendered into the response cache by the launcher before forking (0: none)
+    warm_up_blogs: int = 100
+
+    # --- RESPONSES ---
+    # Render plain (non-model) JSON responses with orjson (optional dependency)
+    fast_json: bool = False
+
+    @classmethod
+    def from_env(cls) -> 'Settings':
+        """Reads the settings from environment variables, keeping the defaults for unset ones."""
+        hash_workers = _env_int('HASH_WORKERS', _default_hash_workers())
+        return cls(
+            database_url=os.getenv('DATABASE_URL', cls.database_url),
+            async_db=_env_bool('ASYNC_DB', cls.async_db),
+            async_database_url=os.getenv('ASYNC_DATABASE_URL') or None,
+            auto_create_schema=_env_bool('AUTO_CREATE_SCHEMA', cls.auto_create_schema),
+            db_profile=os.getenv('DB_PROFILE', cls.db_profile),
+            db_pool_size=_env_int('DB_POOL_SIZE', cls.db_pool_size),
+            db_max_overflow=_env_int('DB_MAX_OVERFLOW', cls.db_max_overflow),
+            db_pool_timeout_seconds=_env_int('DB_POOL_TIMEOUT_SECONDS', cls.db_pool_timeout_seconds),
+            db_pool_recycle_seconds=_env_int('DB_POOL_RECYCLE_SECONDS', cls.db_pool_recycle_seconds),
+            db_pool_pre_ping=_env_bool('DB_POOL_PRE_PING', cls.db_pool_pre_ping),
+            replica_urls=_env_list('DATABASE_REPLICA_URLS'),
+            replica_check_interval_seconds=_env_int(
+                'REPLICA_CHECK_INTERVAL_SECONDS', cls.replica_check_interval_seconds
+            ),
+            read_your_writes_seconds=_env_int('READ_YOUR_WRITES_SECONDS', cls.read_your_writes_seconds),
+            secret_key=os.getenv('SECRET_KEY'),
+            algorithm=os.getenv('ALGORITHM', cls.algorithm),
+            access_token_expire_minutes=_env_int('ACCESS_TOKEN_EXPIRE_MINUTES', cls.access_token_expire_minutes),
+            token_cache_size=_env_int('TOKEN_CACHE_SIZE', cls.token_cache_size),
+            identity_cache_size=_env_int('IDENTITY_CACHE_SIZE', cls.identity_cache_size),
+            argon2_time_cost=_env_int('ARGON2_TIME_COST', cls.argon2_time_cost),
+            argon2_memory_cost=_env_int('ARGON2_MEMORY_COST', cls.argon2_memory_cost),
+            argon2_parallelism=_env_int('ARGON2_PARALLELISM', cls.argon2_parallelism),
+            hash_workers=hash_workers,
+            hash_max_pending=_env_int('HASH_MAX_PENDING', hash_workers * 4),
+            cache_backend=os.getenv('CACHE_BACKEND', cls.cache_backend),
+            cache_max_entries=_env_int('CACHE_MAX_ENTRIES', cls.cache_max_entries),
+            cache_ttl_seconds=_env_int('CACHE_TTL_SECONDS', cls.cache_ttl_seconds),
+            redis_url=os.getenv('REDIS_URL', cls.redis_url),
+            rate_limit_backend=os.getenv('RATE_LIMIT_BACKEND', cls.rate_limit_backend),
+            login_ip_per_minute=_env_int('LOGIN_IP_PER_MINUTE', cls.login_ip_per_minute),
+            login_ip_burst=_env_int('LOGIN_IP_BURST', cls.login_ip_burst),
+            login_user_per_minute=_env_int('LOGIN_USER_PER_MINUTE', cls.login_user_per_minute),
+            login_user_burst=_env_int('LOGIN_USER_BURST', cls.login_user_burst),
+            register_ip_per_minute=_env_int('REGISTER_IP_PER_MINUTE', cls.register_ip_per_minute),
+            register_ip_burst=_env_int('REGISTER_IP_BURST', cls.register_ip_burst),
+            rate_limit_shards=_env_int('RATE_LIMIT_SHARDS', cls.rate_limit_shards),
+            rate_limit_max_keys=_env_int('RATE_LIMIT_MAX_KEYS', cls.rate_limit_max_keys),
+            write_batching=_env_bool('WRITE_BATCHING', cls.write_batching),
+            write_batch_window_ms=_env_int('WRITE_BATCH_WINDOW_MS', cls.write_batch_window_ms),
+            write_batch_max_items=_env_int('WRITE_BATCH_MAX_ITEMS', cls.write_batch_max_items),
+            web_bind=os.getenv('WEB_BIND', cls.web_bind),
+            web_workers=_env_int('WEB_WORKERS', _default_web_workers()),
+            web_max_requests=_env_int('WEB_MAX_REQUESTS', cls.web_max_requests),
+            web_max_memory_mb=_env_int('WEB_MAX_MEMORY_MB', cls.web_max_memory_mb),
+            web_graceful_timeout_seconds=_env_int('WEB_GRACEFUL_TIMEOUT_SECONDS', cls.web_graceful_timeout_seconds),
+            web_pidfile=os.getenv('WEB_PIDFILE', cls.web_pidfile),
+            warm_up_blogs=_env_int('WARM_UP_BLOGS', cls.warm_up_blogs),
+            fast_json=_env_bool('FAST_JSON', cls.fast_json),
+        )
+
+
+@lru_cache
+def get_settings() -> Settings:
+    """
+    Returns the application settings, loading the .env file on the first call only.
+
+    Tests can change the environment and call get_settings.cache_clear() to reload.
+    """
+    load_dotenv()
+    return Settings.from_env()
@@ -0,0 +1,58 @@
+# app/core/etag.py
+
+import hashlib
+import re
+from typing import AbstractSet, Iterable, Optional
+
+# Blog ETags carry the blog's own version (for If-Match) and its creator's version
+# (ShowBlog embeds the creator's blog list, which changes with the creator's version)
+BLOG_ETAG_PATTERN = re.compile(r'^"blog-(\d+)-v(\d+)-u(\d+)"$')
+
+
+def blog_etag(id: int, version: int, creator_version: Optional[int]) -> str:
+    """Strong ETag for a ShowBlog representation."""
+    return f'"blog-{id}-v{version}-u{creator_version or 0}"'
+
+
+def user_etag(id: int, version: int) -> str:
+    """Strong ETag for a ShowUser representation."""
+    return f'"user-{id}-v{version}"'
+
+
+def user_summary_etag(id: int, version: int) -> str:
+    """Strong ETag for a UserSummary representation (distinct from the ShowUser one)."""
+    return f'"user-summary-{id}-v{version}"'
+
+
+def blog_page_etag(rows: Iterable[tuple], has_more: bool, fields: Optional[AbstractSet[str]] = None) -> str:
+    """
+    Strong ETag for one BlogPage, from the (id, version, creator_version) of its items.
+
+    :param rows: One (id, version, creator_version) tuple per blog on the page.
+    :param has_more: Whether a next page exists (it changes next_cursor).
+    :param fields: The ?fields= projection, if any; each projection is its own representation.
+    """
+    digest = hashlib.sha1()
+    if fields is not None:
+        digest.update(f'fields={",".join(sorted(fields))};'.encode())
+    for id, version, creator_version in rows:
+        digest.update(f'{id}:{version}:{creator_version or 0};'.encode())
+    digest.update(b'more' if has_more else b'last')
+    return f'"blogs-{digest.hexdigest()}"'
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """Checks an If-None-Match / If-Match header value (a list of ETags or '*') against an ETag."""
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    # Weak comparison for If-None-Match: ignore a 'W/' prefix added by intermediaries
+    candidates = (tag.strip().removeprefix('W/') for tag in header.split(','))
+    return etag in candidates
+
+
+def parse_blog_version(header: str) -> Optional[int]:
+    """Extracts the blog version from an If-Match header carrying a blog ETag ('*' -> None)."""
+    match = BLOG_ETAG_PATTERN.match(header.strip())
+    return int(match.group(2)) if match else None
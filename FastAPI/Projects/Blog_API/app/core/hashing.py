@@ -1,20 +1,98 @@
-# app/core/hashing.py
-
-from passlib.context import CryptContext 
-
-# Define the context for password hashing
-# Schemes: Defines the hashing algorithm (argon2 is strong and recommended)
-pwd_context = CryptContext(schemes=["argon2"], deprecated = "auto")
-
-class Hash:
-    """Utility class for password hashing and verification."""
-    
-    @staticmethod
-    def aragon2(password: str) -> str:
-        """Hashes a plain text password using argon2."""
-        return pwd_context.hash(password)
-    
-    @staticmethod
-    def verify(plain_password: str, hashed_password: str) -> bool:
-        """Verifies a plain text password against a hashed password."""
-        return pwd_context.verify(plain_password, hashed_password)
\ No newline at end of file
+# app/core/hashing.py
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from app.core.config import get_settings
+from app.core.metrics import record_hash
+
+
+# Define the context for password hashing, on first use rather than at import
+# Schemes: Defines the hashing algorithm (argon2 is strong and recommended)
+# The cost parameters come from the ARGON2_* settings; see app/core/config.py
+@lru_cache
+def get_pwd_context() -> CryptContext:
+    settings = get_settings()
+    return CryptContext(
+        schemes=["argon2"],
+        deprecated = "auto",
+        argon2__rounds=settings.argon2_time_cost,
+        argon2__memory_cost=settings.argon2_memory_cost,
+        argon2__parallelism=settings.argon2_parallelism
+    )
+
+
+# --- HASHING POOL ---
+# Argon2 runs on its own small pool so a burst of logins can't occupy the threadpool
+# that serves every other route. argon2-cffi releases the GIL, so threads run in parallel.
+@lru_cache
+def _hash_pool() -> tuple[ThreadPoolExecutor, threading.BoundedSemaphore]:
+    settings = get_settings()
+    executor = ThreadPoolExecutor(max_workers=settings.hash_workers, thread_name_prefix='argon2')
+    pending = threading.BoundedSemaphore(settings.hash_max_pending or settings.hash_workers * 4)
+    return executor, pending
+
+
+async def _run_in_hash_pool(fn, *args):
+    """
+    Runs a hashing function on the dedicated pool, failing fast when it is saturated.
+
+    :raises HTTPException: 503 if HASH_MAX_PENDING hashes are already in flight.
+    """
+    executor, pending = _hash_pool()
+    if not pending.acquire(blocking=False):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail='Too many concurrent authentication requests, please retry shortly',
+            headers={'Retry-After': '1'}
+        )
+
+    try:
+        future = executor.submit(fn, *args)
+    except BaseException:
+        pending.release()
+        raise
+
+    # Free the slot when the hash finishes, even if the awaiting request was cancelled
+    future.add_done_callback(lambda _: pending.release())
+    started = time.perf_counter()
+    try:
+        return await asyncio.wrap_future(future)
+    finally:
+        # Reported in the Server-Timing header; includes time queued behind other hashes
+        record_hash(time.perf_counter() - started)
+
+
+class Hash:
+    """Utility class for password hashing and verification."""
+
+    @staticmethod
+    def aragon2(password: str) -> str:
+        """Hashes a plain text password using argon2."""
+        return get_pwd_context().hash(password)
+
+    @staticmethod
+    def verify(plain_password: str, hashed_password: str) -> bool:
+        """Verifies a plain text password against a hashed password."""
+        return get_pwd_context().verify(plain_password, hashed_password)
+
+    @staticmethod
+    async def aragon2_async(password: str) -> str:
+        """Hashes a plain text password on the bounded hashing pool."""
+        return await _run_in_hash_pool(get_pwd_context().hash, password)
+
+    @staticmethod
+    async def verify_and_update_async(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+        """
+        Verifies a password on the bounded hashing pool and rehashes it if it is outdated.
+
+        :return: (is_valid, new_hash); new_hash is None unless the stored hash uses
+                 outdated parameters and should be replaced.
+        """
+        return await _run_in_hash_pool(get_pwd_context().verify_and_update, plain_password, hashed_password)
@@ -0,0 +1,62 @@
+# app/core/identity_cache.py
+
+from typing import Awaitable, Callable
+
+from app.core.config import get_settings
+from app.core.lru import BoundedLRU
+
+
+class IdentityCache:
+    """
+    Bounded LRU cache mapping a user's email to their id.
+
+    get_current_user checks every token against it, so a token whose user was deleted
+    (or whose id now belongs to someone else, as SQLite can reuse ids) stops working,
+    without a users-table query per request. Repositories that create, change or
+    delete a user must call invalidate() with the affected email.
+    """
+
+    def __init__(self, maxsize: int | None = None):
+        # None: IDENTITY_CACHE_SIZE, read on first use
+        self._lru: BoundedLRU[str, int] = BoundedLRU(
+            maxsize if maxsize is not None else lambda: get_settings().identity_cache_size
+        )
+
+    @property
+    def maxsize(self) -> int:
+        return self._lru.maxsize
+
+    def get(self, email: str) -> int | None:
+        return self._lru.get(email)
+
+    def put(self, email: str, id: int) -> None:
+        self._lru.put(email, id)
+
+    async def resolve(self, email: str, lookup: Callable[[str], Awaitable[int | None]]) -> int | None:
+        """
+        Returns the id of the user with this email, awaiting lookup(email) (a database
+        query) only on a cache miss. Unknown emails are not cached.
+        """
+        id = self.get(email)
+        if id is None:
+            id = await lookup(email)
+            if id is not None:
+                self.put(email, id)
+        return id
+
+    def invalidate(self, email: str) -> None:
+        """Forgets an email, e.g. after its user was created, changed or deleted."""
+        self._lru.pop(email)
+
+    def clear(self) -> None:
+        self._lru.clear()
+
+    def stats(self) -> dict:
+        """Returns hit/miss counters and the current size, for monitoring."""
+        stats = self._lru.stats()
+        del stats['expirations'] # Entries never expire
+        return stats
+
+
+# Shared instance used by get_current_user, /login and the user repository
+identity_cache = IdentityCache()
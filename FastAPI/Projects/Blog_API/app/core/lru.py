@@ -0,0 +1,100 @@
+# app/core/lru.py
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, TypeVar
+
+K = TypeVar('K', bound=Hashable)
+V = TypeVar('V')
+
+
+class BoundedLRU(Generic[K, V]):
+    """
+    Thread-safe mapping that keeps at most 'maxsize' entries, dropping the least recently
+    used one when full. Entries may carry an expiry time, after which they read as a miss.
+
+    Shared by the in-memory response cache backend, the token cache and the identity cache.
+    """
+
+    def __init__(self, maxsize: int | Callable[[], int], clock: Callable[[], float] = time.monotonic):
+        """
+        :param maxsize: The capacity, or a function returning it (read on first use, so
+                        module-level instances don't load the settings at import time).
+                        Zero or less disables the cache: put() stores nothing.
+        :param clock: The time source expiry times are compared against.
+        """
+        self._maxsize = maxsize
+        self._clock = clock
+        self._entries: OrderedDict[K, tuple[V, float | None]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def maxsize(self) -> int:
+        if callable(self._maxsize):
+            self._maxsize = self._maxsize()
+        return self._maxsize
+
+    def get(self, key: K) -> V | None:
+        """Returns the value stored under key, or None if absent or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= self._clock():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: K, value: V, expires_at: float | None = None) -> None:
+        """
+        Stores value under key, evicting the least recently used entries once over capacity.
+
+        :param expires_at: When the entry stops being served, on this cache's clock (None: never).
+        """
+        maxsize = self.maxsize
+        if maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: K) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        """Returns the size and hit/miss/eviction counters, for monitoring."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+            }
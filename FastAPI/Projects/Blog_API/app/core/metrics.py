@@ -0,0 +1,299 @@
+# app/core/metrics.py
+
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+# --- HISTOGRAM BUCKETS (seconds) ---
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+POOL_WAIT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+# --- PER-REQUEST STATS ---
+class RequestStats:
+    """What one request spent in SQL, the connection pool and Argon2."""
+
+    __slots__ = ('queries', 'sql_seconds', 'slowest_seconds', 'slowest_statement',
+                 'pool_wait_seconds', 'hash_seconds')
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement = None
+        self.pool_wait_seconds = 0.0
+        self.hash_seconds = 0.0
+
+
+# The stats of the request being served. The object is mutable and shared, so updates
+# made in threadpool workers and run_sync greenlets (which copy the context) are seen
+# by the middleware.
+current_request: ContextVar[RequestStats | None] = ContextVar('current_request', default=None)
+
+
+def record_hash(seconds: float) -> None:
+    """Adds time spent hashing or verifying a password to the current request."""
+    stats = current_request.get()
+    if stats is not None:
+        stats.hash_seconds += seconds
+
+
+# --- AGGREGATED METRICS ---
+class Histogram:
+    """Prometheus-style cumulative histogram, one series per label set."""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self._series: dict[tuple, list] = {} # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        for label_values, values in sorted(series.items()):
+            labels = _format_labels(self.labels, label_values)
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{_with_le(labels, bound)} {cumulative}')
+            lines.append(f'{self.name}_bucket{_with_le(labels, "+Inf")} {values[-1]}')
+            lines.append(f'{self.name}_sum{_braces(labels)} {values[-2]}')
+            lines.append(f'{self.name}_count{_braces(labels)} {values[-1]}')
+        return lines
+
+
+class Counter:
+    """Prometheus-style monotonically increasing counter, one series per label set."""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._series: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, *label_values: str) -> None:
+        with self._lock:
+            self._series[label_values] = self._series.get(label_values, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            series = dict(self._series)
+        for label_values, value in sorted(series.items()):
+            lines.append(f'{self.name}{_braces(_format_labels(self.labels, label_values))} {value}')
+        return lines
+
+
+def _format_labels(names: tuple[str, ...], values: tuple) -> str:
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _braces(labels: str) -> str:
+    return f'{{{labels}}}' if labels else ''
+
+def _with_le(labels: str, bound) -> str:
+    le = f'le="{bound}"'
+    return _braces(f'{labels},{le}' if labels else le)
+
+def _gauge(name: str, help: str, samples: list[tuple[str, float]]) -> list[str]:
+    lines = [f'# HELP {name} {help}', f'# TYPE {name} gauge']
+    return lines + [f'{name}{_braces(labels)} {value}' for labels, value in samples]
+
+
+REQUEST_DURATION = Histogram(
+    'blog_api_request_duration_seconds', 'Time until the response headers were sent.',
+    ('method', 'route')
+)
+REQUESTS = Counter('blog_api_requests_total', 'Requests served.', ('method', 'route', 'status'))
+REQUEST_SQL_DURATION = Histogram(
+    'blog_api_request_sql_duration_seconds', 'Total SQL time per request.', ('method', 'route')
+)
+SQL_QUERIES = Counter('blog_api_sql_queries_total', 'SQL statements executed.', ('method', 'route'))
+POOL_WAIT = Histogram(
+    'blog_api_db_pool_checkout_wait_seconds',
+    'Time between a session starting a transaction and getting a pooled connection.',
+    buckets=POOL_WAIT_BUCKETS
+)
+
+
+# Process startup phases ('import', 'lifespan') -> seconds, exported as gauges
+STARTUP_SECONDS: dict[str, float] = {}
+
+def record_startup(phase: str, seconds: float) -> None:
+    """Records how long a startup phase took, for the blog_api_startup_seconds gauge."""
+    STARTUP_SECONDS[phase] = seconds
+
+
+# --- SQLALCHEMY HOOKS ---
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info['query_start'] = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_start']
+    stats = current_request.get()
+    if stats is None:
+        return
+    stats.queries += 1
+    stats.sql_seconds += elapsed
+    if elapsed > stats.slowest_seconds:
+        stats.slowest_seconds = elapsed
+        stats.slowest_statement = statement
+
+def _after_transaction_create(session, transaction):
+    if transaction.parent is None:
+        session.info['begin_requested'] = time.perf_counter()
+
+def _after_begin(session, transaction, connection):
+    # Fires once the session holds a connection, i.e. after the pool checkout
+    started = session.info.pop('begin_requested', None)
+    if started is None:
+        return
+    waited = time.perf_counter() - started
+    POOL_WAIT.observe(waited)
+    stats = current_request.get()
+    if stats is not None:
+        stats.pool_wait_seconds += waited
+
+
+_instrumented_engines: dict[str, Engine] = {}
+
+def instrument(name: str, bind: Engine) -> None:
+    """
+    Attaches the query timing hooks to an engine and the pool-wait hooks to every
+    Session (AsyncSession included, as it wraps a sync Session).
+
+    :param name: The 'engine' label its pool metrics are exported under.
+    :param bind: A sync Engine; for an AsyncEngine pass its 'sync_engine'.
+    """
+    if name not in _instrumented_engines:
+        event.listen(bind, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(bind, 'after_cursor_execute', _after_cursor_execute)
+        _instrumented_engines[name] = bind
+
+    if not event.contains(Session, 'after_begin', _after_begin):
+        event.listen(Session, 'after_transaction_create', _after_transaction_create)
+        event.listen(Session, 'after_begin', _after_begin)
+
+
+# --- ASGI MIDDLEWARE ---
+class RequestMetricsMiddleware:
+    """
+    Times every HTTP request, adds a Server-Timing header and feeds the /metrics histograms.
+
+    Written as plain ASGI middleware (not BaseHTTPMiddleware) so the context variable set
+    here is the one the route handler and its threadpool calls see, and streamed bodies
+    aren't buffered. Timings cover the work done until the response headers are sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message['type'] == 'http.response.start':
+                elapsed = time.perf_counter() - started
+                message.setdefault('headers', [])
+                message['headers'] = [*message['headers'], (b'server-timing', _server_timing(stats, elapsed))]
+                _observe(scope, message['status'], stats, elapsed)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_request.reset(token)
+
+
+def _server_timing(stats: RequestStats, elapsed: float) -> bytes:
+    parts = [
+        f'handler;dur={elapsed * 1000:.2f}',
+        f'sql;dur={stats.sql_seconds * 1000:.2f};desc="{stats.queries} queries"',
+        f'slowest;dur={stats.slowest_seconds * 1000:.2f}',
+    ]
+    if stats.pool_wait_seconds:
+        parts.append(f'pool;dur={stats.pool_wait_seconds * 1000:.2f}')
+    if stats.hash_seconds:
+        parts.append(f'argon2;dur={stats.hash_seconds * 1000:.2f}')
+    return ', '.join(parts).encode('latin-1')
+
+
+def _observe(scope, status_code: int, stats: RequestStats, elapsed: float) -> None:
+    # Label by route template ('/blog/{id}'), not the raw path, to keep cardinality bounded
+    route = getattr(scope.get('route'), 'path', None) or 'unmatched'
+    method = scope['method']
+    REQUEST_DURATION.observe(elapsed, method, route)
+    REQUEST_SQL_DURATION.observe(stats.sql_seconds, method, route)
+    REQUESTS.inc(1, method, route, str(status_code))
+    if stats.queries:
+        SQL_QUERIES.inc(stats.queries, method, route)
+
+
+# --- EXPOSITION ---
+POOL_GAUGES = (
+    ('size', 'size', 'Configured pool size.'),
+    ('checked_out', 'checkedout', 'Connections currently checked out.'),
+    ('checked_in', 'checkedin', 'Idle connections in the pool.'),
+    ('overflow', 'overflow', 'Connections opened beyond the pool size.'),
+)
+
+def _pool_metrics() -> list[str]:
+    lines = []
+    for metric, attr, help in POOL_GAUGES:
+        # Only queue-style pools report sizes (SingletonThreadPool / NullPool don't)
+        samples = [
+            (f'engine="{name}"', getattr(bind.pool, attr)())
+            for name, bind in _instrumented_engines.items()
+            if hasattr(bind.pool, attr)
+        ]
+        if samples:
+            lines += _gauge(f'blog_api_db_pool_{metric}', help, samples)
+    return lines
+
+
+def render_metrics(caches: dict[str, dict] | None = None) -> str:
+    """
+    Renders all metrics in the Prometheus text exposition format.
+
+    :param caches: Extra stats dicts to export as gauges, e.g. {'token_cache': token_cache.stats()}.
+    """
+    lines = []
+    for metric in (REQUESTS, REQUEST_DURATION, REQUEST_SQL_DURATION, SQL_QUERIES, POOL_WAIT):
+        lines += metric.render()
+    lines += _pool_metrics()
+    if STARTUP_SECONDS:
+        lines += _gauge('blog_api_startup_seconds', 'Time spent in each startup phase.',
+                        [(f'phase="{phase}"', seconds) for phase, seconds in STARTUP_SECONDS.items()])
+    for cache_name, stats in (caches or {}).items():
+        for key, value in stats.items():
+            if isinstance(value, (int, float)):
+                lines += _gauge(f'blog_api_{cache_name}_{key}', f'{cache_name} {key}.', [('', value)])
+    return '\n'.join(lines) + '\n'
@@ -1,29 +1,53 @@
-# app/core/oauth2.py
-
-from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
-
-from . import jwt_token
-from app import schemas
-
-# Define the OAuth2 scheme
-# tokenUrl points to the endpoint where a client can exchange credentials for a token
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl='login')
-
-def get_current_user(token: str = Depends(oauth2_scheme)) -> schemas.TokenData:
-    """
-    FastAPI dependency to verify a JWT and get the current user's data.
-
-    :param token: The token extracted by OAuth2PasswordBearer from the Authorization header.
-    :raises HTTPException: If the token is invalid or missing.
-    :return: The validated user data (email).
-    """
-    # Define the standardized exception for authorization failure
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED, 
-        detail='Could not validate credentials', 
-        headers={'WWW-Authenticate': 'Bearer'}
-    )
-
-    # Use the jwt_token utility to verify the token
-    return jwt_token.verify_token(token, credentials_exception)
\ No newline at end of file
+# app/core/oauth2.py
+
+from fastapi import Depends, HTTPException, status
+from fastapi.security import OAuth2PasswordBearer
+
+from . import jwt_token
+from .identity_cache import identity_cache
+from .token_cache import token_cache
+from app import schemas
+from app.database import open_session, run_db, session_factory
+from app.repository import user
+
+# Define the OAuth2 scheme
+# tokenUrl points to the endpoint where a client can exchange credentials for a token
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl='login')
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> schemas.TokenData:
+    """
+    FastAPI dependency to verify a JWT and get the current user's data.
+
+    :param token: The token extracted by OAuth2PasswordBearer from the Authorization header.
+    :raises HTTPException: If the token is invalid or missing.
+    :return: The validated user data (email and id).
+    """
+    # Define the standardized exception for authorization failure
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED, 
+        detail='Could not validate credentials', 
+        headers={'WWW-Authenticate': 'Bearer'}
+    )
+
+    # Clients resend the same token on every request: skip the signature check
+    # while a previously verified copy of it is cached and not yet expired
+    token_data = token_cache.get(token)
+    if token_data is None:
+        # Use the jwt_token utility to verify the token
+        token_data = jwt_token.verify_token(token, credentials_exception)
+        token_cache.put(token, token_data, token_data.exp)
+
+    # The user must still exist under the id the token was issued for; answered from the
+    # identity cache, so this only queries the users table once per email
+    user_id = await identity_cache.resolve(token_data.email, _lookup_user_id)
+    if user_id is None or token_data.id not in (None, user_id):
+        raise credentials_exception
+    if token_data.id is None:
+        # Issued before tokens carried the 'uid' claim
+        token_data = token_data.model_copy(update={'id': user_id})
+    return token_data
+
+async def _lookup_user_id(email: str) -> int | None:
+    # Identity cache miss: on the primary, through the async driver if ASYNC_DB is set
+    async with open_session(session_factory()) as db:
+        return await run_db(db, user.get_user_id_by_email, email)
\ No newline at end of file
@@ -0,0 +1,79 @@
+# app/core/query_counter.py
+
+from contextlib import contextmanager
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import get_settings
+from app.database import get_async_engine, get_engine, get_replicas
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a block of code issues more SQL statements than allowed."""
+
+
+class QueryCounter:
+    """Collects the SQL statements sent through an engine while it is active."""
+
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+
+def _app_engines() -> list[Engine]:
+    """Every engine a request may use: the primary's (sync, and async with ASYNC_DB) and the replicas'."""
+    engines = [get_engine()]
+    if get_settings().async_db:
+        engines.append(get_async_engine())
+    engines.extend(get_replicas().engines)
+    # Async engines emit their events on the sync Engine they wrap
+    return [getattr(engine, 'sync_engine', engine) for engine in engines]
+
+
+@contextmanager
+def count_queries(bind: Engine = None):
+    """
+    Counts every SQL statement executed on the engine inside the 'with' block.
+
+    :param bind: The engine to watch (sync or async; defaults to every engine the app uses).
+    :return: A QueryCounter exposing 'count' and the raw 'statements'.
+    """
+    engines = [getattr(bind, 'sync_engine', bind)] if bind is not None else _app_engines()
+    counter = QueryCounter()
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', counter._record)
+    try:
+        yield counter
+    finally:
+        for engine in engines:
+            event.remove(engine, 'before_cursor_execute', counter._record)
+
+
+@contextmanager
+def assert_max_queries(limit: int, bind: Engine = None):
+    """
+    Fails when the 'with' block issues more than 'limit' SQL statements.
+
+    Used by benchmarks/query_budget.py to catch N+1 lazy loads creeping back in:
+
+        with assert_max_queries(3):
+            client.get('/blog/', headers=auth_headers)
+
+    :param limit: The maximum number of statements allowed.
+    :param bind: The engine to watch (sync or async; defaults to every engine the app uses).
+    :raises QueryBudgetExceeded: If the block issued more statements than allowed.
+    """
+    with count_queries(bind) as counter:
+        yield counter
+
+    if counter.count > limit:
+        listing = '\n'.join(counter.statements)
+        raise QueryBudgetExceeded(
+            f'Expected at most {limit} SQL statements, got {counter.count}:\n{listing}'
+        )
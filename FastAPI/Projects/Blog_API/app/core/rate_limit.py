@@ -0,0 +1,234 @@
+# app/core/rate_limit.py
+
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.security import OAuth2PasswordRequestForm
+
+from app.core.config import get_settings
+
+
+# --- BACKENDS ---
+# Every backend implements take(key, rate, burst): spend one token from the bucket 'key'
+# (refilled at 'rate' tokens per second, holding at most 'burst') and return 0, or return
+# the seconds until a token will be available, spending nothing.
+class MemoryBuckets:
+    """
+    Token buckets in this process's memory, split into shards with a lock each.
+
+    Requests for different keys almost never wait on the same lock, so threads don't
+    serialize on the limiter. Each shard keeps a bounded number of buckets and forgets
+    the least recently used first: a bucket left alone that long has refilled anyway.
+    """
+
+    blocking = False # Pure in-memory: a decision takes about a microsecond
+
+    def __init__(self, shards: int | None = None, max_keys: int | None = None):
+        settings = get_settings()
+        shards = shards or settings.rate_limit_shards
+        max_keys = max_keys if max_keys is not None else settings.rate_limit_max_keys
+        self._shards = [(threading.Lock(), OrderedDict()) for _ in range(shards)]
+        self._max_per_shard = max(1, max_keys // shards)
+        self.evictions = 0
+
+    def take(self, key: str, rate: float, burst: int) -> float:
+        lock, buckets = self._shards[hash(key) % len(self._shards)]
+        now = time.monotonic()
+        with lock:
+            tokens, updated = buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / rate
+            buckets[key] = (tokens - 1 if wait == 0.0 else tokens, now)
+            buckets.move_to_end(key)
+            if len(buckets) > self._max_per_shard:
+                buckets.popitem(last=False)
+                self.evictions += 1
+        return wait
+
+    def clear(self) -> None:
+        for lock, buckets in self._shards:
+            with lock:
+                buckets.clear()
+
+    def stats(self) -> dict:
+        return {'size': sum(len(buckets) for _, buckets in self._shards), 'evictions': self.evictions}
+
+
+class RedisBuckets:
+    """
+    Token buckets shared by every worker, in any Redis-compatible server.
+
+    A Lua script refills and spends a bucket atomically on the server, so a decision is
+    one round trip and two workers can never both spend the last token. The server's
+    clock is used, so workers on different hosts agree on how much a bucket refilled.
+    """
+
+    blocking = True # Network round trips: keep them off the event loop
+
+    SCRIPT = """
+    local rate = tonumber(ARGV[1])
+    local burst = tonumber(ARGV[2])
+    local clock = redis.call('TIME')
+    local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+    local tokens = tonumber(bucket[1]) or burst
+    local updated = tonumber(bucket[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+    local wait = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+    else
+        wait = (1 - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+    -- A bucket untouched until it is full again is the same as no bucket
+    redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+    return tostring(wait)
+    """
+
+    def __init__(self, client, prefix: str = 'blog_api:rl:'):
+        self.client = client
+        self.prefix = prefix
+        self._take = client.register_script(self.SCRIPT) # EVALSHA, loading the script once
+
+    def take(self, key: str, rate: float, burst: int) -> float:
+        return float(self._take(keys=[self.prefix + key], args=[rate, burst]))
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(match=self.prefix + '*'))
+        if keys:
+            self.client.delete(*keys)
+
+    def stats(self) -> dict:
+        return {}
+
+
+class NullBuckets:
+    """Backend that never limits (RATE_LIMIT_BACKEND=none)."""
+
+    blocking = False
+
+    def take(self, key: str, rate: float, burst: int) -> float:
+        return 0.0
+
+    def clear(self) -> None:
+        pass
+
+    def stats(self) -> dict:
+        return {}
+
+
+# --- RATE LIMITER ---
+class RateLimiter:
+    """
+    Checks requests against a set of token buckets and rejects them with a 429.
+
+    Meant to run as a route dependency, so an attempt over its limit is turned away
+    before the handler opens a session, looks anything up or starts a hash.
+    """
+
+    def __init__(self, backend=None):
+        self._backend = backend # None: built from RATE_LIMIT_BACKEND on first use
+        self.allowed = 0
+        self.limited = 0
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = build_backend()
+        return self._backend
+
+    @backend.setter
+    def backend(self, backend) -> None:
+        self._backend = backend
+
+    def _take_all(self, limits) -> float:
+        backend = self.backend
+        for key, per_minute, burst in limits:
+            if per_minute <= 0:
+                continue
+            # Stop at the first empty bucket: a limited client doesn't drain the others
+            wait = backend.take(key, per_minute / 60, burst)
+            if wait:
+                return wait
+        return 0.0
+
+    async def check(self, *limits: tuple[str, int, int]) -> None:
+        """
+        Spends one token from each (key, per_minute, burst) bucket, in order.
+
+        :raises HTTPException: 429 Too Many Requests, with Retry-After, if a bucket is empty.
+        """
+        if self.backend.blocking:
+            wait = await run_in_threadpool(self._take_all, limits)
+        else:
+            wait = self._take_all(limits)
+
+        if wait:
+            self.limited += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail='Too many attempts, please retry later',
+                headers={'Retry-After': str(math.ceil(wait))}
+            )
+        self.allowed += 1
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> dict:
+        """Returns allowed/limited counters and the backend's own stats."""
+        return {'allowed': self.allowed, 'limited': self.limited, **self.backend.stats()}
+
+
+def build_backend(name: str | None = None):
+    """Creates a bucket backend ('memory', 'redis' or 'none'; defaults to RATE_LIMIT_BACKEND)."""
+    settings = get_settings()
+    name = name or settings.rate_limit_backend
+    if name == 'redis':
+        import redis # Optional dependency, only needed for RATE_LIMIT_BACKEND=redis
+        return RedisBuckets(redis.Redis.from_url(settings.redis_url))
+    if name == 'none':
+        return NullBuckets()
+    return MemoryBuckets()
+
+
+# Shared instance used by the route dependencies below.
+# Tests can swap the backend, e.g. rate_limiter.backend = MemoryBuckets()
+rate_limiter = RateLimiter()
+
+
+# --- ROUTE DEPENDENCIES ---
+def client_ip(request: Request) -> str:
+    # Behind a reverse proxy, run uvicorn with --proxy-headers/--forwarded-allow-ips so
+    # this is the client's address rather than the proxy's
+    return request.client.host if request.client else 'unknown'
+
+
+async def limit_login(request: Request, form: OAuth2PasswordRequestForm = Depends()) -> None:
+    """
+    Per-IP and per-account limits for /login.
+
+    The per-IP bucket slows down one client trying many accounts; the per-account bucket
+    slows down many clients (a botnet) trying one account. The form is parsed once and
+    shared with the handler.
+    """
+    settings = get_settings()
+    await rate_limiter.check(
+        (f'login:ip:{client_ip(request)}', settings.login_ip_per_minute, settings.login_ip_burst),
+        # Bounded, so an oversized username can't be used to grow the bucket keys
+        (f'login:user:{form.username.strip().lower()[:254]}', settings.login_user_per_minute,
+         settings.login_user_burst),
+    )
+
+
+async def limit_registration(request: Request) -> None:
+    """Per-IP limit for POST /user/ (there is no existing account to key on)."""
+    settings = get_settings()
+    await rate_limiter.check(
+        (f'register:ip:{client_ip(request)}', settings.register_ip_per_minute, settings.register_ip_burst),
+    )
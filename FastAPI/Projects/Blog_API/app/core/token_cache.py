@@ -0,0 +1,62 @@
+# app/core/token_cache.py
+
+import hashlib
+import time
+
+from app import schemas
+from app.core.config import get_settings
+from app.core.lru import BoundedLRU
+
+
+class TokenCache:
+    """
+    Bounded LRU cache of already verified JWTs.
+
+    Entries are keyed by a SHA-256 digest of the token (the raw token is never stored)
+    and hold the validated TokenData until the token's own 'exp', after which they are
+    treated as a miss and dropped.
+    """
+
+    def __init__(self, maxsize: int | None = None):
+        # None: TOKEN_CACHE_SIZE, read on first use. 'exp' is a UNIX timestamp, hence the wall clock.
+        self._lru: BoundedLRU[bytes, schemas.TokenData] = BoundedLRU(
+            maxsize if maxsize is not None else lambda: get_settings().token_cache_size,
+            clock=time.time,
+        )
+
+    @property
+    def maxsize(self) -> int:
+        return self._lru.maxsize
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> schemas.TokenData | None:
+        """Returns the cached TokenData for a token, or None if absent or expired."""
+        # Never serves a token past its 'exp', even if it is still in the cache
+        return self._lru.get(self._key(token))
+
+    def put(self, token: str, token_data: schemas.TokenData, expires_at: float | None) -> None:
+        """
+        Caches a verified token until its expiry time.
+
+        :param token: The raw JWT string.
+        :param token_data: The validated data extracted from the token.
+        :param expires_at: The token's 'exp' as a UNIX timestamp; tokens without one are not cached.
+        """
+        if expires_at is None or expires_at <= time.time():
+            return
+        self._lru.put(self._key(token), token_data, expires_at)
+
+    def clear(self) -> None:
+        """Removes every cached token."""
+        self._lru.clear()
+
+    def stats(self) -> dict:
+        """Returns hit/miss counters and the current size, for monitoring."""
+        return self._lru.stats()
+
+
+# Shared instance used by get_current_user
+token_cache = TokenCache()
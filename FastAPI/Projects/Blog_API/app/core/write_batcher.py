@@ -0,0 +1,142 @@
+# app/core/write_batcher.py
+
+import asyncio
+from typing import Any, Callable
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.config import get_settings
+from app.database import open_session, run_db, session_factory
+
+
+class WriteBatcher:
+    """
+    Group commit: coalesces concurrent writes into one transaction.
+
+    submit() queues an item and waits for its result. The queue is flushed once max_items
+    are waiting, or window_ms after the first of them arrived. Items submitted while a flush
+    is running go into the next one, so a slow commit grows the batches instead of making
+    every request wait its turn for the write lock and pay its own fsync.
+
+    'flush' is a repository function taking (items, db) and returning one result per item
+    in the same order. When a batch fails in the database, each of its items is retried
+    alone, so one bad item only fails its own request. 'after', if given, is awaited with
+    (items, results) once a batch has committed, before its requests get their results
+    (e.g. to invalidate caches off the database thread).
+
+    Lives on the event loop (no locks): call submit() from async code only.
+    """
+
+    def __init__(
+        self, flush: Callable, window_ms: int | None = None, max_items: int | None = None,
+        after: Callable | None = None
+    ):
+        self._flush = flush
+        self._after = after
+        self._window_ms = window_ms # None: WRITE_BATCH_WINDOW_MS, read on first use
+        self._max_items = max_items # None: WRITE_BATCH_MAX_ITEMS, read on first use
+        self._pending: list[tuple[Any, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._flusher: asyncio.Task | None = None
+        self.batches = 0
+        self.items = 0
+        self.largest = 0
+        self.retried = 0
+
+    @property
+    def window(self) -> float:
+        """Seconds to wait for more items after the first one."""
+        if self._window_ms is None:
+            self._window_ms = get_settings().write_batch_window_ms
+        return self._window_ms / 1000
+
+    @property
+    def max_items(self) -> int:
+        if self._max_items is None:
+            self._max_items = get_settings().write_batch_max_items
+        return max(1, self._max_items)
+
+    async def submit(self, item) -> Any:
+        """
+        Queues one item for the next flush.
+
+        :return: The flush function's result for this item.
+        :raises Exception: Whatever writing this item raised.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((item, future))
+        if self._flusher is None:
+            if len(self._pending) >= self.max_items:
+                self._start()
+            elif self._timer is None:
+                self._timer = asyncio.get_running_loop().call_later(self.window, self._start)
+        # If the request is cancelled meanwhile, its item is still written
+        return await future
+
+    def _start(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._flusher is None and self._pending:
+            self._flusher = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        try:
+            while self._pending:
+                batch = self._pending[:self.max_items]
+                del self._pending[:self.max_items]
+                await self._write(batch)
+        finally:
+            self._flusher = None
+
+    async def _write(self, batch: list) -> None:
+        try:
+            async with open_session(session_factory()) as db:
+                results = await run_db(db, self._flush, [item for item, _ in batch])
+        except SQLAlchemyError as exc:
+            if len(batch) == 1:
+                _resolve(batch[0][1], exception=exc)
+                return
+            # The transaction was rolled back: write the items one by one to find the bad ones
+            self.retried += 1
+            for entry in batch:
+                await self._write([entry])
+            return
+        except Exception as exc:
+            for _, future in batch:
+                _resolve(future, exception=exc)
+            return
+
+        self.batches += 1
+        self.items += len(batch)
+        self.largest = max(self.largest, len(batch))
+        if self._after is not None:
+            await self._after([item for item, _ in batch], results)
+        for (_, future), result in zip(batch, results):
+            _resolve(future, result=result)
+
+    async def drain(self) -> None:
+        """Flushes whatever is queued and waits for it (called on shutdown)."""
+        self._start()
+        if self._flusher is not None:
+            await self._flusher
+
+    def stats(self) -> dict:
+        """Returns batch counters and the mean batch size, for monitoring."""
+        return {
+            'batches': self.batches,
+            'items': self.items,
+            'largest_batch': self.largest,
+            'mean_batch': self.items / self.batches if self.batches else 0.0,
+            'retried_batches': self.retried,
+        }
+
+
+def _resolve(future: asyncio.Future, result=None, exception: BaseException | None = None) -> None:
+    # The waiting request may have been cancelled (client went away)
+    if future.done():
+        return
+    if exception is not None:
+        future.set_exception(exception)
+    else:
+        future.set_result(result)
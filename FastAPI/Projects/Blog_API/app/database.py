@@ -1,46 +1,445 @@
-# app/database.py
-
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-import os
-from dotenv import load_dotenv
-
-load_dotenv() # Load env vars for DATABASE_URL
-
-# --- CONFIGURATION ---
-# Correct path for a local file in the project root
-# Using os.getenv for flexibility, falling back to local file path
-SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", 'sqlite:///./test.db')
-
-# --- ENGINE CREATION ---
-# Create the SQLAlchemy Engine
-# The connect_args is essential for SQLite when used with multiple threads (like FastAPI)
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, 
-    connect_args={"check_same_thread": False}
-)
-
-# --- SESSION CREATION ---
-# Configure the SessionLocal class to manage database sessions
-SessionLocal = sessionmaker(
-    bind=engine, 
-    autocommit=False, 
-    autoflush=False
-)
-
-# --- BASE CLASS ---
-# Base class for all declarative SQLAlchemy models
-Base = declarative_base()
-
-# --- DATABASE DEPENDENCY ---
-def get_db():
-    """
-    Dependency function to provide a database session to FastAPI route handlers.
-    It ensures the session is created, yielded for use, and reliably closed afterward.
-    """
-    db = SessionLocal() # Create a new session
-    try:
-        yield db # Yield the session to the calling function
-    finally:
-        db.close() # Close the session to release the connection
\ No newline at end of file
+# app/database.py
+
+import asyncio
+import itertools
+import logging
+from contextlib import asynccontextmanager
+from functools import lru_cache
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import Session, sessionmaker
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# --- CONFIGURATION ---
+# Async drivers used when ASYNC_DATABASE_URL is not given explicitly
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+}
+
+def to_async_url(url: str) -> str:
+    """Maps a sync database URL onto its asyncio driver (e.g. sqlite:// -> sqlite+aiosqlite://)."""
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None or parsed.drivername == driver:
+        return url
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+# --- ENGINE PROFILES (DB_PROFILE) ---
+# PRAGMAs run on every new SQLite connection. 'default' keeps SQLite's own settings
+# (rollback journal: a writer blocks every reader until it commits). 'production' switches
+# to WAL, where readers keep reading the last committed state while a write is in progress,
+# and syncs on checkpoints rather than on every commit (a power cut can lose the last
+# commits, never corrupt the file). 'durable' is WAL that still fsyncs every commit.
+SQLITE_PROFILES = {
+    'default': {},
+    'production': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -65536, # Negative: in KiB (64 MiB per connection)
+        'mmap_size': 268435456, # 256 MiB of the file read through the page cache
+        'busy_timeout': 5000, # ms a writer waits for the lock before 'database is locked'
+    },
+    'durable': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'cache_size': -65536,
+        'mmap_size': 268435456,
+        'busy_timeout': 5000,
+    },
+}
+
+def sqlite_pragmas(profile: str) -> dict:
+    """Returns the PRAGMAs of a DB_PROFILE; raises ValueError for an unknown one."""
+    try:
+        return SQLITE_PROFILES[profile]
+    except KeyError:
+        raise ValueError(f"Unknown DB_PROFILE {profile!r}, expected one of {', '.join(SQLITE_PROFILES)}") from None
+
+def _apply_pragmas(engine: Engine, pragmas: dict) -> None:
+    """Runs the PRAGMAs on each connection the engine opens (sync engine or an AsyncEngine's sync_engine)."""
+    if not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+
+def engine_options(url: str) -> dict:
+    """
+    create_engine keyword arguments for a URL. SQLite needs check_same_thread=False when
+    used from several threads (like FastAPI's threadpool); server databases get the
+    DB_POOL_* settings (SQLite connections are cheap, its default pool is left alone).
+    """
+    settings = get_settings()
+    if make_url(url).get_backend_name() == 'sqlite':
+        return {'connect_args': {'check_same_thread': False}}
+    return {
+        'pool_size': settings.db_pool_size,
+        'max_overflow': settings.db_max_overflow,
+        'pool_timeout': settings.db_pool_timeout_seconds,
+        'pool_recycle': settings.db_pool_recycle_seconds,
+        'pool_pre_ping': settings.db_pool_pre_ping,
+    }
+
+def make_engine(url: str, profile: str | None = None) -> Engine:
+    """Creates a sync Engine for url with engine_options and the DB_PROFILE (or given) PRAGMAs."""
+    engine = create_engine(url, **engine_options(url))
+    if engine.dialect.name == 'sqlite':
+        _apply_pragmas(engine, sqlite_pragmas(profile or get_settings().db_profile))
+    return engine
+
+def make_async_engine(url: str, profile: str | None = None) -> AsyncEngine:
+    """Async counterpart of make_engine (url must name an async driver)."""
+    options = engine_options(url)
+    options.pop('connect_args', None) # aiosqlite runs each connection on its own thread
+    engine = create_async_engine(url, **options)
+    if engine.dialect.name == 'sqlite':
+        _apply_pragmas(engine.sync_engine, sqlite_pragmas(profile or get_settings().db_profile))
+    return engine
+
+# --- ENGINE CREATION ---
+# Engines and session factories are built on first use rather than at import, so
+# importing the app (worker spawn, test collection, CLI tools) does no database work.
+@lru_cache
+def get_engine() -> Engine:
+    """Returns the SQLAlchemy Engine, creating it on the first call."""
+    return make_engine(get_settings().database_url)
+
+# --- SESSION CREATION ---
+# expire_on_commit=False: objects returned by a write stay loaded after the commit,
+# so building the response doesn't re-SELECT what the write just returned
+@lru_cache
+def get_sessionmaker() -> sessionmaker:
+    """Returns the factory that creates sync sessions bound to get_engine()."""
+    return sessionmaker(
+        bind=get_engine(),
+        autocommit=False,
+        autoflush=False,
+        expire_on_commit=False
+    )
+
+def SessionLocal() -> Session:
+    """Opens a new sync session (same call sites as the sessionmaker it wraps)."""
+    return get_sessionmaker()()
+
+# --- ASYNC ENGINE / SESSION (ASYNC_DB=true only) ---
+# expire_on_commit=False: an AsyncSession can't lazily reload expired attributes
+# while FastAPI serializes the response.
+@lru_cache
+def get_async_engine() -> AsyncEngine:
+    """Returns the AsyncEngine (async driver required), creating it on the first call."""
+    settings = get_settings()
+    return make_async_engine(settings.async_database_url or to_async_url(settings.database_url))
+
+@lru_cache
+def get_async_sessionmaker() -> async_sessionmaker:
+    """Returns the factory that creates AsyncSessions bound to get_async_engine()."""
+    return async_sessionmaker(
+        bind=get_async_engine(),
+        autoflush=False,
+        expire_on_commit=False
+    )
+
+def AsyncSessionLocal() -> AsyncSession:
+    """Opens a new AsyncSession."""
+    return get_async_sessionmaker()()
+
+# --- READ REPLICAS (DATABASE_REPLICA_URLS) ---
+class ReplicaSet:
+    """
+    The replica engines, handed out round-robin, skipping any that failed its last
+    health check. Built for the session kind in use (sync, or async with ASYNC_DB=true).
+    """
+
+    def __init__(self, engines: list, sessionmakers: list):
+        self.engines = engines
+        self.sessionmakers = sessionmakers
+        self.healthy = [True] * len(engines)
+        self._turn = itertools.count() # next() on a count is atomic under the GIL
+
+    def pick(self) -> int | None:
+        """Returns the index of the next healthy replica, or None if there is none."""
+        start = next(self._turn)
+        for offset in range(len(self.engines)):
+            index = (start + offset) % len(self.engines)
+            if self.healthy[index]:
+                return index
+        return None
+
+    async def check(self, timeout: float = 2.0) -> None:
+        """Pings every replica with SELECT 1 and records which ones answered in time."""
+        for index, engine in enumerate(self.engines):
+            try:
+                await asyncio.wait_for(_ping(engine), timeout)
+                healthy = True
+            except Exception:
+                healthy = False
+            if healthy != self.healthy[index]:
+                logger.warning('Replica %d (%s) is %s', index, engine.url.render_as_string(),
+                               'back up' if healthy else 'down, reads skip it')
+            self.healthy[index] = healthy
+
+    async def dispose(self) -> None:
+        for engine in self.engines:
+            if isinstance(engine, AsyncEngine):
+                await engine.dispose()
+            else:
+                engine.dispose()
+
+async def _ping(engine) -> None:
+    if isinstance(engine, AsyncEngine):
+        async with engine.connect() as conn:
+            await conn.execute(text('SELECT 1'))
+        return
+
+    def ping():
+        with engine.connect() as conn:
+            conn.execute(text('SELECT 1'))
+    await run_in_threadpool(ping)
+
+@lru_cache
+def get_replicas() -> ReplicaSet:
+    """Returns the ReplicaSet for DATABASE_REPLICA_URLS (empty when none is configured)."""
+    settings = get_settings()
+    if settings.async_db:
+        engines = [make_async_engine(to_async_url(url)) for url in settings.replica_urls]
+        factory = async_sessionmaker
+    else:
+        engines = [make_engine(url) for url in settings.replica_urls]
+        factory = sessionmaker
+    return ReplicaSet(engines, [factory(bind=engine, autoflush=False, expire_on_commit=False) for engine in engines])
+
+async def monitor_replicas() -> None:
+    """Re-checks the replicas' health forever; run as a task for the app's lifetime."""
+    replicas = get_replicas()
+    while True:
+        await asyncio.sleep(get_settings().replica_check_interval_seconds)
+        await replicas.check()
+
+def dispose_engines() -> None:
+    """Closes pooled connections of every engine built so far (called on shutdown)."""
+    if get_engine.cache_info().currsize:
+        get_engine().dispose()
+
+async def dispose_async_engines() -> None:
+    """Async counterpart of dispose_engines, also closing the replicas' connections."""
+    if get_async_engine.cache_info().currsize:
+        await get_async_engine().dispose()
+    if get_replicas.cache_info().currsize:
+        await get_replicas().dispose()
+
+# Either kind of session a route handler may receive from get_session
+AnySession = Session | AsyncSession
+
+# --- BASE CLASS ---
+# Base class for all declarative SQLAlchemy models
+Base = declarative_base()
+
+# --- DATABASE DEPENDENCY ---
+def get_db():
+    """
+    Dependency function to provide a database session to FastAPI route handlers.
+    It ensures the session is created, yielded for use, and reliably closed afterward.
+    """
+    db = SessionLocal() # Create a new session
+    try:
+        yield db # Yield the session to the calling function
+    finally:
+        db.close() # Close the session to release the connection
+
+async def get_async_db():
+    """
+    Async counterpart of get_db, yielding an AsyncSession (requires ASYNC_DB=true).
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+@asynccontextmanager
+async def open_session(factory):
+    """Opens a session from factory (sync or async) and closes it without blocking the loop."""
+    db = factory()
+    if isinstance(db, AsyncSession):
+        async with db:
+            yield db
+    else:
+        try:
+            yield db
+        finally:
+            await run_in_threadpool(db.close)
+
+def session_factory():
+    """Returns the primary's session factory: AsyncSessionLocal if ASYNC_DB is set, else SessionLocal."""
+    return AsyncSessionLocal if get_settings().async_db else SessionLocal
+
+async def get_session():
+    """
+    The dependency routers use; yields an AsyncSession if ASYNC_DB is set, else a sync
+    Session (closed in the threadpool, as get_db would be). Always on the primary.
+    """
+    async with open_session(session_factory()) as db:
+        yield db
+
+# --- READ-ONLY SESSIONS ---
+# Set on every successful write response; while the client sends it back, its reads
+# stay on the primary, so it sees its own writes even if the replicas lag behind.
+READ_PRIMARY_COOKIE = 'read_primary'
+
+class PrimaryPins:
+    """
+    The users who wrote in the last READ_YOUR_WRITES_SECONDS, keyed on the 'uid' of their
+    token, so the pin holds for API clients that never send cookies back. Stored in Redis
+    when CACHE_BACKEND=redis (shared by every worker), else in this process.
+    """
+
+    def __init__(self, backend=None):
+        self._backend = backend # None: built on first use
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            from app.core.cache import LRUCache, build_backend
+            self._backend = build_backend('redis') if get_settings().cache_backend == 'redis' else LRUCache()
+        return self._backend
+
+    @backend.setter
+    def backend(self, backend) -> None:
+        self._backend = backend
+
+    async def pin(self, user_id: int, seconds: int) -> None:
+        if self.backend.blocking:
+            await run_in_threadpool(self.backend.set, f'pin:user:{user_id}', b'1', seconds)
+        else:
+            self.backend.set(f'pin:user:{user_id}', b'1', seconds)
+
+    async def is_pinned(self, user_id: int) -> bool:
+        if self.backend.blocking:
+            return await run_in_threadpool(self.backend.get, f'pin:user:{user_id}') is not None
+        return self.backend.get(f'pin:user:{user_id}') is not None
+
+primary_pins = PrimaryPins()
+
+def _token_user_id(headers) -> int | None:
+    """The signed 'uid' of the request's bearer token, or None (no token, invalid, or issued without one)."""
+    from app.core import jwt_token
+    from app.core.token_cache import token_cache
+
+    scheme, _, token = (headers.get('authorization') or '').partition(' ')
+    if scheme.lower() != 'bearer' or not token:
+        return None
+    token_data = token_cache.get(token)
+    if token_data is None:
+        try:
+            token_data = jwt_token.verify_token(token, ValueError())
+        except ValueError:
+            return None
+    return token_data.id
+
+def _pinning_enabled() -> bool:
+    settings = get_settings()
+    return bool(settings.replica_urls) and settings.read_your_writes_seconds > 0
+
+def read_session_factory(primary: bool = False):
+    """
+    Returns the session factory for read-only work: the next healthy replica, or the
+    primary's when primary is set or no replica is configured or healthy.
+    """
+    replicas = get_replicas()
+    index = None if primary else replicas.pick()
+    if index is not None:
+        return replicas.sessionmakers[index]
+    return session_factory()
+
+async def reads_from_primary(request: Request) -> bool:
+    """True if the client wrote recently: it sent READ_PRIMARY_COOKIE, or its token's user is pinned."""
+    pinned = getattr(request.state, 'read_primary', None) # Asked once per request
+    if pinned is None:
+        pinned = _pinning_enabled() and (
+            READ_PRIMARY_COOKIE in request.cookies
+            or await _user_pinned(_token_user_id(request.headers))
+        )
+        request.state.read_primary = pinned
+    return pinned
+
+async def _user_pinned(user_id: int | None) -> bool:
+    return user_id is not None and await primary_pins.is_pinned(user_id)
+
+async def get_read_session(request: Request):
+    """
+    Dependency for read-only routes: like get_session, but on a replica when configured.
+    Never write through this session; a replica may reject it, or silently lose it.
+    """
+    async with open_session(read_session_factory(await reads_from_primary(request))) as db:
+        yield db
+
+async def get_cached_read_session(request: Request):
+    """
+    Dependency for the routes that fill the response cache (GET /blog/{id}, /user/{id}):
+    always on the primary while the cache stores anything, since an entry filled from a
+    lagging replica would be served to every client. With CACHE_BACKEND=none it is
+    get_read_session.
+    """
+    from app.core.cache import response_cache
+
+    primary = response_cache.enabled or await reads_from_primary(request)
+    async with open_session(read_session_factory(primary)) as db:
+        yield db
+
+class ReadYourWritesMiddleware:
+    """
+    Pins a client to the primary for READ_YOUR_WRITES_SECONDS after each successful
+    write (any 2xx/3xx response to a non-GET/HEAD/OPTIONS request): its token's user is
+    pinned in primary_pins, and a short-lived cookie is set for clients that keep cookies.
+    """
+
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['method'] in self.SAFE_METHODS or not _pinning_enabled():
+            await self.app(scope, receive, send)
+            return
+
+        seconds = get_settings().read_your_writes_seconds
+        cookie = f'{READ_PRIMARY_COOKIE}=1; Max-Age={seconds}; Path=/; HttpOnly; SameSite=Lax'.encode()
+
+        async def send_with_pin(message):
+            if message['type'] == 'http.response.start' and message['status'] < 400:
+                user_id = _token_user_id(Request(scope).headers)
+                if user_id is not None:
+                    await primary_pins.pin(user_id, seconds)
+                message = {**message, 'headers': [*message.get('headers', []), (b'set-cookie', cookie)]}
+            await send(message)
+
+        await self.app(scope, receive, send_with_pin)
+
+async def run_db(db: AnySession, fn, *args, **kwargs):
+    """
+    Runs a repository function against either kind of session, without blocking the event loop.
+
+    With an AsyncSession the function runs through run_sync, so its queries go through the
+    async driver; with a plain Session it runs in the threadpool as before. The function
+    receives the (sync) session as its 'db' keyword argument.
+
+    :param db: The session provided by get_session.
+    :param fn: The repository function to call.
+    :return: Whatever the repository function returns.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(lambda session: fn(*args, db=session, **kwargs))
+    return await run_in_threadpool(fn, *args, db=db, **kwargs)
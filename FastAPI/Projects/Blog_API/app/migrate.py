@@ -0,0 +1,303 @@
+# app/migrate.py
+"""
+Brings the database schema up to date by applying the versioned migrations below, in order.
+
+Every applied version is recorded in the schema_migrations table, so each migration runs
+once per database; a database created before migrations existed is upgraded in place.
+Run it once per deploy, before starting the workers, and set AUTO_CREATE_SCHEMA=false
+so the workers don't all race to migrate the same database at startup (python -m app.serve
+does both for you):
+
+    python -m app.migrate            # apply pending migrations
+    python -m app.migrate --status   # list applied and pending migrations
+
+To change the schema, append a migration; never edit one that was already released.
+"""
+
+import argparse
+import time
+from datetime import datetime, timezone
+from typing import Callable
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, MetaData, String, Table, inspect, insert, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from app.database import get_engine
+
+# --- VERSION TABLE ---
+# Kept out of models.Base: it belongs to the migrations, not to the application
+schema_migrations = Table(
+    'schema_migrations', MetaData(),
+    Column('version', Integer, primary_key=True),
+    Column('name', String, nullable=False),
+    Column('applied_at', DateTime, nullable=False),
+)
+
+# (version, name, apply(connection)), in version order
+MIGRATIONS: list[tuple[int, str, Callable[[Connection], None]]] = []
+
+def migration(version: int, name: str):
+    """
+    Registers a migration. Each one runs in its own transaction, under the migration lock
+    (see _lock), and should still be idempotent (CREATE ... IF NOT EXISTS, check before
+    altering): on backends without a lock two processes migrating at once may both run it.
+    """
+    def register(apply):
+        assert not MIGRATIONS or MIGRATIONS[-1][0] < version, 'migrations must be appended in order'
+        MIGRATIONS.append((version, name, apply))
+        return apply
+    return register
+
+def _run(connection: Connection, statements: dict) -> None:
+    """Runs the statements listed for the connection's dialect (none for other dialects)."""
+    for statement in statements.get(connection.dialect.name, []):
+        connection.execute(text(statement))
+
+def _add_column_if_missing(connection: Connection, table: str, column: str, ddl: str) -> None:
+    if column not in {c['name'] for c in inspect(connection).get_columns(table)}:
+        connection.execute(text(f'ALTER TABLE {table} ADD COLUMN {column} {ddl}'))
+
+# --- LOCKING ---
+# Several processes may migrate at once (hosts starting together, python -m app.serve masters).
+# Each migration takes a database-wide lock for its transaction, then re-checks whether
+# another process applied it meanwhile, so no two processes ever run the same one.
+MIGRATION_LOCK_ID = 0x626c6f67 # pg_advisory_xact_lock key ('blog')
+MIGRATION_LOCK_TIMEOUT_SECONDS = 600
+
+def _lock(connection: Connection) -> None:
+    """Takes the migration lock until the connection's transaction ends (PostgreSQL, SQLite)."""
+    if connection.dialect.name == 'postgresql':
+        connection.execute(text('SELECT pg_advisory_xact_lock(:id)'), {'id': MIGRATION_LOCK_ID})
+    elif connection.dialect.name == 'sqlite':
+        # Takes SQLite's write lock up front; a migration holding it may take longer than the
+        # busy timeout (e.g. indexing every post), so keep asking until it is released
+        deadline = time.monotonic() + MIGRATION_LOCK_TIMEOUT_SECONDS
+        while True:
+            try:
+                connection.exec_driver_sql('BEGIN IMMEDIATE')
+                return
+            except OperationalError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.1)
+
+# --- MIGRATIONS ---
+# The tables as first released, frozen: app/models.py describes the latest schema, which
+# the later migrations build from this one
+INITIAL_SCHEMA = MetaData()
+
+Table(
+    'users', INITIAL_SCHEMA,
+    Column('id', Integer, primary_key=True, index=True),
+    Column('name', String),
+    Column('email', String, unique=True),
+    Column('password', String),
+)
+
+Table(
+    'blogs', INITIAL_SCHEMA,
+    Column('id', Integer, primary_key=True, index=True),
+    Column('title', String),
+    Column('body', String),
+    Column('user_id', Integer, ForeignKey('users.id')),
+)
+
+@migration(1, 'tables')
+def create_tables(connection: Connection) -> None:
+    # Existing tables are left as is, so a database predating the migrations is brought
+    # up to date by the later ones
+    INITIAL_SCHEMA.create_all(bind=connection)
+
+@migration(2, 'version columns')
+def add_version_columns(connection: Connection) -> None:
+    # Databases created before the ETag support lack them
+    for table in ('blogs', 'users'):
+        _add_column_if_missing(connection, table, 'version', 'INTEGER NOT NULL DEFAULT 1')
+
+# SQLite: an external-content FTS5 table mirroring blogs.title/body. Triggers keep it in
+# sync, so every write path (ORM add, bulk insert, UPDATE/DELETE statements) updates it.
+# PostgreSQL: a GIN expression index over models.blog_search_document() (no extra table).
+SEARCH_DDL = {
+    'sqlite': [
+        """CREATE VIRTUAL TABLE IF NOT EXISTS blogs_fts
+           USING fts5(title, body, content='blogs', content_rowid='id')""",
+        """CREATE TRIGGER IF NOT EXISTS blogs_fts_insert AFTER INSERT ON blogs BEGIN
+             INSERT INTO blogs_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS blogs_fts_delete AFTER DELETE ON blogs BEGIN
+             INSERT INTO blogs_fts(blogs_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS blogs_fts_update AFTER UPDATE OF title, body ON blogs BEGIN
+             INSERT INTO blogs_fts(blogs_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+             INSERT INTO blogs_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+           END""",
+        # Index the posts written before the search table existed
+        "INSERT INTO blogs_fts(blogs_fts) VALUES ('rebuild')",
+    ],
+    'postgresql': [
+        """CREATE INDEX IF NOT EXISTS ix_blogs_search ON blogs
+           USING gin (to_tsvector('english', coalesce(title, '') || ' ' || coalesce(body, '')))""",
+    ],
+}
+
+@migration(3, 'full-text search index')
+def create_search_index(connection: Connection) -> None:
+    _run(connection, SEARCH_DDL)
+
+# Any insert/update/delete on blogs bumps the owning user's version inside the same
+# statement, so user ETags (and the creator part of blog ETags) change without the
+# application issuing an extra UPDATE.
+VERSION_TRIGGERS_DDL = {
+    'sqlite': [
+        """CREATE TRIGGER IF NOT EXISTS blogs_owner_version_insert AFTER INSERT ON blogs BEGIN
+             UPDATE users SET version = version + 1 WHERE id = new.user_id;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS blogs_owner_version_delete AFTER DELETE ON blogs BEGIN
+             UPDATE users SET version = version + 1 WHERE id = old.user_id;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS blogs_owner_version_update AFTER UPDATE ON blogs BEGIN
+             UPDATE users SET version = version + 1 WHERE id IN (old.user_id, new.user_id);
+           END""",
+    ],
+    'postgresql': [
+        """CREATE OR REPLACE FUNCTION blogs_owner_version() RETURNS trigger AS $$
+           BEGIN
+             IF TG_OP <> 'INSERT' THEN
+               UPDATE users SET version = version + 1 WHERE id = OLD.user_id;
+             END IF;
+             IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW.user_id IS DISTINCT FROM OLD.user_id) THEN
+               UPDATE users SET version = version + 1 WHERE id = NEW.user_id;
+             END IF;
+             RETURN NULL;
+           END;
+           $$ LANGUAGE plpgsql""",
+        "DROP TRIGGER IF EXISTS blogs_owner_version ON blogs",
+        """CREATE TRIGGER blogs_owner_version AFTER INSERT OR UPDATE OR DELETE ON blogs
+           FOR EACH ROW EXECUTE FUNCTION blogs_owner_version()""",
+    ],
+}
+
+@migration(4, 'owner version triggers')
+def create_version_triggers(connection: Connection) -> None:
+    _run(connection, VERSION_TRIGGERS_DDL)
+
+@migration(5, 'blogs (user_id, id) index')
+def create_blogs_user_index(connection: Connection) -> None:
+    # Without it, loading Users.blogs scans every post (see benchmarks/query_plans.py).
+    # users.email needs no index of its own: its UNIQUE constraint already has one.
+    connection.execute(text('CREATE INDEX IF NOT EXISTS ix_blogs_user_id_id ON blogs (user_id, id)'))
+
+# The owner triggers now also keep users.blog_count and users.last_posted_at, in the same
+# single-row UPDATE that bumps users.version (replacing the migration 4 triggers)
+OWNER_TRIGGERS_DDL = {
+    'sqlite': [
+        "DROP TRIGGER IF EXISTS blogs_owner_version_insert",
+        "DROP TRIGGER IF EXISTS blogs_owner_version_delete",
+        "DROP TRIGGER IF EXISTS blogs_owner_version_update",
+        """CREATE TRIGGER IF NOT EXISTS blogs_owner_insert AFTER INSERT ON blogs BEGIN
+             UPDATE users SET version = version + 1, blog_count = blog_count + 1,
+                              last_posted_at = CURRENT_TIMESTAMP
+             WHERE id = new.user_id;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS blogs_owner_delete AFTER DELETE ON blogs BEGIN
+             UPDATE users SET version = version + 1, blog_count = blog_count - 1 WHERE id = old.user_id;
+           END""",
+        # 'IS' compares NULLs too (posts may have no owner); (a IS b) is 0 or 1
+        """CREATE TRIGGER IF NOT EXISTS blogs_owner_update AFTER UPDATE ON blogs BEGIN
+             UPDATE users SET version = version + 1,
+                              blog_count = blog_count + (id IS new.user_id) - (id IS old.user_id)
+             WHERE id IN (old.user_id, new.user_id);
+           END""",
+    ],
+    'postgresql': [
+        """CREATE OR REPLACE FUNCTION blogs_owner_version() RETURNS trigger AS $$
+           BEGIN
+             IF TG_OP = 'UPDATE' AND NEW.user_id IS NOT DISTINCT FROM OLD.user_id THEN
+               UPDATE users SET version = version + 1 WHERE id = NEW.user_id;
+               RETURN NULL;
+             END IF;
+             IF TG_OP <> 'INSERT' THEN
+               UPDATE users SET version = version + 1, blog_count = blog_count - 1 WHERE id = OLD.user_id;
+             END IF;
+             IF TG_OP = 'INSERT' THEN
+               UPDATE users SET version = version + 1, blog_count = blog_count + 1,
+                                last_posted_at = now() AT TIME ZONE 'utc'
+               WHERE id = NEW.user_id;
+             ELSIF TG_OP = 'UPDATE' THEN
+               UPDATE users SET version = version + 1, blog_count = blog_count + 1 WHERE id = NEW.user_id;
+             END IF;
+             RETURN NULL;
+           END;
+           $$ LANGUAGE plpgsql""",
+    ],
+}
+
+@migration(6, 'user blog counts')
+def add_blog_counts(connection: Connection) -> None:
+    _add_column_if_missing(connection, 'users', 'blog_count', 'INTEGER NOT NULL DEFAULT 0')
+    _add_column_if_missing(connection, 'users', 'last_posted_at', 'TIMESTAMP')
+    _run(connection, OWNER_TRIGGERS_DDL)
+    # Count the existing posts (their creation time isn't recorded: last_posted_at stays NULL)
+    connection.execute(text(
+        'UPDATE users SET blog_count = (SELECT COUNT(*) FROM blogs WHERE blogs.user_id = users.id)'
+    ))
+
+# --- RUNNER ---
+def applied_versions(bind: Engine) -> set[int]:
+    """Returns the versions already applied to the database (creating the version table if needed)."""
+    if not inspect(bind).has_table(schema_migrations.name):
+        with bind.begin() as connection:
+            _lock(connection)
+            schema_migrations.create(connection, checkfirst=True)
+    with bind.connect() as connection:
+        return set(connection.scalars(select(schema_migrations.c.version)))
+
+def create_schema(bind: Engine | None = None) -> list[int]:
+    """
+    Applies every pending migration, in order. Safe to run repeatedly, and from several
+    processes at once: they take turns, and each migration is applied by one of them.
+
+    :param bind: The engine to migrate (defaults to app.database.get_engine()).
+    :return: The versions applied by this call.
+    """
+    bind = bind or get_engine()
+    applied = applied_versions(bind)
+    done = []
+    for version, name, apply in MIGRATIONS:
+        if version in applied:
+            continue
+        try:
+            with bind.begin() as connection:
+                _lock(connection)
+                if connection.scalar(select(schema_migrations.c.version).where(schema_migrations.c.version == version)):
+                    continue # Applied by another process while this one waited for the lock
+                apply(connection)
+                connection.execute(insert(schema_migrations).values(
+                    version=version, name=name, applied_at=datetime.now(timezone.utc)
+                ))
+        except IntegrityError:
+            continue # Recorded by another process migrating at the same time (no lock on this backend)
+        done.append(version)
+    return done
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Apply the pending database migrations.')
+    parser.add_argument('--status', action='store_true', help='list the migrations without applying any')
+    args = parser.parse_args()
+
+    if args.status:
+        applied = applied_versions(get_engine())
+        for version, name, _ in MIGRATIONS:
+            print(f"{version:>4}  {'applied' if version in applied else 'pending':<9}{name}")
+        return
+
+    started = time.perf_counter()
+    done = create_schema()
+    print(f'Applied {len(done)} migration(s), schema at version {MIGRATIONS[-1][0]}, '
+          f'in {(time.perf_counter() - started) * 1000:.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
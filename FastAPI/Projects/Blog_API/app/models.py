@@ -1,30 +1,53 @@
-# app/models.py
-
-from sqlalchemy import Column, Integer, String, ForeignKey
-from sqlalchemy.orm import relationship
-from .database import Base # Relative import from the current package
-
-class Blog(Base):
-    """SQLAlchemy model for the 'blogs' table."""
-    __tablename__ = 'blogs'
-
-    id = Column(Integer, primary_key=True, index= True)
-    title = Column(String)
-    body = Column(String)
-    # Foreign key linking a blog post to its creator (user)
-    user_id = Column(Integer, ForeignKey('users.id')) 
-
-    # Relationship to the Users table
-    creator = relationship('Users', back_populates='blogs')
-
-class Users(Base):
-    """SQLAlchemy model for the 'users' table."""
-    __tablename__ = 'users'
-
-    id = Column(Integer, primary_key=True, index= True)
-    name = Column(String)
-    email = Column(String, unique=True) # Added unique constraint for email
-    password = Column(String)
-
-    # Relationship to the Blog table
-    blogs = relationship('Blog', back_populates='creator')
\ No newline at end of file
+# app/models.py
+
+from sqlalchemy import Column, DateTime, Index, Integer, String, ForeignKey, func
+from sqlalchemy.orm import relationship
+from .database import Base # Relative import from the current package
+
+class Blog(Base):
+    """SQLAlchemy model for the 'blogs' table."""
+    __tablename__ = 'blogs'
+
+    id = Column(Integer, primary_key=True, index= True)
+    title = Column(String)
+    body = Column(String)
+    # Foreign key linking a blog post to its creator (user)
+    user_id = Column(Integer, ForeignKey('users.id')) 
+    # Incremented on every update; backs the ETag / If-Match headers
+    version = Column(Integer, nullable=False, default=1, server_default='1')
+
+    # Relationship to the Users table
+    creator = relationship('Users', back_populates='blogs')
+
+    __table_args__ = (
+        # Backs Users.blogs (WHERE user_id IN ...) and per-user pagination (user_id = ? AND id > ?)
+        Index('ix_blogs_user_id_id', 'user_id', 'id'),
+    )
+
+class Users(Base):
+    """SQLAlchemy model for the 'users' table."""
+    __tablename__ = 'users'
+
+    id = Column(Integer, primary_key=True, index= True)
+    name = Column(String)
+    email = Column(String, unique=True) # Added unique constraint for email
+    password = Column(String)
+    # Incremented whenever the user or one of their blogs changes (triggers, see app/migrate.py),
+    # since ShowUser and every ShowBlog of this user embed the user's blog list
+    version = Column(Integer, nullable=False, default=1, server_default='1')
+    # Denormalized from blogs by the same triggers, so a profile card needs no blog query:
+    # the number of posts, and when the latest one was created (UTC; deletes don't change it)
+    blog_count = Column(Integer, nullable=False, default=0, server_default='0')
+    last_posted_at = Column(DateTime, nullable=True)
+
+    # Relationship to the Blog table
+    blogs = relationship('Blog', back_populates='creator')
+
+# --- FULL-TEXT SEARCH ---
+# The search tables/indexes and the triggers keeping them (and the users columns derived
+# from blogs) up to date are created by the migrations in app/migrate.py, not by create_all.
+def blog_search_document():
+    """PostgreSQL tsvector over title and body; must match the expression of ix_blogs_search."""
+    return func.to_tsvector(
+        'english', func.coalesce(Blog.title, '') + ' ' + func.coalesce(Blog.body, '')
+    )
@@ -0,0 +1,27 @@
+# app/repair.py
+"""
+Recomputes the denormalized user columns from the blogs table:
+
+    python -m app.repair
+
+The triggers created by app/migrate.py keep users.blog_count exact on every write, so
+this is only needed after rows were written with them bypassed (a restore, a bulk load
+with triggers disabled, manual edits). Safe to run at any time; it reports how many
+users it corrected.
+"""
+
+import time
+
+from app.database import SessionLocal
+from app.repository import user
+
+
+def main():
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        repaired = user.repair_blog_counts(db)
+    print(f'Repaired blog_count of {repaired} user(s) in {(time.perf_counter() - started) * 1000:.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,109 +1,452 @@
-# app/repository/blog.py
-
-from sqlalchemy.orm import Session
-from fastapi import HTTPException, status
-from typing import List
-
-from .. import models, schemas # Relative imports
-
-# --- READ ALL ---
-def get_all(db: Session) -> List[models.Blog]:
-    """Retrieves all blog posts from the database."""
-    blogs = db.query(models.Blog).all()
-    return blogs
-
-# --- CREATE ---
-def create(request: schemas.BlogCreate, db: Session, user_id: int) -> models.Blog:
-    """
-    Creates a new blog post.
-
-    :param request: The validated blog creation data (title, body).
-    :param db: The database session.
-    :param user_id: The ID of the authenticated user creating the blog.
-    :return: The newly created Blog model object.
-    """
-    # Map Pydantic schema data to SQLAlchemy model, including the creator's ID
-    new_blog = models.Blog(
-        title=request.title, 
-        body=request.body,
-        user_id=user_id # Link the blog to the current user
-    )
-    
-    db.add(new_blog)
-    db.commit()
-    db.refresh(new_blog) # Refresh to get the auto-generated ID
-    return new_blog
-
-# --- DELETE ---
-def destroy(id: int, db: Session):
-    """
-    Deletes a blog post by ID.
-
-    :param id: ID of the blog to delete.
-    :param db: The database session.
-    :raises HTTPException: If the blog is not found.
-    :return: Success message.
-    """
-    # Query for the blog using filter and get the query object
-    blog_query = db.query(models.Blog).filter(models.Blog.id == id)
-    
-    if not blog_query.first():
-        # Raise 404 if no blog matches the ID
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, 
-            detail=f'Blog with the id {id} is not available'
-        )
-        
-    # Perform the deletion
-    blog_query.delete(synchronize_session=False)
-    db.commit()
-    
-    return 'Blog deleted successfully'
-
-
-# --- UPDATE ---
-def update(id: int, request: schemas.BlogUpdate, db: Session) -> str:
-    """
-    Updates an existing blog post.
-
-    :param id: ID of the blog to update.
-    :param request: The validated update data.
-    :param db: The database session.
-    :raises HTTPException: If the blog is not found.
-    :return: Success message.
-    """
-    # Get the query object to perform the update
-    blog_query = db.query(models.Blog).filter(models.Blog.id == id)
-    
-    if not blog_query.first():
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, 
-            detail=f'Blog with the id {id} is not available'
-        )
-    
-    # Update the record with the new data from the request, excluding unset fields
-    blog_query.update(request.model_dump(exclude_unset=True), synchronize_session=False)
-    db.commit()
-    
-    return 'Blog updated successfully'
-
-# --- READ ONE ---
-def show(id: int, db: Session) -> models.Blog:
-    """
-    Retrieves a single blog post by ID.
-
-    :param id: ID of the blog to retrieve.
-    :param db: The database session.
-    :raises HTTPException: If the blog is not found.
-    :return: The requested Blog model object.
-    """
-    # Use .first() to retrieve the single object
-    blog = db.query(models.Blog).filter(models.Blog.id == id).first()
-    
-    if not blog:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, 
-            detail=f'Blog with the id {id} is not available'
-        )
-        
+# app/repository/blog.py
+
+from sqlalchemy import delete, func, insert, literal, or_, select, text
+from sqlalchemy import update as update_stmt # "update" is the repository function below
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, load_only, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from fastapi import HTTPException, status
+from typing import AbstractSet, AsyncIterator, Iterator, List, Optional
+
+from .. import models, schemas # Relative imports
+
+# --- PAGINATION LIMITS ---
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100 # Hard cap so a single request can never load the whole table
+
+# --- READ PAGE (KEYSET) ---
+def get_all(
+    db: Session,
+    limit: int = DEFAULT_PAGE_SIZE,
+    after: Optional[int] = None,
+    fields: Optional[AbstractSet[str]] = None
+) -> dict:
+    """
+    Retrieves one page of blog posts ordered by ID using keyset (cursor) pagination.
+
+    :param db: The database session.
+    :param limit: Maximum number of blogs to return (clamped to MAX_PAGE_SIZE).
+    :param after: Cursor from the previous page; only blogs with a greater ID are returned.
+    :param fields: ShowBlog fields the response needs (None for all). Columns and
+                   relationships outside it are not loaded.
+    :return: A dict with the page 'items' and the 'next_cursor' (None on the last page).
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    fields = schemas.BLOG_FIELDS if fields is None else fields
+
+    # Seek on the primary key instead of using OFFSET, so deep pages cost the same as the first
+    query = db.query(models.Blog)
+    if fields != schemas.BLOG_FIELDS:
+        # Narrow the SELECT to the requested columns (the version is kept for the ETag)
+        columns = [getattr(models.Blog, name) for name in ('title', 'body') if name in fields]
+        if 'creator' in fields:
+            columns.append(models.Blog.user_id)
+        query = query.options(load_only(models.Blog.version, *columns))
+    if 'creator' in fields:
+        # ShowBlog -> creator -> creator.blogs: load each level for the whole page in one
+        # SELECT ... IN (...) instead of one lazy load per row
+        query = query.options(selectinload(models.Blog.creator).selectinload(models.Users.blogs))
+    if after is not None:
+        query = query.filter(models.Blog.id > after)
+
+    # Fetch one extra row to find out whether another page exists
+    blogs = query.order_by(models.Blog.id).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(blogs) > limit:
+        blogs = blogs[:limit]
+        next_cursor = blogs[-1].id
+
+    return {'items': blogs, 'next_cursor': next_cursor}
+
+# --- VERSIONS (ETAGS) ---
+def get_page_versions(db: Session, limit: int = DEFAULT_PAGE_SIZE, after: Optional[int] = None) -> dict:
+    """
+    Reads only (id, version, creator version) for the page get_all would return,
+    so a conditional GET can be answered without loading titles and bodies.
+
+    :return: A dict with the page 'rows' and 'has_more' (whether a next page exists).
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    query = (
+        select(models.Blog.id, models.Blog.version, models.Users.version)
+        .outerjoin(models.Users, models.Blog.user_id == models.Users.id)
+        .order_by(models.Blog.id)
+        .limit(limit + 1)
+    )
+    if after is not None:
+        query = query.where(models.Blog.id > after)
+
+    rows = [tuple(row) for row in db.execute(query)]
+    return {'rows': rows[:limit], 'has_more': len(rows) > limit}
+
+def get_versions(id: int, db: Session) -> tuple[int, Optional[int], Optional[int]]:
+    """
+    Reads the version of a blog and of its creator without loading the row.
+
+    :raises HTTPException: If the blog is not found.
+    :return: (blog version, creator version or None, creator ID or None).
+    """
+    row = db.execute(
+        select(models.Blog.version, models.Users.version, models.Blog.user_id)
+        .outerjoin(models.Users, models.Blog.user_id == models.Users.id)
+        .where(models.Blog.id == id)
+    ).first()
+
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, 
+            detail=f'Blog with the id {id} is not available'
+        )
+    return row[0], row[1], row[2]
+
+# --- FULL-TEXT SEARCH ---
+SEARCH_PAGE_SIZE = 20
+
+SQLITE_SEARCH_SQL = text("""
+    SELECT blogs.id, blogs.title,
+           snippet(blogs_fts, -1, '<b>', '</b>', '...', 16) AS snippet,
+           -bm25(blogs_fts, 10.0, 1.0) AS score -- title matches weigh more than body matches
+    FROM blogs_fts JOIN blogs ON blogs.id = blogs_fts.rowid
+    WHERE blogs_fts MATCH :query
+    ORDER BY bm25(blogs_fts, 10.0, 1.0)
+    LIMIT :limit OFFSET :offset
+""")
+
+def _fts5_query(q: str) -> str:
+    """Quotes every search term so user input can't be parsed as FTS5 query syntax."""
+    return ' '.join('"' + term.replace('"', '""') + '"' for term in q.split())
+
+def search(q: str, db: Session, limit: int = SEARCH_PAGE_SIZE, offset: int = 0) -> dict:
+    """
+    Full-text search over blog titles and bodies, best matches first.
+
+    Uses the FTS5 table (bm25 ranking) on SQLite and the GIN tsvector index (ts_rank) on
+    PostgreSQL; other backends fall back to an unindexed LIKE scan.
+
+    :param q: The search terms (all of them must match; none, e.g. only whitespace, matches nothing).
+    :param db: The database session.
+    :param limit: Maximum number of hits to return (clamped to MAX_PAGE_SIZE).
+    :param offset: Number of hits to skip.
+    :return: A dict with the matching 'items' and the 'next_offset' (None on the last page).
+    """
+    q = q.strip()
+    if not q:
+        # No terms: an empty FTS5 MATCH is a syntax error, and nothing can match anyway
+        return {'items': [], 'next_offset': None}
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    dialect = db.get_bind().dialect.name
+
+    if dialect == 'sqlite':
+        rows = db.execute(
+            SQLITE_SEARCH_SQL, {'query': _fts5_query(q), 'limit': limit + 1, 'offset': offset}
+        ).all()
+    elif dialect == 'postgresql':
+        document = models.blog_search_document()
+        query = func.plainto_tsquery('english', q)
+        score = func.ts_rank(document, query)
+        rows = db.execute(
+            select(
+                models.Blog.id,
+                models.Blog.title,
+                func.ts_headline(
+                    'english', models.Blog.body, query, 'StartSel=<b>, StopSel=</b>, MaxWords=16'
+                ).label('snippet'),
+                score.label('score'),
+            )
+            .where(document.op('@@')(query))
+            .order_by(score.desc(), models.Blog.id)
+            .limit(limit + 1)
+            .offset(offset)
+        ).all()
+    else:
+        pattern = f'%{q}%'
+        rows = db.execute(
+            select(
+                models.Blog.id,
+                models.Blog.title,
+                func.substr(models.Blog.body, 1, 120).label('snippet'),
+                literal(0.0).label('score'),
+            )
+            .where(or_(models.Blog.title.ilike(pattern), models.Blog.body.ilike(pattern)))
+            .order_by(models.Blog.id)
+            .limit(limit + 1)
+            .offset(offset)
+        ).all()
+
+    next_offset = offset + limit if len(rows) > limit else None
+    return {'items': [dict(row._mapping) for row in rows[:limit]], 'next_offset': next_offset}
+
+# --- EXPORT (STREAMING) ---
+EXPORT_BATCH_SIZE = 1000 # Rows fetched from the database per round trip
+EXPORT_COLUMNS = ('id', 'title', 'body', 'user_id')
+
+def export_query():
+    """SELECT used by the bulk export: plain columns only, no ORM objects or relationships."""
+    return select(
+        models.Blog.id, models.Blog.title, models.Blog.body, models.Blog.user_id
+    ).order_by(models.Blog.id)
+
+def iter_export_batches(db: Session, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[list]:
+    """
+    Yields every blog row in batches, streaming them from the database cursor.
+
+    :param db: The database session.
+    :param batch_size: Number of rows buffered per batch (server-side cursor where supported).
+    :return: An iterator of row lists; memory stays bounded by one batch.
+    """
+    result = db.execute(export_query().execution_options(yield_per=batch_size))
+    for rows in result.partitions():
+        yield rows
+
+async def iter_export_batches_async(db: AsyncSession, batch_size: int = EXPORT_BATCH_SIZE) -> AsyncIterator[list]:
+    """Async counterpart of iter_export_batches for ASYNC_DB mode."""
+    result = await db.stream(export_query().execution_options(yield_per=batch_size))
+    async for rows in result.partitions():
+        yield rows
+
+# --- CREATE ---
+def create(request: schemas.BlogCreate, db: Session, user_id: int) -> models.Blog:
+    """
+    Creates a new blog post.
+
+    :param request: The validated blog creation data (title, body).
+    :param db: The database session.
+    :param user_id: The ID of the authenticated user creating the blog.
+    :return: The newly created Blog model object, with its creator (and their blogs) loaded.
+             The caller invalidates the creator's cached entries.
+    """
+    # Map Pydantic schema data to table columns, including the creator's ID
+    row = {
+        'title': request.title, 
+        'body': request.body,
+        'user_id': user_id # Link the blog to the current user
+    }
+
+    if db.get_bind().dialect.insert_returning:
+        # INSERT ... RETURNING hands back the generated ID and defaults: no refresh SELECT
+        new_blog = db.scalars(insert(models.Blog).returning(models.Blog), [row]).one()
+    else:
+        new_blog = models.Blog(**row)
+        db.add(new_blog)
+        db.flush()
+    db.commit()
+
+    # The response embeds the creator and their blog list: one joined SELECT for both,
+    # so a create is two statements (INSERT ... RETURNING, then this)
+    creator = db.scalars(
+        select(models.Users)
+        .options(joinedload(models.Users.blogs))
+        .where(models.Users.id == user_id)
+    ).unique().first()
+    set_committed_value(new_blog, 'creator', creator)
+    return new_blog
+
+# --- CREATE MANY (BATCH) ---
+MAX_BATCH_SIZE = 500 # Upper bound on posts accepted by a single batch request
+
+def _insert_rows(rows: List[dict], db: Session) -> List[int]:
+    """Inserts blog rows in as few statements as the backend allows; returns their IDs in order."""
+    stmt = insert(models.Blog)
+    dialect = db.get_bind().dialect
+    if dialect.name == 'sqlite':
+        # SQLite gives each row of a multi-row INSERT the next INTEGER PRIMARY KEY in VALUES
+        # order (writers hold the database lock), so the returned IDs sorted ascending line
+        # up with the rows. Asking SQLAlchemy for sort_by_parameter_order here would make it
+        # fall back to one INSERT per row.
+        return sorted(db.scalars(stmt.returning(models.Blog.id), rows).all())
+    if dialect.insert_executemany_returning_sort_by_parameter_order:
+        # One executemany (batched multi-row INSERTs) that hands back the IDs in request order
+        return list(db.scalars(
+            stmt.returning(models.Blog.id, sort_by_parameter_order=True), rows
+        ).all())
+    # Backend can't return IDs from executemany: insert row by row, still in one transaction
+    return [db.execute(stmt, row).inserted_primary_key[0] for row in rows]
+
+def create_many(requests: List[schemas.BlogCreate], db: Session, user_id: int) -> List[int]:
+    """
+    Inserts several blog posts in a single transaction.
+
+    :param requests: The validated blog creation data.
+    :param db: The database session.
+    :param user_id: The ID of the authenticated user creating the blogs.
+    :return: The new blog IDs, in the same order as the requests (the caller invalidates
+             the user's cached entries).
+    """
+    rows = [
+        {'title': request.title, 'body': request.body, 'user_id': user_id}
+        for request in requests
+    ]
+    if not rows:
+        return []
+
+    ids = _insert_rows(rows, db)
+    db.commit()
+    return ids
+
+def create_coalesced(items: List[tuple], db: Session) -> List[models.Blog]:
+    """
+    Creates posts for several users in one transaction (a flush of the write batcher).
+
+    :param items: (BlogCreate, user_id) pairs, one per waiting create request.
+    :param db: The database session.
+    :return: The new Blog objects in item order, each with its creator (and their blogs) loaded,
+             as create would return them.
+    """
+    ids = _insert_rows(
+        [{'title': request.title, 'body': request.body, 'user_id': user_id} for request, user_id in items], db
+    )
+    # Every response embeds its creator's blog list: three SELECTs however large the batch.
+    # Read before the commit, so a batch that raises has written nothing and can be retried.
+    blogs = db.scalars(
+        select(models.Blog)
+        .options(selectinload(models.Blog.creator).selectinload(models.Users.blogs))
+        .where(models.Blog.id.in_(ids))
+    ).all()
+    db.commit()
+
+    by_id = {blog.id: blog for blog in blogs}
+    return [by_id[id] for id in ids]
+
+# --- DELETE ---
+def _not_found(id: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND, 
+        detail=f'Blog with the id {id} is not available'
+    )
+
+def _write_failed(
+    id: int, db: Session, user_id: Optional[int], expected_version: Optional[int] = None
+) -> HTTPException:
+    """
+    Explains why an UPDATE/DELETE matched no row. Failure path only: the write itself
+    checks existence, ownership and version in its WHERE clause.
+    """
+    row = db.execute(select(models.Blog.user_id).where(models.Blog.id == id)).first()
+    if row is None:
+        return _not_found(id)
+    if user_id is not None and row.user_id != user_id:
+        return HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, 
+            detail=f'Blog with the id {id} belongs to another user'
+        )
+    if expected_version is not None:
+        return HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED, 
+            detail=f'Blog with the id {id} was modified by another request'
+        )
+    return _not_found(id) # Deleted concurrently
+
+def _execute_returning_owner(stmt, id: int, db: Session, supported: bool):
+    """
+    Executes an UPDATE/DELETE on one blog and returns its owner's row, or None if nothing matched.
+
+    With RETURNING this is the only round trip; otherwise (e.g. MySQL) the owner is read
+    first and a zero rowcount still means nothing matched.
+    """
+    if supported:
+        return db.execute(stmt.returning(models.Blog.user_id)).first()
+
+    owner = db.execute(select(models.Blog.user_id).where(models.Blog.id == id)).first()
+    if owner is not None and db.execute(stmt).rowcount == 0:
+        return None
+    return owner
+
+def _owned(stmt, id: int, user_id: Optional[int]):
+    """Restricts an UPDATE/DELETE to blog 'id', and to its owner when user_id is given."""
+    stmt = stmt.where(models.Blog.id == id)
+    if user_id is not None:
+        stmt = stmt.where(models.Blog.user_id == user_id)
+    return stmt
+
+def destroy(id: int, db: Session, user_id: Optional[int] = None) -> Optional[int]:
+    """
+    Deletes a blog post by ID.
+
+    :param id: ID of the blog to delete.
+    :param db: The database session.
+    :param user_id: If given, only delete the blog while it belongs to this user.
+    :raises HTTPException: 404 if the blog is not found, 403 if it belongs to another user.
+    :return: The ID of the blog's owner (whose cached entries the caller invalidates).
+    """
+    # A single DELETE: no row returned means no blog matched the ID (and owner)
+    owner = _execute_returning_owner(
+        _owned(delete(models.Blog), id, user_id),
+        id, db, db.get_bind().dialect.delete_returning
+    )
+    
+    if owner is None:
+        # Raise 404 if no blog matches the ID, 403 if it isn't the user's
+        raise _write_failed(id, db, user_id)
+        
+    db.commit()
+    return owner.user_id
+
+
+# --- UPDATE ---
+def update(
+    id: int,
+    request: schemas.BlogUpdate,
+    db: Session,
+    expected_version: Optional[int] = None,
+    user_id: Optional[int] = None
+) -> Optional[int]:
+    """
+    Updates an existing blog post.
+
+    :param id: ID of the blog to update.
+    :param request: The validated update data.
+    :param db: The database session.
+    :param expected_version: If given, only update while the blog is still at this version.
+    :param user_id: If given, only update the blog while it belongs to this user.
+    :raises HTTPException: 404 if the blog is not found, 403 if it belongs to another user,
+                           412 if it changed since expected_version.
+    :return: The ID of the blog's owner (whose cached entries the caller invalidates).
+    """
+    # Update the record with the new data from the request, excluding unset fields
+    changes = request.model_dump(exclude_unset=True)
+    changes['version'] = models.Blog.version + 1
+
+    # The ownership and version checks happen inside the UPDATE, so no concurrent writer can slip in
+    stmt = _owned(update_stmt(models.Blog), id, user_id).values(changes)
+    if expected_version is not None:
+        stmt = stmt.where(models.Blog.version == expected_version)
+
+    owner = _execute_returning_owner(stmt, id, db, db.get_bind().dialect.update_returning)
+
+    if owner is None:
+        db.rollback()
+        # Tell a missing blog, someone else's blog and a failed If-Match apart
+        raise _write_failed(id, db, user_id, expected_version)
+
+    db.commit()
+    return owner.user_id
+
+# --- READ ONE ---
+def show(id: int, db: Session) -> models.Blog:
+    """
+    Retrieves a single blog post by ID.
+
+    :param id: ID of the blog to retrieve.
+    :param db: The database session.
+    :raises HTTPException: If the blog is not found.
+    :return: The requested Blog model object.
+    """
+    # Use .first() to retrieve the single object; the creator is joined into the same
+    # SELECT and the creator's blogs are fetched with a single extra query
+    blog = (
+        db.query(models.Blog)
+        .options(
+            joinedload(models.Blog.creator).selectinload(models.Users.blogs)
+        )
+        .filter(models.Blog.id == id)
+        .first()
+    )
+    
+    if not blog:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, 
+            detail=f'Blog with the id {id} is not available'
+        )
+        
     return blog
\ No newline at end of file
@@ -1,59 +1,152 @@
-# app/repository/user.py
-
-from sqlalchemy.orm import Session
-from fastapi import HTTPException, status
-
-from .. import schemas, models
-from ..core.hashing import Hash # Relative import for Hashing utility
-
-# --- CREATE USER ---
-def create(request: schemas.UserCreate, db: Session) -> models.Users:
-    """
-    Creates a new user with a hashed password.
-
-    :param request: The validated user creation data (name, email, password).
-    :param db: The database session.
-    :return: The newly created Users model object.
-    """
-    # Create the Users object, hashing the password before storing it
-    new_user = models.Users(
-        name=request.name, 
-        email=request.email, 
-        password=Hash.aragon2(request.password) # Hash the password
-    )
-    
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    return new_user
-
-# --- READ ONE USER ---
-def get_user_by_id(id: int, db: Session) -> models.Users:
-    """
-    Retrieves a user by their ID.
-
-    :param id: The ID of the user to retrieve.
-    :param db: The database session.
-    :raises HTTPException: If the user is not found.
-    :return: The requested Users model object.
-    """
-    # Fetch the user using their primary key ID
-    user = db.query(models.Users).filter(models.Users.id == id).first()
-    
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, 
-            detail=f'User with the id {id} is not available'
-        )
-    return user
-
-def get_user_by_email(email: str, db: Session) -> models.Users | None:
-    """
-    Retrieves a user by their email. Used primarily for authentication.
-
-    :param email: The email of the user.
-    :param db: The database session.
-    :return: The Users model object or None if not found.
-    """
-    user = db.query(models.Users).filter(models.Users.email == email).first()
-    return user
\ No newline at end of file
+# app/repository/user.py
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session, selectinload
+from fastapi import HTTPException, status
+
+from .. import schemas, models
+from ..core.hashing import Hash # Relative import for Hashing utility
+
+# --- CREATE USER ---
+def create(request: schemas.UserCreate, db: Session, hashed_password: str | None = None) -> models.Users:
+    """
+    Creates a new user with a hashed password.
+
+    :param request: The validated user creation data (name, email, password).
+    :param db: The database session.
+    :param hashed_password: The already hashed password; hashed here when not given.
+    :return: The newly created Users model object (the caller drops anything cached
+             for its ID or email).
+    """
+    # Create the Users object, hashing the password before storing it
+    new_user = models.Users(
+        name=request.name, 
+        email=request.email, 
+        password=hashed_password or Hash.aragon2(request.password) # Hash the password
+    )
+    
+    db.add(new_user)
+    db.commit()
+    # Reload with the blogs relationship populated so serialization never lazy loads
+    return get_user_by_id(new_user.id, db)
+
+# --- READ ONE USER ---
+def get_user_by_id(id: int, db: Session) -> models.Users:
+    """
+    Retrieves a user by their ID.
+
+    :param id: The ID of the user to retrieve.
+    :param db: The database session.
+    :raises HTTPException: If the user is not found.
+    :return: The requested Users model object.
+    """
+    # Fetch the user using their primary key ID; the blogs are loaded in one extra
+    # query (selectin avoids repeating the user columns on every joined blog row)
+    user = (
+        db.query(models.Users)
+        .options(selectinload(models.Users.blogs))
+        .filter(models.Users.id == id)
+        .first()
+    )
+    
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, 
+            detail=f'User with the id {id} is not available'
+        )
+    return user
+
+def get_user_version(id: int, db: Session) -> int:
+    """
+    Reads a user's version (for the ETag) without loading the row or their blogs.
+
+    :raises HTTPException: If the user is not found.
+    """
+    version = db.query(models.Users.version).filter(models.Users.id == id).scalar()
+    if version is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, 
+            detail=f'User with the id {id} is not available'
+        )
+    return version
+
+def get_user_summary(id: int, db: Session):
+    """
+    Reads a user's profile card from their row alone (a primary-key lookup; blog_count
+    and last_posted_at are kept up to date by triggers, see app/migrate.py).
+
+    :raises HTTPException: If the user is not found.
+    :return: A row with id, name, email, blog_count, last_posted_at and version.
+    """
+    summary = db.execute(
+        select(
+            models.Users.id, models.Users.name, models.Users.email,
+            models.Users.blog_count, models.Users.last_posted_at, models.Users.version
+        ).where(models.Users.id == id)
+    ).first()
+    if summary is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, 
+            detail=f'User with the id {id} is not available'
+        )
+    return summary
+
+def get_user_by_email(email: str, db: Session) -> models.Users | None:
+    """
+    Retrieves a user by their email. Used primarily for authentication.
+
+    :param email: The email of the user.
+    :param db: The database session.
+    :return: The Users model object or None if not found.
+    """
+    user = db.query(models.Users).filter(models.Users.email == email).first()
+    return user
+
+def get_user_id_by_email(email: str, db: Session) -> int | None:
+    """
+    Reads just a user's id by their email (identity cache misses).
+
+    :return: The user's ID or None if not found.
+    """
+    return db.query(models.Users.id).filter(models.Users.email == email).scalar()
+
+# --- UPDATE PASSWORD HASH ---
+def update_password(id: int, hashed_password: str, db: Session) -> None:
+    """
+    Replaces a user's stored password hash (e.g. after rehashing with new Argon2 parameters).
+
+    :param id: The ID of the user.
+    :param hashed_password: The new password hash.
+    :param db: The database session.
+    """
+    db.query(models.Users).filter(models.Users.id == id).update(
+        {models.Users.password: hashed_password}, synchronize_session=False
+    )
+    db.commit()
+
+# --- REPAIR DENORMALIZED COUNTS ---
+def repair_blog_counts(db: Session) -> int:
+    """
+    Recomputes every user's blog_count from the blogs table in one statement (see
+    'python -m app.repair'), bumping the version of the users it corrects so their
+    ETags change. Only needed when rows were written with the triggers bypassed
+    (e.g. a restore); on PostgreSQL a post written meanwhile may be miscounted, so
+    run it again until it reports no change.
+
+    :param db: The database session.
+    :return: The number of users whose count was wrong.
+    """
+    counted = (
+        select(func.count())
+        .select_from(models.Blog)
+        .where(models.Blog.user_id == models.Users.id)
+        .scalar_subquery()
+    )
+    result = db.execute(
+        update(models.Users)
+        .where(models.Users.blog_count != counted)
+        .values(blog_count=counted, version=models.Users.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount
@@ -1,56 +1,67 @@
-# app/routers/authentication.py
-
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from datetime import timedelta
-
-from app import schemas
-from app.database import get_db
-from app.repository import user # To fetch user by email
-from app.core.hashing import Hash # To verify password
-from app.core import jwt_token # To create JWT
-
-router = APIRouter(
-    tags=['Authentication']
-)
-
-@router.post('/login', response_model=schemas.Token)
-def login(
-    # OAuth2PasswordRequestForm is a standard FastAPI class for handling login requests
-    request: OAuth2PasswordRequestForm = Depends(), 
-    db: Session = Depends(get_db)
-):
-    """
-    Handles user login, verifies credentials, and returns an access token.
-    """
-    # 1. Fetch user by username (which is the email)
-    user_db = user.get_user_by_email(request.username, db)
-    
-    # Check if the user exists
-    if not user_db:
-        # Raise 404 (or 401) for incorrect credentials
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, 
-            detail="Invalid Credentials"
-        )
-        
-    # 2. Verify the password
-    if not Hash.verify(request.password, user_db.password):
-        # Raise 401 for incorrect password
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED, 
-            detail="Invalid Credentials"
-        )
-        
-    # 3. Generate JWT Token
-    # The subject ('sub') of the token is typically the unique user identifier (email)
-    access_token = jwt_token.create_access_token(
-        data={"sub": user_db.email}
-    )
-    
-    # 4. Return the token in the standard OAuth2 format
-    return {
-        "access_token": access_token, 
-        "token_type": "bearer"
+# app/routers/authentication.py
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security import OAuth2PasswordRequestForm
+from datetime import timedelta
+
+from app import schemas
+from app.database import AnySession, get_session, run_db
+from app.repository import user # To fetch user by email
+from app.core.hashing import Hash # To verify (and upgrade) the password hash
+from app.core import jwt_token # To create JWT
+from app.core.identity_cache import identity_cache
+from app.core.responses import FastJSONResponse
+from app.core.rate_limit import limit_login
+
+router = APIRouter(
+    tags=['Authentication'],
+    default_response_class=FastJSONResponse
+)
+
+# The rate limit runs first: a 429 costs no DB lookup and no hash
+@router.post('/login', response_model=schemas.Token, dependencies=[Depends(limit_login)])
+async def login(
+    # OAuth2PasswordRequestForm is a standard FastAPI class for handling login requests
+    request: OAuth2PasswordRequestForm = Depends(), 
+    db: AnySession = Depends(get_session)
+):
+    """
+    Handles user login, verifies credentials, and returns an access token.
+    """
+    # 1. Fetch user by username (which is the email)
+    user_db = await run_db(db, user.get_user_by_email, request.username)
+    
+    # Check if the user exists
+    if not user_db:
+        # Raise 404 (or 401) for incorrect credentials
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, 
+            detail="Invalid Credentials"
+        )
+        
+    # 2. Verify the password on the bounded hashing pool (503 if it is saturated)
+    is_valid, new_hash = await Hash.verify_and_update_async(request.password, user_db.password)
+    if not is_valid:
+        # Raise 401 for incorrect password
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, 
+            detail="Invalid Credentials"
+        )
+
+    # The stored hash uses outdated Argon2 parameters: replace it while we have the password
+    if new_hash:
+        await run_db(db, user.update_password, user_db.id, new_hash)
+        
+    # 3. Generate JWT Token
+    # The subject ('sub') of the token is typically the unique user identifier (email);
+    # 'uid' carries the user's id so routes never have to look it up
+    access_token = jwt_token.create_access_token(
+        data={"sub": user_db.email, "uid": user_db.id}
+    )
+    identity_cache.put(user_db.email, user_db.id) # Saves the first request's lookup
+    
+    # 4. Return the token in the standard OAuth2 format
+    return {
+        "access_token": access_token, 
+        "token_type": "bearer"
     }
\ No newline at end of file
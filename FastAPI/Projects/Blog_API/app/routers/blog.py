@@ -1,76 +1,296 @@
-# app/routers/blog.py
-
-from fastapi import APIRouter, Depends, status, Response
-from typing import List
-from sqlalchemy.orm import Session
-
-from app import schemas
-from app.database import get_db
-from app.repository import blog
-from app.core.oauth2 import get_current_user # Import the authentication dependency
-
-
-router = APIRouter(
-    prefix='/blog',
-    tags=['Blogs']
-)
-
-# --- READ ALL (GET) - Requires Authentication ---
-@router.get('/', response_model=List[schemas.ShowBlog])
-def get_all(
-    db: Session = Depends(get_db), 
-    current_user: schemas.TokenData = Depends(get_current_user) # Authorization dependency
-):
-    """Retrieves all blog posts. Requires a valid JWT."""
-    return blog.get_all(db)
-
-# --- CREATE (POST) - Requires Authentication ---
-@router.post('/', status_code=status.HTTP_201_CREATED, response_model=schemas.ShowBlog)
-def create_new_blog(
-    request: schemas.BlogCreate, 
-    db: Session = Depends(get_db), 
-    current_user: schemas.TokenData = Depends(get_current_user)
-):
-    """
-    Creates a new blog post and assigns it to the authenticated user.
-    """
-    # The current_user object contains the user's email (stored in TokenData)
-    # NOTE: You need to pass the user ID to the repository to link the blog!
-    # For a proper solution, we would fetch the full user object here or adjust the token.
-    # For now, we will use a placeholder ID or assume the repository handles the lookup.
-    # *** FOR SIMPLICITY, WE WILL USE A MOCKED USER ID 1 *** # **Production Ready code should fetch the user ID from the database using the email.**
-    return blog.create(request, db, user_id=1) 
-
-# --- UPDATE (PUT) - Requires Authentication ---
-@router.put('/{id}', status_code=status.HTTP_202_ACCEPTED)
-def update_existing_blog(
-    id: int, 
-    request: schemas.BlogUpdate, 
-    db: Session = Depends(get_db), 
-    current_user: schemas.TokenData = Depends(get_current_user)
-):
-    """Updates an existing blog post by ID."""
-    # NOTE: Add logic here to ensure the current_user is the actual creator of the blog.
-    return blog.update(id, request, db)
-
-# --- DELETE (DELETE) - Requires Authentication ---
-@router.delete('/{id}', status_code=status.HTTP_204_NO_CONTENT)
-def delete_blog_post(
-    id: int, 
-    db: Session = Depends(get_db), 
-    current_user: schemas.TokenData = Depends(get_current_user)
-):
-    """Deletes a blog post by ID."""
-    return blog.destroy(id, db)
-
-
-# --- READ ONE (GET) - Requires Authentication ---
-# The endpoint path is corrected from '/{id}' to just '/{id}' (was redundant)
-@router.get('/{id}', response_model=schemas.ShowBlog)
-def show_single_blog(
-    id: int, 
-    db: Session = Depends(get_db), 
-    current_user: schemas.TokenData = Depends(get_current_user)
-):
-    """Retrieves a single blog post by ID."""
-    return blog.show(id, db)
\ No newline at end of file
+# app/routers/blog.py
+
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Request, status, Response
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from starlette.concurrency import iterate_in_threadpool
+from typing import Any, AsyncIterator, List, Literal, Optional
+import csv
+import io
+import json
+
+from app import schemas
+from app.database import (
+    AnySession, get_cached_read_session, get_read_session, get_session, open_session, read_session_factory,
+    reads_from_primary, run_db, session_factory
+)
+from app.repository import blog
+from app.core.oauth2 import get_current_user # Import the authentication dependency
+from app.core.cache import response_cache
+from app.core.config import get_settings
+from app.core.responses import FastJSONResponse, dump_model, model_response
+from app.core.write_batcher import WriteBatcher
+from app.core import etag
+
+
+router = APIRouter(
+    prefix='/blog',
+    tags=['Blogs'],
+    default_response_class=FastJSONResponse
+)
+
+def _parse_fields(fields: Optional[str]) -> Optional[frozenset]:
+    """
+    Parses a ?fields= projection ('id,title') into a set of ShowBlog field names.
+
+    :raises HTTPException: 400 if it names a field ShowBlog doesn't have.
+    """
+    if fields is None:
+        return None
+    requested = frozenset(name.strip() for name in fields.split(',') if name.strip())
+    unknown = requested - schemas.BLOG_FIELDS
+    if not requested or unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, 
+            detail=f"Unknown field(s) {', '.join(sorted(unknown)) or '(none given)'}; "
+                   f"choose from {', '.join(sorted(schemas.BLOG_FIELDS))}"
+        )
+    return requested
+
+# --- READ PAGE (GET) - Requires Authentication ---
+@router.get('/', response_model=schemas.BlogPage)
+async def get_all(
+    limit: int = Query(blog.DEFAULT_PAGE_SIZE, ge=1, le=blog.MAX_PAGE_SIZE),
+    after: Optional[int] = Query(None, ge=0, description='next_cursor from the previous page'),
+    fields: Optional[str] = Query(None, description='Comma-separated ShowBlog fields to return, e.g. id,title'),
+    if_none_match: Optional[str] = Header(None),
+    db: AnySession = Depends(get_read_session), 
+    current_user: schemas.TokenData = Depends(get_current_user) # Authorization dependency
+):
+    """
+    Retrieves one page of blog posts, ordered by ID. Requires a valid JWT.
+    With ?fields=id,title only those fields are returned (and read from the database).
+    Answers 304 Not Modified when If-None-Match still matches the page's ETag.
+    """
+    projection = _parse_fields(fields)
+    # The creator's version only matters to the representation if the creator is included
+    with_creator = projection is None or 'creator' in projection
+
+    if if_none_match:
+        # Polling client: compare versions first, load bodies only if something changed
+        versions = await run_db(db, blog.get_page_versions, limit=limit, after=after)
+        rows = versions['rows'] if with_creator else [(id, version, None) for id, version, _ in versions['rows']]
+        page_etag = etag.blog_page_etag(rows, versions['has_more'], projection)
+        if etag.etag_matches(if_none_match, page_etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={'ETag': page_etag})
+
+    page = await run_db(db, blog.get_all, limit=limit, after=after, fields=projection)
+    page_etag = etag.blog_page_etag(
+        [(b.id, b.version, b.creator.version if with_creator and b.creator else None) for b in page['items']],
+        page['next_cursor'] is not None,
+        projection
+    )
+    adapter = schemas.BlogPageAdapter if projection is None else schemas.blog_page_projection(projection)
+    return model_response(adapter, page, headers={'ETag': page_etag})
+
+# --- SEARCH (GET) - Requires Authentication ---
+@router.get('/search', response_model=schemas.BlogSearchPage)
+async def search_blogs(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(blog.SEARCH_PAGE_SIZE, ge=1, le=blog.MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    db: AnySession = Depends(get_read_session), 
+    current_user: schemas.TokenData = Depends(get_current_user)
+):
+    """Full-text search over blog titles and bodies, ranked by relevance (no terms: no hits)."""
+    results = await run_db(db, blog.search, q, limit=limit, offset=offset)
+    return model_response(schemas.BlogSearchPageAdapter, results)
+
+# --- EXPORT (GET) - Requires Authentication ---
+EXPORT_MEDIA_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+async def _export_batches(primary: bool = False) -> AsyncIterator[list]:
+    """
+    Yields batches of blog rows on a (read-only) session owned by the stream itself,
+    since the response keeps streaming after the route handler has returned.
+    """
+    session_factory = read_session_factory(primary)
+    if get_settings().async_db:
+        async with session_factory() as db:
+            async for rows in blog.iter_export_batches_async(db):
+                yield rows
+        return
+
+    def sync_batches():
+        with session_factory() as db:
+            yield from blog.iter_export_batches(db)
+
+    # Each fetch runs on the threadpool so the event loop is never blocked by the driver
+    async for rows in iterate_in_threadpool(sync_batches()):
+        yield rows
+
+async def _encode_ndjson(batches: AsyncIterator[list]) -> AsyncIterator[str]:
+    """Encodes each batch as newline-delimited JSON objects."""
+    async for rows in batches:
+        yield ''.join(json.dumps(dict(row._mapping)) + '\n' for row in rows)
+
+async def _encode_csv(batches: AsyncIterator[list]) -> AsyncIterator[str]:
+    """Encodes each batch as CSV lines, preceded by a single header line."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(blog.EXPORT_COLUMNS)
+    yield buffer.getvalue()
+
+    async for rows in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue()
+
+@router.get('/export')
+async def export_blogs(
+    request: Request,
+    format: Literal['ndjson', 'csv'] = Query('ndjson'),
+    current_user: schemas.TokenData = Depends(get_current_user)
+):
+    """
+    Streams every blog post as NDJSON or CSV. Rows are read and written one batch
+    at a time, so memory use stays flat regardless of table size.
+    """
+    encode = _encode_ndjson if format == 'ndjson' else _encode_csv
+    return StreamingResponse(
+        encode(_export_batches(await reads_from_primary(request))),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={'Content-Disposition': f'attachment; filename="blogs.{format}"'}
+    )
+
+# --- CREATE (POST) - Requires Authentication ---
+async def _invalidate_creators(items: list, results: list) -> None:
+    # After each committed batch: every creator's blog list changed
+    for user_id in {user_id for _, user_id in items}:
+        await response_cache.after_write(response_cache.invalidate_user, user_id)
+
+# Group commit for creates when WRITE_BATCHING=true (shared by every request on this worker)
+create_batcher = WriteBatcher(blog.create_coalesced, after=_invalidate_creators)
+
+@router.post('/', status_code=status.HTTP_201_CREATED, response_model=schemas.ShowBlog)
+async def create_new_blog(
+    request: schemas.BlogCreate, 
+    current_user: schemas.TokenData = Depends(get_current_user)
+):
+    """
+    Creates a new blog post and assigns it to the authenticated user.
+    """
+    # The user's id comes from the token's signed 'uid' claim: no users-table lookup
+    if get_settings().write_batching:
+        # Inserted and committed together with the other creates arriving meanwhile, on the
+        # batcher's own session: no session is opened for this request
+        new_blog = await create_batcher.submit((request, current_user.id))
+    else:
+        async with open_session(session_factory()) as db:
+            new_blog = await run_db(db, blog.create, request, user_id=current_user.id)
+        # The creator's blog list changed: drop their cached payloads
+        await response_cache.after_write(response_cache.invalidate_user, current_user.id)
+    return model_response(schemas.ShowBlogAdapter, new_blog, status_code=status.HTTP_201_CREATED)
+
+# --- BATCH CREATE (POST) - Requires Authentication ---
+@router.post('/batch', status_code=status.HTTP_201_CREATED, response_model=schemas.BlogBatchResult)
+async def create_blogs_batch(
+    # Items are validated one by one below, so a bad item doesn't reject the whole batch
+    requests: List[Any] = Body(..., max_length=blog.MAX_BATCH_SIZE),
+    db: AnySession = Depends(get_session), 
+    current_user: schemas.TokenData = Depends(get_current_user)
+):
+    """
+    Creates many blog posts in one transaction. Invalid items are reported
+    in 'errors' by their index; the valid ones are still created.
+    """
+    valid, errors = [], []
+    for index, item in enumerate(requests):
+        try:
+            valid.append((index, schemas.BlogCreate.model_validate(item)))
+        except ValidationError as exc:
+            errors.append({'index': index, 'errors': exc.errors(include_url=False, include_context=False)})
+
+    ids = await run_db(db, blog.create_many, [request for _, request in valid], user_id=current_user.id)
+    if ids:
+        await response_cache.after_write(response_cache.invalidate_user, current_user.id)
+
+    return model_response(schemas.BlogBatchResultAdapter, {
+        'created': [{'index': index, 'id': id} for (index, _), id in zip(valid, ids)],
+        'errors': errors
+    }, status_code=status.HTTP_201_CREATED)
+
+# --- UPDATE (PUT) - Requires Authentication ---
+@router.put('/{id}', status_code=status.HTTP_202_ACCEPTED)
+async def update_existing_blog(
+    id: int, 
+    request: schemas.BlogUpdate, 
+    if_match: Optional[str] = Header(None),
+    db: AnySession = Depends(get_session), 
+    current_user: schemas.TokenData = Depends(get_current_user)
+):
+    """
+    Updates one of the authenticated user's blog posts by ID (403 for anyone else's).
+    Send the ETag from a previous GET as If-Match to have the update rejected (412)
+    if someone else changed the post in the meantime.
+    """
+    expected_version = None
+    if if_match and if_match.strip() != '*':
+        expected_version = etag.parse_blog_version(if_match)
+        if expected_version is None:
+            raise HTTPException(
+                status_code=status.HTTP_412_PRECONDITION_FAILED, 
+                detail='If-Match does not carry a valid blog ETag'
+            )
+
+    # Ownership is part of the UPDATE's WHERE clause: no extra query when it holds
+    owner_id = await run_db(
+        db, blog.update, id, request, expected_version=expected_version, user_id=current_user.id
+    )
+    await response_cache.after_write(response_cache.invalidate_blog, id, owner_id)
+    return 'Blog updated successfully'
+
+# --- DELETE (DELETE) - Requires Authentication ---
+@router.delete('/{id}', status_code=status.HTTP_204_NO_CONTENT)
+async def delete_blog_post(
+    id: int, 
+    db: AnySession = Depends(get_session), 
+    current_user: schemas.TokenData = Depends(get_current_user)
+):
+    """Deletes one of the authenticated user's blog posts by ID (403 for anyone else's)."""
+    owner_id = await run_db(db, blog.destroy, id, user_id=current_user.id)
+    await response_cache.after_write(response_cache.invalidate_blog, id, owner_id)
+
+
+# --- READ ONE (GET) - Requires Authentication ---
+# The endpoint path is corrected from '/{id}' to just '/{id}' (was redundant)
+@router.get('/{id}', response_model=schemas.ShowBlog)
+async def show_single_blog(
+    id: int, 
+    request: Request,
+    if_none_match: Optional[str] = Header(None),
+    db: AnySession = Depends(get_cached_read_session), 
+    current_user: schemas.TokenData = Depends(get_current_user)
+):
+    """
+    Retrieves a single blog post by ID (served from the response cache when possible).
+    Answers 304 Not Modified when If-None-Match still matches the post's ETag.
+    """
+    # A client that just wrote reads the primary, past entries stored before its write
+    cached = None
+    if not await reads_from_primary(request):
+        cached = await response_cache.run(response_cache.get_blog, id)
+    if cached is None:
+        # Versions and owner only: no title/body/creator loaded if the client's copy is current
+        version, creator_version, owner_id = await run_db(db, blog.get_versions, id)
+        if if_none_match:
+            blog_etag = etag.blog_etag(id, version, creator_version)
+            if etag.etag_matches(if_none_match, blog_etag):
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={'ETag': blog_etag})
+
+        # Read before the load: a write landing in between leaves the stored entry already stale
+        generation = await response_cache.run(response_cache.generation, owner_id)
+        blog_db = await run_db(db, blog.show, id)
+        blog_etag = etag.blog_etag(id, blog_db.version, blog_db.creator.version if blog_db.creator else None)
+        payload = dump_model(schemas.ShowBlogAdapter, blog_db)
+        await response_cache.run(response_cache.set_blog, id, owner_id, generation, blog_etag, payload)
+    else:
+        blog_etag, payload = cached
+
+    if etag.etag_matches(if_none_match, blog_etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={'ETag': blog_etag})
+    return Response(content=payload, media_type='application/json', headers={'ETag': blog_etag})
\ No newline at end of file
@@ -1,30 +1,96 @@
-# app/routers/user.py
-
-from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
-
-from app import schemas
-from app.database import get_db
-from app.repository import user # Import the repository module
-
-router = APIRouter(
-    prefix='/user',
-    tags=['Users']
-)
-
-# --- CREATE USER (POST) ---
-@router.post('/', response_model=schemas.ShowUser, status_code=status.HTTP_201_CREATED)
-def create_user(request: schemas.UserCreate, db: Session = Depends(get_db)):
-    """
-    Registers a new user and returns the user object.
-    """
-    return user.create(request, db)
-
-# --- READ ONE USER (GET) ---
-@router.get('/{id}', response_model=schemas.ShowUser)
-def show_user(id: int, db: Session = Depends(get_db)):
-    """
-    Retrieves a single user by ID, including their associated blogs.
-    """
-    # Use the specific user repository function
-    return user.get_user_by_id(id, db)
\ No newline at end of file
+# app/routers/user.py
+
+from fastapi import APIRouter, Depends, Header, Request, Response, status
+from typing import Optional
+
+from app import schemas
+from app.database import AnySession, get_cached_read_session, get_read_session, get_session, reads_from_primary, run_db
+from app.repository import user # Import the repository module
+from app.core.hashing import Hash
+from app.core.cache import response_cache
+from app.core.identity_cache import identity_cache
+from app.core.responses import FastJSONResponse, dump_model, model_response
+from app.core.rate_limit import limit_registration
+from app.core import etag
+
+router = APIRouter(
+    prefix='/user',
+    tags=['Users'],
+    default_response_class=FastJSONResponse
+)
+
+# --- CREATE USER (POST) ---
+# The rate limit runs first: a 429 costs no DB lookup and no hash
+@router.post(
+    '/',
+    response_model=schemas.ShowUser,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(limit_registration)]
+)
+async def create_user(request: schemas.UserCreate, db: AnySession = Depends(get_session)):
+    """
+    Registers a new user and returns the user object.
+    """
+    # Argon2 is CPU-bound: hash on the bounded hashing pool (503 if it is saturated)
+    hashed_password = await Hash.aragon2_async(request.password)
+    new_user = await run_db(db, user.create, request, hashed_password=hashed_password)
+    # SQLite may reuse the ID of a deleted user: make sure nothing stale is served for it,
+    # and that tokens issued to an earlier user with this email stop working
+    await response_cache.after_write(response_cache.invalidate_user, new_user.id)
+    identity_cache.invalidate(new_user.email)
+    return model_response(schemas.ShowUserAdapter, new_user, status_code=status.HTTP_201_CREATED)
+
+# --- READ ONE USER (GET) ---
+@router.get('/{id}', response_model=schemas.ShowUser)
+async def show_user(
+    id: int,
+    request: Request,
+    if_none_match: Optional[str] = Header(None),
+    db: AnySession = Depends(get_cached_read_session)
+):
+    """
+    Retrieves a single user by ID, including their associated blogs.
+    Answers 304 Not Modified when If-None-Match still matches the user's ETag.
+    """
+    # Serve the serialized payload from the response cache when possible, unless the
+    # client just wrote: it reads the primary, past entries stored before its write
+    cached = None
+    if not await reads_from_primary(request):
+        cached = await response_cache.run(response_cache.get_user, id)
+    if cached is None:
+        if if_none_match:
+            # Version only: the user's blogs are not loaded if the client's copy is current
+            user_etag = etag.user_etag(id, await run_db(db, user.get_user_version, id))
+            if etag.etag_matches(if_none_match, user_etag):
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={'ETag': user_etag})
+
+        # Read before the load: a write landing in between leaves the stored entry already stale
+        generation = await response_cache.run(response_cache.generation, id)
+        # Use the specific user repository function
+        user_db = await run_db(db, user.get_user_by_id, id)
+        user_etag = etag.user_etag(id, user_db.version)
+        payload = dump_model(schemas.ShowUserAdapter, user_db)
+        await response_cache.run(response_cache.set_user, id, generation, user_etag, payload)
+    else:
+        user_etag, payload = cached
+
+    if etag.etag_matches(if_none_match, user_etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={'ETag': user_etag})
+    return Response(content=payload, media_type='application/json', headers={'ETag': user_etag})
+
+# --- READ ONE USER SUMMARY (GET) ---
+@router.get('/{id}/summary', response_model=schemas.UserSummary)
+async def show_user_summary(
+    id: int,
+    if_none_match: Optional[str] = Header(None),
+    db: AnySession = Depends(get_read_session)
+):
+    """
+    Retrieves a user's profile card: their post count and last post time, without the blogs.
+    One primary-key read; answers 304 Not Modified when If-None-Match still matches.
+    """
+    summary = await run_db(db, user.get_user_summary, id)
+    summary_etag = etag.user_summary_etag(id, summary.version)
+    if etag.etag_matches(if_none_match, summary_etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={'ETag': summary_etag})
+    return model_response(schemas.UserSummaryAdapter, summary, headers={'ETag': summary_etag})
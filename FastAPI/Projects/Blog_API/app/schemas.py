@@ -1,60 +1,149 @@
-# app/schemas.py
-
-from typing import List, Optional
-from pydantic import BaseModel
-
-# --- REQUEST / CREATE SCHEMAS ---
-
-class BlogCreate(BaseModel):
-    """Schema for creating a new blog (input body)."""
-    title: str
-    body: str
-
-class BlogUpdate(BaseModel):
-    """Schema for updating an existing blog (PUT/PATCH)."""
-    title: str | None = None
-    body: str | None = None
-
-class UserCreate(BaseModel):
-    """Schema for creating a new user (input body)."""
-    name: str
-    email: str
-    password: str
-
-class Login(BaseModel):
-    """Schema for user login credentials."""
-    username: str # Used as the email
-    password: str
-
-# --- RESPONSE / OUTPUT SCHEMAS ---
-
-class ShowUser(BaseModel):
-    """Schema for showing user data (e.g., when viewing a blog creator)."""
-    name: str
-    email: str
-    # When fetching a user, optionally include a list of their blogs
-    blogs: List['ShowBlog'] = [] 
-
-    class Config:
-        from_attributes = True
-
-class ShowBlog(BaseModel):
-    """Schema for showing blog data (output response)."""
-    title: str
-    body: str
-    # Include the creator details using the ShowUser schema
-    creator: Optional[ShowUser] = None 
-    
-    class Config:
-        from_attributes = True
-
-# --- TOKEN SCHEMAS ---
-
-class Token(BaseModel):
-    """Schema for the JWT access token response."""
-    access_token: str
-    token_type: str
-
-class TokenData(BaseModel):
-    """Schema for the payload inside the JWT (used for verification)."""
-    email: Optional[str] = None
\ No newline at end of file
+# app/schemas.py
+
+from datetime import datetime
+from functools import lru_cache
+from typing import FrozenSet, List, Optional
+from pydantic import BaseModel, TypeAdapter, create_model
+
+# --- REQUEST / CREATE SCHEMAS ---
+
+class BlogCreate(BaseModel):
+    """Schema for creating a new blog (input body)."""
+    title: str
+    body: str
+
+class BlogUpdate(BaseModel):
+    """Schema for updating an existing blog (PUT/PATCH)."""
+    title: str | None = None
+    body: str | None = None
+
+class UserCreate(BaseModel):
+    """Schema for creating a new user (input body)."""
+    name: str
+    email: str
+    password: str
+
+class Login(BaseModel):
+    """Schema for user login credentials."""
+    username: str # Used as the email
+    password: str
+
+# --- RESPONSE / OUTPUT SCHEMAS ---
+
+class BlogSummary(BaseModel):
+    """Schema for a blog nested under its creator (no creator field, so the nesting can't loop)."""
+    title: str
+    body: str
+
+    class Config:
+        from_attributes = True
+
+class ShowUser(BaseModel):
+    """Schema for showing user data (e.g., when viewing a blog creator)."""
+    name: str
+    email: str
+    # When fetching a user, optionally include a list of their blogs
+    blogs: List[BlogSummary] = [] 
+
+    class Config:
+        from_attributes = True
+
+class UserSummary(BaseModel):
+    """Schema for a user's profile card: the user's own row, without their blogs."""
+    id: int
+    name: str
+    email: str
+    blog_count: int
+    last_posted_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class ShowBlog(BaseModel):
+    """Schema for showing blog data (output response)."""
+    id: int
+    title: str
+    body: str
+    # Include the creator details using the ShowUser schema
+    creator: Optional[ShowUser] = None 
+    
+    class Config:
+        from_attributes = True
+
+class BlogPage(BaseModel):
+    """Schema for one page of blogs returned by keyset pagination."""
+    items: List[ShowBlog]
+    # ID to pass as 'after' to fetch the next page (None when there are no more blogs)
+    next_cursor: Optional[int] = None
+
+class BlogSearchHit(BaseModel):
+    """Schema for one full-text search result."""
+    id: int
+    title: str
+    snippet: str # Matching excerpt with the search terms wrapped in <b>...</b>
+    score: float # Relevance; higher is better
+
+class BlogSearchPage(BaseModel):
+    """Schema for one page of full-text search results."""
+    items: List[BlogSearchHit]
+    # Offset to request the next page with (None when there are no more results)
+    next_offset: Optional[int] = None
+
+class BlogBatchItem(BaseModel):
+    """Schema for one post created by a batch request."""
+    index: int # Position of the post in the request list
+    id: int
+
+class BlogBatchError(BaseModel):
+    """Schema for one post of a batch request that failed validation."""
+    index: int # Position of the post in the request list
+    errors: List[dict]
+
+class BlogBatchResult(BaseModel):
+    """Schema for the outcome of a batch create request."""
+    created: List[BlogBatchItem] = []
+    errors: List[BlogBatchError] = []
+
+# --- PRECOMPILED ADAPTERS ---
+# Built once at import, so routers serializing these types don't rebuild a
+# validator/serializer per request (see app/core/responses.py)
+ShowBlogAdapter = TypeAdapter(ShowBlog)
+ShowUserAdapter = TypeAdapter(ShowUser)
+UserSummaryAdapter = TypeAdapter(UserSummary)
+BlogPageAdapter = TypeAdapter(BlogPage)
+BlogSearchPageAdapter = TypeAdapter(BlogSearchPage)
+BlogBatchResultAdapter = TypeAdapter(BlogBatchResult)
+
+# Fields a client may request with ?fields= on the blog list
+BLOG_FIELDS = frozenset(ShowBlog.model_fields)
+
+@lru_cache
+def blog_page_projection(fields: FrozenSet[str]) -> TypeAdapter:
+    """
+    Returns an adapter for a BlogPage whose items only have the given ShowBlog fields.
+
+    Reading only these attributes means the ORM objects may leave the others unloaded.
+    One adapter is built (and cached) per distinct field set.
+
+    :param fields: A subset of BLOG_FIELDS.
+    """
+    item = create_model(
+        'ShowBlogProjection',
+        __config__={'from_attributes': True},
+        **{name: (field.annotation, field) for name, field in ShowBlog.model_fields.items() if name in fields}
+    )
+    page = create_model('BlogPageProjection', items=(List[item], ...), next_cursor=(Optional[int], None))
+    return TypeAdapter(page)
+
+# --- TOKEN SCHEMAS ---
+
+class Token(BaseModel):
+    """Schema for the JWT access token response."""
+    access_token: str
+    token_type: str
+
+class TokenData(BaseModel):
+    """Schema for the payload inside the JWT (used for verification)."""
+    email: Optional[str] = None
+    id: Optional[int] = None # The user's id ('uid' claim); None in tokens issued before it existed
+    exp: Optional[int] = None # Expiry (UNIX timestamp), used to bound how long the token is cached
\ No newline at end of file
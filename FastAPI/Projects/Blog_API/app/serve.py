@@ -0,0 +1,235 @@
+# app/serve.py
+"""
+Production launcher: gunicorn managing WEB_WORKERS uvicorn workers (Unix only; needs the
+optional gunicorn and uvicorn-worker packages, see requirements.txt).
+
+    python -m app.serve              # start serving on WEB_BIND
+    python -m app.serve --reload     # switch a running server to the current code, dropping no request
+
+The master applies the pending migrations and warms the caches once, then imports the app
+(preload) and forks the workers, which share what it built copy-on-write instead of each
+building their own. A worker is replaced after WEB_MAX_REQUESTS requests, or once its memory
+grew by WEB_MAX_MEMORY_MB; either way it finishes its in-flight requests first.
+
+Signals to the master (its pid is in WEB_PIDFILE): HUP replaces every worker gracefully
+(same code, since the app is preloaded), TTIN/TTOU add/remove a worker, TERM stops
+gracefully. --reload has a new master take over the listening socket (USR2), then stops
+the old one once the new workers are up.
+
+Each worker has its own memory, so with several workers:
+- the memory response cache is turned off: a write would only invalidate the copy of the
+  worker that handled it. Set CACHE_BACKEND=redis to keep caching (shared by all).
+- read-your-writes pins (DATABASE_REPLICA_URLS) need CACHE_BACKEND=redis; the launcher
+  refuses to start without it.
+- the memory rate limiter (RATE_LIMIT_BACKEND=memory) counts per worker: a client gets up
+  to WEB_WORKERS times the configured limits. Use RATE_LIMIT_BACKEND=redis for exact ones.
+"""
+
+import argparse
+import os
+import resource
+import signal
+import sys
+import threading
+import time
+
+from app.core.config import get_settings
+
+MEMORY_CHECK_SECONDS = 10
+
+
+def _worker_class() -> str:
+    try:
+        import uvicorn_worker # noqa: F401
+        return 'uvicorn_worker.UvicornWorker'
+    except ImportError:
+        return 'uvicorn.workers.UvicornWorker' # Deprecated copy bundled with uvicorn
+
+
+# --- ONCE, IN THE MASTER ---
+def warm_up(blogs: int) -> None:
+    """
+    Builds the state every worker would otherwise build for itself on its first requests:
+    the password hashing context, the identity cache and the cached payloads of the latest
+    posts (Redis: shared with every worker; memory: only kept with a single worker).
+    """
+    from sqlalchemy import select
+
+    from app import models, schemas
+    from app.core import etag
+    from app.core.cache import response_cache
+    from app.core.hashing import get_pwd_context
+    from app.core.identity_cache import identity_cache
+    from app.core.responses import dump_model
+    from app.database import SessionLocal
+    from app.repository import blog
+
+    get_pwd_context()
+    with SessionLocal() as db:
+        for email, id in db.execute(
+            select(models.Users.email, models.Users.id).order_by(models.Users.id.desc()).limit(identity_cache.maxsize)
+        ):
+            identity_cache.put(email, id)
+
+        if not response_cache.enabled:
+            return
+        # The same entries GET /blog/{id} stores
+        for id, owner_id in db.execute(
+            select(models.Blog.id, models.Blog.user_id).order_by(models.Blog.id.desc()).limit(blogs)
+        ).all():
+            generation = response_cache.generation(owner_id)
+            blog_db = blog.show(id, db)
+            blog_etag = etag.blog_etag(id, blog_db.version, blog_db.creator.version if blog_db.creator else None)
+            response_cache.set_blog(
+                id, owner_id, generation, blog_etag, dump_model(schemas.ShowBlogAdapter, blog_db)
+            )
+
+def on_starting(server) -> None:
+    """Gunicorn hook: runs in the master before any worker exists (again after a --reload)."""
+    from app import migrate
+    from app.database import dispose_engines
+
+    started = time.perf_counter()
+    applied = migrate.create_schema()
+    warm_up(get_settings().warm_up_blogs)
+    # Forked workers must open their own connections, not share the master's
+    dispose_engines()
+    server.log.info('Applied %d migration(s) and warmed up in %.1f ms',
+                    len(applied), (time.perf_counter() - started) * 1000)
+    # On USR2 gunicorn re-executes its command line: run this module again, not app/serve.py as a script
+    server.START_CTX['args'] = [sys.executable, '-m', 'app.serve', *sys.argv[1:]]
+
+
+# --- IN EACH WORKER ---
+def rss_mb() -> float:
+    """Resident memory of this process in MiB (current on Linux, peak elsewhere)."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss # KiB, bytes on macOS
+        return peak / 2**20 if sys.platform == 'darwin' else peak / 1024
+
+def _watch_memory(log, limit_mb: int) -> None:
+    baseline = rss_mb()
+    while True:
+        time.sleep(MEMORY_CHECK_SECONDS)
+        grown = rss_mb() - baseline
+        if grown > limit_mb:
+            log.warning('Worker %d grew by %.0f MiB, replacing it', os.getpid(), grown)
+            # Graceful: in-flight requests finish, then the master forks a replacement
+            os.kill(os.getpid(), signal.SIGTERM)
+            return
+
+def post_worker_init(worker) -> None:
+    """Gunicorn hook: runs in each new worker before it starts serving."""
+    limit_mb = get_settings().web_max_memory_mb
+    if limit_mb > 0:
+        threading.Thread(target=_watch_memory, args=(worker.log, limit_mb), name='memory-watch', daemon=True).start()
+
+
+# --- ENTRY POINTS ---
+def configure_workers() -> None:
+    """
+    Adapts the settings to running several workers (see the module docstring); call it
+    before anything else reads them.
+    """
+    settings = get_settings()
+    if settings.web_workers <= 1:
+        return
+    if settings.replica_urls and settings.read_your_writes_seconds > 0 and settings.cache_backend != 'redis':
+        sys.exit('Read-your-writes pins need CACHE_BACKEND=redis with several workers '
+                 '(or set WEB_WORKERS=1, or READ_YOUR_WRITES_SECONDS=0)')
+    if settings.cache_backend == 'memory':
+        print(f'{settings.web_workers} workers: memory response cache turned off '
+              '(set CACHE_BACKEND=redis to share one)', file=sys.stderr)
+        os.environ['CACHE_BACKEND'] = 'none'
+        get_settings.cache_clear()
+
+def serve() -> None:
+    from gunicorn.app.base import BaseApplication # Optional dependency, only needed here
+
+    settings = get_settings()
+    options = {
+        'bind': settings.web_bind,
+        'workers': max(1, settings.web_workers),
+        'worker_class': _worker_class(),
+        'preload_app': True,
+        'max_requests': settings.web_max_requests,
+        'max_requests_jitter': settings.web_max_requests // 10,
+        'graceful_timeout': settings.web_graceful_timeout_seconds,
+        'pidfile': settings.web_pidfile,
+        'on_starting': on_starting,
+        'post_worker_init': post_worker_init,
+    }
+
+    class Launcher(BaseApplication):
+        def load_config(self):
+            for name, value in options.items():
+                self.cfg.set(name, value)
+
+        def load(self):
+            import main
+            return main.app
+
+    Launcher().run()
+
+def _read_pid(path: str) -> int | None:
+    try:
+        with open(path) as pidfile:
+            return int(pidfile.read().strip() or 0) or None
+    except (OSError, ValueError):
+        return None
+
+def _children(pid: int) -> list[int]:
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as children:
+            return [int(child) for child in children.read().split()]
+    except OSError:
+        return []
+
+def reload(timeout: float = 60.0) -> None:
+    """
+    Replaces the running server (WEB_PIDFILE) with one running the current code. Both
+    masters accept on the same socket while the new one starts, so no connection is refused;
+    the old workers then finish their in-flight requests (WEB_GRACEFUL_TIMEOUT_SECONDS).
+    """
+    settings = get_settings()
+    old = _read_pid(settings.web_pidfile)
+    if old is None:
+        sys.exit(f'No server running: {settings.web_pidfile} not found')
+
+    os.kill(old, signal.SIGUSR2)
+    # The new master writes '<pidfile>.2' once it ran on_starting (migrations, warm-up)
+    deadline = time.monotonic() + timeout
+    new = None
+    while new is None or len(_children(new)) < max(1, settings.web_workers):
+        if time.monotonic() > deadline:
+            sys.exit('The new server did not come up in time; the old one is still serving')
+        if new is None:
+            new = _read_pid(settings.web_pidfile + '.2')
+        elif not os.path.exists(f'/proc/{new}/task/{new}/children'):
+            break # Workers can't be counted here: requests wait in the socket backlog meanwhile
+        time.sleep(0.2)
+
+    os.kill(old, signal.SIGTERM)
+    print(f'Reloaded: master {old} is stopping, {new} is serving')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the Blog API with gunicorn and uvicorn workers.')
+    parser.add_argument('--reload', action='store_true', help='gracefully switch a running server to the current code')
+    args = parser.parse_args()
+
+    if args.reload:
+        reload()
+        return
+    # The master migrates once (on_starting); the workers' lifespan must not do it again.
+    # Set before anything reads the settings, so the workers inherit it.
+    os.environ['AUTO_CREATE_SCHEMA'] = 'false'
+    configure_workers()
+    serve()
+
+
+if __name__ == '__main__':
+    main()
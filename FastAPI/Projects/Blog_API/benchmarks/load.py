@@ -0,0 +1,274 @@
+# benchmarks/load.py
+"""
+Load benchmark for the Blog API endpoints.
+
+Seeds a throwaway SQLite database, then drives login, create, list, show, update and
+delete at a fixed concurrency, either in process through httpx's ASGI transport or
+against a real uvicorn server on localhost. Reports throughput and p50/p95/p99 latency
+per endpoint and can compare the run against a saved baseline:
+
+    python benchmarks/load.py                                  # in process, print results
+    python benchmarks/load.py --mode uvicorn --concurrency 32
+    python benchmarks/load.py --output results.json --compare benchmarks/baseline.json
+
+With --compare the exit status is 1 when any endpoint's p50/p95 latency grows, or its
+throughput drops, by more than --threshold (default 25%), or when requests fail.
+Refresh the baseline on the reference machine with --output benchmarks/baseline.json.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+# Point the app at a throwaway SQLite file before anything imports app.database
+_tmpdir = tempfile.mkdtemp(prefix='blog_load_')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_tmpdir, 'load.db')}"
+os.environ.setdefault('SECRET_KEY', 'benchmark-secret')
+os.environ.setdefault('ALGORITHM', 'HS256')
+os.environ.setdefault('ACCESS_TOKEN_EXPIRE_MINUTES', '30')
+# Every login comes from one client for one account: measure Argon2, not the rate limiter
+os.environ.setdefault('RATE_LIMIT_BACKEND', 'none')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx # noqa: E402
+import uvicorn # noqa: E402
+from sqlalchemy import insert # noqa: E402
+
+import main # noqa: E402
+from app import migrate, models # noqa: E402
+from app.core.config import get_settings # noqa: E402
+from app.core.hashing import Hash # noqa: E402
+from app.database import SessionLocal # noqa: E402
+
+BENCH_EMAIL = 'bench-0@example.com'
+BENCH_PASSWORD = 'benchmark-password'
+
+# Metrics compared against the baseline: (key, True if higher is better)
+COMPARED_METRICS = (('p50_ms', False), ('p95_ms', False), ('throughput_rps', True))
+
+
+# --- SEEDING ---
+def seed(users: int, blogs_per_user: int) -> list[int]:
+    """
+    Inserts 'users' users with 'blogs_per_user' posts each; returns the blog ids.
+
+    Every user shares one password hash, so seeding doesn't spend minutes in Argon2.
+    """
+    migrate.create_schema()
+    password = Hash.aragon2(BENCH_PASSWORD)
+    with SessionLocal() as db:
+        db.execute(insert(models.Users), [
+            {'name': f'bench {i}', 'email': f'bench-{i}@example.com', 'password': password}
+            for i in range(users)
+        ])
+        db.execute(insert(models.Blog), [
+            {'title': f'post {i}', 'body': 'lorem ipsum ' * 20, 'user_id': i % users + 1}
+            for i in range(users * blogs_per_user)
+        ])
+        db.commit()
+    return list(range(1, users * blogs_per_user + 1))
+
+
+# --- LOAD GENERATION ---
+def percentile(ordered: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    rank = max(1, round(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+async def run_endpoint(
+    client: httpx.AsyncClient, make_request, count: int, concurrency: int, expected: int, on_success=None
+) -> dict:
+    """
+    Sends 'count' requests built by make_request(i) from 'concurrency' workers.
+
+    :param make_request: Returns the (method, url, kwargs) of request number i.
+    :param expected: The status code a successful response has.
+    :param on_success: Optionally called with every successful response.
+    :return: Throughput, error count and latency percentiles (ms) for the endpoint.
+    """
+    latencies = []
+    errors = 0
+    next_index = iter(range(count))
+
+    async def worker():
+        nonlocal errors
+        for i in next_index:
+            method, url, kwargs = make_request(i)
+            start = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            elapsed = (time.perf_counter() - start) * 1000
+            if response.status_code == expected:
+                latencies.append(elapsed)
+                if on_success is not None:
+                    on_success(response)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, count))))
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'requests': count,
+        'errors': errors,
+        'throughput_rps': round(len(latencies) / wall, 1) if wall else 0.0,
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+    }
+
+
+async def run_suite(client: httpx.AsyncClient, blog_ids: list[int], args) -> dict:
+    """Runs every endpoint in turn; update and delete target the posts created earlier."""
+    rng = random.Random(args.seed)
+    login_form = {'username': BENCH_EMAIL, 'password': BENCH_PASSWORD}
+    token = (await client.post('/login', data=login_form)).json()['access_token']
+    auth = {'Authorization': f'Bearer {token}'}
+    created = []
+
+    def create(i):
+        return 'POST', '/blog/', {'json': {'title': f'load {i}', 'body': 'lorem ipsum ' * 20}, 'headers': auth}
+
+    results = {}
+    # Logins beyond HASH_MAX_PENDING in flight are shed with a 503 by design, so they
+    # run at most that concurrent
+    settings = get_settings()
+    login_concurrency = min(args.concurrency, settings.hash_max_pending or settings.hash_workers * 4)
+    plan = (
+        # name, request builder, count, concurrency, expected status, response hook
+        ('login', lambda i: ('POST', '/login', {'data': login_form}), args.login_requests, login_concurrency, 200,
+         None),
+        ('create', create, args.requests, args.concurrency, 201,
+         lambda response: created.append(response.json()['id'])),
+        ('list', lambda i: ('GET', '/blog/', {'headers': auth}), args.requests, args.concurrency, 200, None),
+        ('show', lambda i: ('GET', f'/blog/{rng.choice(blog_ids)}', {'headers': auth}), args.requests,
+         args.concurrency, 200, None),
+        ('update', lambda i: ('PUT', f'/blog/{created[i]}', {'json': {'title': f'updated {i}'}, 'headers': auth}),
+         args.requests, args.concurrency, 202, None),
+        ('delete', lambda i: ('DELETE', f'/blog/{created[i]}', {'headers': auth}), args.requests,
+         args.concurrency, 204, None),
+    )
+    for name, make_request, count, concurrency, expected, on_success in plan:
+        results[name] = await run_endpoint(client, make_request, count, concurrency, expected, on_success)
+        print(f"{name:<8}{_format_row(results[name])}")
+    return results
+
+
+def _format_row(result: dict) -> str:
+    return (f"{result['throughput_rps']:>10.1f}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}"
+            f"{result['p99_ms']:>10.2f}{result['errors']:>8}")
+
+
+# --- TRANSPORTS ---
+async def run_in_process(blog_ids: list[int], args) -> dict:
+    # ASGITransport doesn't send lifespan events, so run the app's startup here
+    transport = httpx.ASGITransport(app=main.app)
+    async with main.app.router.lifespan_context(main.app):
+        async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+            return await run_suite(client, blog_ids, args)
+
+
+async def run_over_uvicorn(blog_ids: list[int], args) -> dict:
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+
+    server = uvicorn.Server(uvicorn.Config(main.app, host='127.0.0.1', port=port, log_level='warning'))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=f'http://127.0.0.1:{port}', limits=limits) as client:
+            return await run_suite(client, blog_ids, args)
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+# --- BASELINE COMPARISON ---
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Returns a description of every regression beyond 'threshold' (a fraction, e.g. 0.25)."""
+    if results['config'] != baseline.get('config'):
+        print('warning: the baseline was recorded with a different configuration')
+
+    regressions = []
+    for name, current in results['endpoints'].items():
+        if current['errors']:
+            regressions.append(f"{name}: {current['errors']} failed requests")
+        previous = baseline.get('endpoints', {}).get(name)
+        if not previous:
+            continue
+        for key, higher_is_better in COMPARED_METRICS:
+            before, after = previous[key], current[key]
+            if not before:
+                continue
+            change = (after - before) / before
+            if (-change if higher_is_better else change) > threshold:
+                regressions.append(f'{name}.{key}: {before} -> {after} ({change:+.0%})')
+    return regressions
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mode', choices=('asgi', 'uvicorn'), default='asgi')
+    parser.add_argument('--users', type=int, default=100, help='seeded users')
+    parser.add_argument('--blogs-per-user', type=int, default=20, help='seeded posts per user')
+    parser.add_argument('--requests', type=int, default=500, help='requests per endpoint')
+    parser.add_argument('--login-requests', type=int, default=40, help='login requests (each costs an Argon2 verify)')
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=1, help='random seed for the ids read by "show"')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    parser.add_argument('--compare', metavar='BASELINE', help='baseline JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed regression (fraction)')
+    args = parser.parse_args()
+
+    blog_ids = seed(args.users, args.blogs_per_user)
+    print(f'{args.mode}: {args.users} users, {len(blog_ids)} posts, concurrency {args.concurrency}')
+    print(f"{'endpoint':<8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+
+    runner = run_over_uvicorn if args.mode == 'uvicorn' else run_in_process
+    results = {
+        'config': {
+            'mode': args.mode,
+            'users': args.users,
+            'blogs_per_user': args.blogs_per_user,
+            'requests': args.requests,
+            'login_requests': args.login_requests,
+            'concurrency': args.concurrency,
+        },
+        'environment': {'python': platform.python_version(), 'platform': platform.platform()},
+        'endpoints': asyncio.run(runner(blog_ids, args)),
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+            f.write('\n')
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        if regressions:
+            sys.exit(1)
+        print(f'No regressions beyond {args.threshold:.0%} against {args.compare}')
+
+
+if __name__ == '__main__':
+    main_cli()
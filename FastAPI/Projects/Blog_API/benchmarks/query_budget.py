@@ -0,0 +1,109 @@
+# benchmarks/query_budget.py
+"""
+Checks how many SQL statements the main read endpoints issue, so an N+1 (one lazy load
+per post or per creator) coming back fails loudly instead of slowing pages down:
+
+    python benchmarks/query_budget.py
+    ASYNC_DB=true python benchmarks/query_budget.py
+
+Seeds a throwaway SQLite database with posts spread over many users, then requests each
+endpoint through the app (response cache off, so every request reaches the database)
+inside app.core.query_counter.assert_max_queries. Exits with status 1 if any request
+goes over its budget.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+
+# Point the app at a throwaway SQLite file before anything imports app.database
+_tmpdir = tempfile.mkdtemp(prefix='blog_budget_')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_tmpdir, 'budget.db')}"
+os.environ['CACHE_BACKEND'] = 'none'
+os.environ['RATE_LIMIT_BACKEND'] = 'none'
+os.environ.setdefault('SECRET_KEY', 'benchmark-secret')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient # noqa: E402
+from sqlalchemy import insert # noqa: E402
+
+import main # noqa: E402
+from app import migrate, models # noqa: E402
+from app.core.cache import LRUCache, NullCache, response_cache # noqa: E402
+from app.core.hashing import Hash # noqa: E402
+from app.core.query_counter import QueryBudgetExceeded, assert_max_queries # noqa: E402
+from app.database import get_engine # noqa: E402
+
+USERS = 50
+POSTS = 500 # Ten per user, and every page of 20 has 20 different creators
+
+
+def seed() -> None:
+    migrate.create_schema()
+    with get_engine().begin() as conn:
+        conn.execute(insert(models.Users), [
+            {'id': i, 'name': f'user {i}', 'email': f'user{i}@example.com',
+             'password': Hash.aragon2('pw') if i == 1 else 'x'}
+            for i in range(1, USERS + 1)
+        ])
+        conn.execute(insert(models.Blog), [
+            {'title': f'post {i}', 'body': f'lorem ipsum {i}', 'user_id': i % USERS + 1} for i in range(POSTS)
+        ])
+
+
+def main_cli():
+    seed()
+    failures = 0
+    with TestClient(main.app) as client:
+        token = client.post('/login', data={'username': 'user1@example.com', 'password': 'pw'}).json()['access_token']
+        auth = {'Authorization': f'Bearer {token}'}
+        client.get('/blog/1', headers=auth) # Resolves the token's user once (identity cache)
+
+        page_etag = client.get('/blog/', headers=auth).headers['etag']
+        blog_etag = client.get('/blog/1', headers=auth).headers['etag']
+        user_etag = client.get('/user/2').headers['etag']
+
+        # (name, path, headers, budget)
+        checks = [
+            ('GET /blog/', '/blog/', auth, 3), # page, creators, their blogs
+            ('GET /blog/?after=200', '/blog/?after=200', auth, 3),
+            ('GET /blog/?fields=id,title', '/blog/?fields=id,title', auth, 1),
+            ('GET /blog/, If-None-Match', '/blog/', {**auth, 'If-None-Match': page_etag}, 1),
+            ('GET /blog/{id}', '/blog/1', auth, 3), # versions and owner, post with creator, creator's blogs
+            ('GET /blog/{id}, If-None-Match', '/blog/1', {**auth, 'If-None-Match': blog_etag}, 1),
+            ('GET /user/{id}', '/user/2', {}, 2), # user, their blogs
+            ('GET /user/{id}, If-None-Match', '/user/2', {'If-None-Match': user_etag}, 1),
+            ('GET /user/{id}/summary', '/user/2/summary', {}, 1),
+        ]
+
+        def run(name: str, path: str, headers: dict, budget: int) -> None:
+            nonlocal failures
+            try:
+                with assert_max_queries(budget) as counter:
+                    response = client.get(path, headers=headers)
+                ok = response.status_code in (200, 304)
+                detail = f'{counter.count}/{budget} statements, {response.status_code}'
+            except QueryBudgetExceeded as exc:
+                ok, detail = False, str(exc).splitlines()[0]
+            failures += not ok
+            print(f"{'ok' if ok else 'FAILED':<8}{name}  ({detail})")
+
+        for check in checks:
+            run(*check)
+
+        # Served from the response cache once filled: no statement at all
+        response_cache.backend = LRUCache()
+        client.get('/blog/1', headers=auth)
+        client.get('/user/2')
+        run('GET /blog/{id}, cached', '/blog/1', auth, 0)
+        run('GET /user/{id}, cached', '/user/2', {}, 0)
+        response_cache.backend = NullCache()
+
+    shutil.rmtree(_tmpdir)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main_cli()
@@ -0,0 +1,155 @@
+# benchmarks/query_plans.py
+"""
+Checks the access path of every query the repositories issue, so a missing index
+shows up before the table is large enough to notice:
+
+    python benchmarks/query_plans.py
+    python benchmarks/query_plans.py --verbose     # print every statement and its plan
+
+Seeds a throwaway SQLite database through the migrations (app/migrate.py), calls each
+repository function while recording the SQL it executes, and runs EXPLAIN QUERY PLAN on
+every statement. A full table scan fails the check unless the statement stops after a
+LIMIT without sorting (e.g. the first page in primary-key order) or the scenario exists to
+read every row (the export, the count repair). Exits with status 1 if any check fails.
+"""
+
+import argparse
+import os
+import re
+import shutil
+import sys
+import tempfile
+
+# Point the app at a throwaway SQLite file before anything imports app.database
+_tmpdir = tempfile.mkdtemp(prefix='blog_plans_')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_tmpdir, 'plans.db')}"
+os.environ['CACHE_BACKEND'] = 'none'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import HTTPException # noqa: E402
+from sqlalchemy import event, insert # noqa: E402
+
+from app import migrate, models, schemas # noqa: E402
+from app.database import SessionLocal, get_engine # noqa: E402
+from app.repository import blog, user # noqa: E402
+
+USERS = 50
+POSTS = 2000
+
+# 'SCAN blogs', 'SCAN blogs USING INDEX ...': every row (or index entry) is visited.
+# Virtual tables (FTS5) and constant rows ('SCAN 2 CONSTANT ROWS' of a VALUES list) are not.
+SCAN = re.compile(r'^SCAN (?!CONSTANT ROW)([A-Za-z_]\w*)\b(?! VIRTUAL TABLE)')
+LIMIT = re.compile(r'\bLIMIT\b', re.IGNORECASE)
+
+
+def seed() -> None:
+    migrate.create_schema()
+    with get_engine().begin() as conn:
+        conn.execute(insert(models.Users), [
+            {'id': i, 'name': f'user {i}', 'email': f'user{i}@example.com', 'password': 'x'}
+            for i in range(1, USERS + 1)
+        ])
+        conn.execute(insert(models.Blog), [
+            {'title': f'post {i}', 'body': f'lorem ipsum {i}', 'user_id': i % USERS + 1} for i in range(POSTS)
+        ])
+
+
+def scenarios() -> list:
+    """
+    (name, function(db), full scan expected, statement count or None) for every repository
+    query path. Posts are seeded so that post N belongs to user (N - 1) % USERS + 1.
+    """
+    post = schemas.BlogCreate(title='new', body='lorem ipsum')
+    return [
+        ('blog.get_all, first page', lambda db: blog.get_all(db), False, None),
+        ('blog.get_all, next page', lambda db: blog.get_all(db, after=1000), False, None),
+        ('blog.get_all, ?fields=title', lambda db: blog.get_all(db, after=1000, fields={'title'}), False, None),
+        ('blog.get_page_versions', lambda db: blog.get_page_versions(db, after=1000), False, None),
+        ('blog.get_versions', lambda db: blog.get_versions(10, db), False, None),
+        ('blog.show', lambda db: blog.show(10, db), False, None),
+        ('blog.search', lambda db: blog.search('lorem', db), False, None),
+        ('blog.iter_export_batches', lambda db: list(blog.iter_export_batches(db)), True, None),
+        # INSERT ... RETURNING, then the creator joined with their blogs
+        ('blog.create', lambda db: blog.create(post, db, user_id=1), False, 2),
+        ('blog.create_many', lambda db: blog.create_many([post, post], db, user_id=1), False, None),
+        ('blog.create_coalesced', lambda db: blog.create_coalesced([(post, 1), (post, 2)], db), False, None),
+        # The owner's writes: the UPDATE/DELETE ... RETURNING alone
+        ('blog.update', lambda db: blog.update(20, schemas.BlogUpdate(title='changed'), db,
+                                               expected_version=1, user_id=20), False, 1),
+        ('blog.update, not the owner', lambda db: blog.update(30, schemas.BlogUpdate(title='x'), db, user_id=1), False, None),
+        ('blog.destroy', lambda db: blog.destroy(40, db, user_id=40), False, 1),
+        ('blog.destroy, not the owner', lambda db: blog.destroy(41, db, user_id=1), False, None),
+        ('user.create', lambda db: user.create(
+            schemas.UserCreate(name='new', email='new@example.com', password='pw'), db, hashed_password='x'), False, None),
+        ('user.get_user_by_id', lambda db: user.get_user_by_id(5, db), False, None),
+        ('user.get_user_version', lambda db: user.get_user_version(5, db), False, None),
+        ('user.get_user_summary', lambda db: user.get_user_summary(5, db), False, None),
+        ('user.get_user_by_email', lambda db: user.get_user_by_email('user5@example.com', db), False, None),
+        ('user.get_user_id_by_email', lambda db: user.get_user_id_by_email('user5@example.com', db), False, None),
+        ('user.update_password', lambda db: user.update_password(5, 'y', db), False, None),
+        ('user.repair_blog_counts', lambda db: user.repair_blog_counts(db), True, None),
+    ]
+
+
+def record(fn) -> list:
+    """Calls fn(db) on a fresh session; returns the (statement, parameters) it executed."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().split(None, 1)[0].upper() in ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH'):
+            # executemany: explain the first parameter set (a multi-row INSERT already has one flat set)
+            if executemany and parameters and isinstance(parameters[0], (tuple, list, dict)):
+                parameters = parameters[0]
+            statements.append((statement, parameters))
+
+    event.listen(get_engine(), 'before_cursor_execute', capture)
+    try:
+        with SessionLocal() as db:
+            try:
+                fn(db)
+            except HTTPException:
+                pass # The failure paths are scenarios too
+    finally:
+        event.remove(get_engine(), 'before_cursor_execute', capture)
+    return statements
+
+
+def explain(statement: str, parameters) -> list[str]:
+    with get_engine().connect() as conn:
+        return [row[3] for row in conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--verbose', action='store_true', help='print every statement and its plan')
+    args = parser.parse_args()
+
+    seed()
+    failures = 0
+    for name, fn, full_scan_expected, expected_count in scenarios():
+        problems = []
+        statements = record(fn)
+        if expected_count is not None and len(statements) != expected_count:
+            problems.append((f'expected {expected_count} statement(s)', [f'{len(statements)} issued']))
+        for statement, parameters in statements:
+            plan = explain(statement, parameters)
+            # A scan that stops after LIMIT rows is fine, unless it has to sort them all first
+            bounded = LIMIT.search(statement) and not any('TEMP B-TREE' in line for line in plan)
+            scans = [line for line in plan if SCAN.match(line)]
+            if scans and not bounded and not full_scan_expected:
+                problems.append((' '.join(statement.split())[:160], scans))
+            if args.verbose:
+                print(f"    {' '.join(statement.split())}\n      -> {' | '.join(plan)}")
+
+        failures += bool(problems)
+        print(f"{'ok' if not problems else 'FAILED':<8}{name}  ({len(statements)} statements)")
+        for what, found in problems:
+            print(f"        {', '.join(found)}: {what}")
+
+    shutil.rmtree(_tmpdir)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
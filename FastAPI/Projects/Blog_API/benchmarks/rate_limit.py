@@ -0,0 +1,69 @@
+# benchmarks/rate_limit.py
+"""
+Measures what one rate-limit decision costs, so the limiter never becomes the hot path.
+
+Times MemoryBuckets.take() from 1..N threads over many keys (client IPs / usernames),
+with one shard (a single lock) and with the configured number of shards, and
+optionally RedisBuckets against a server:
+
+    python benchmarks/rate_limit.py
+    python benchmarks/rate_limit.py --threads 1 4 16 --keys 100000
+    python benchmarks/rate_limit.py --redis-url redis://localhost:6379/0
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import get_settings # noqa: E402
+from app.core.rate_limit import MemoryBuckets, RedisBuckets # noqa: E402
+
+
+def run(backend, threads: int, decisions: int, keys: int) -> float:
+    """Makes 'decisions' take() calls spread over 'threads' threads; returns us per decision."""
+    per_thread = decisions // threads
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(offset: int):
+        names = [f'login:ip:10.0.{(offset + i) % keys // 256}.{(offset + i) % 256}' for i in range(per_thread)]
+        barrier.wait()
+        for name in names:
+            backend.take(name, 1.0, 10)
+
+    workers = [threading.Thread(target=worker, args=(i * 7919,)) for i in range(threads)]
+    for w in workers:
+        w.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for w in workers:
+        w.join()
+    return (time.perf_counter() - start) / (per_thread * threads) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--decisions', type=int, default=200_000)
+    parser.add_argument('--keys', type=int, default=10_000, help='distinct bucket keys')
+    parser.add_argument('--redis-url', help='also time RedisBuckets against this server')
+    args = parser.parse_args()
+
+    shards = get_settings().rate_limit_shards
+    print(f"{'backend':<22}{'threads':>8}{'us/decision':>14}")
+    for threads in args.threads:
+        for label, backend in (('memory, 1 shard', MemoryBuckets(shards=1)),
+                               (f'memory, {shards} shards', MemoryBuckets(shards=shards))):
+            print(f'{label:<22}{threads:>8}{run(backend, threads, args.decisions, args.keys):>14.2f}')
+        if args.redis_url:
+            import redis
+            backend = RedisBuckets(redis.Redis.from_url(args.redis_url))
+            print(f"{'redis':<22}{threads:>8}{run(backend, threads, args.decisions // 20, args.keys):>14.2f}")
+            backend.clear()
+
+
+if __name__ == '__main__':
+    main()
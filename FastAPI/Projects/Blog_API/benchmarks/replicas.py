@@ -0,0 +1,123 @@
+# benchmarks/replicas.py
+"""
+Checks read/write splitting locally, with SQLite files standing in for a primary and
+two replicas (the replicas are copies of the primary that never receive its writes):
+
+    python benchmarks/replicas.py
+    ASYNC_DB=true python benchmarks/replicas.py
+
+Verifies that reads rotate over the replicas, that writes land on the primary, that a
+client reads its own write from the primary (read-your-writes pin on its token's user, or
+its cookie) while others still read the replicas, that the response cache is only filled
+from the primary, and that a replica failing its health check is skipped until it
+recovers. Exits with status 1 if any check fails.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+
+# Primary and replica files, set before anything imports app.database
+_tmpdir = tempfile.mkdtemp(prefix='blog_replicas_')
+PRIMARY = os.path.join(_tmpdir, 'primary.db')
+REPLICA_DIRS = [os.path.join(_tmpdir, f'replica{i}') for i in range(2)]
+os.environ['DATABASE_URL'] = f'sqlite:///{PRIMARY}'
+os.environ['DATABASE_REPLICA_URLS'] = ','.join(f'sqlite:///{d}/blog.db' for d in REPLICA_DIRS)
+os.environ['CACHE_BACKEND'] = 'none' # Every read must reach a database
+os.environ['RATE_LIMIT_BACKEND'] = 'none'
+os.environ.setdefault('SECRET_KEY', 'benchmark-secret')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient # noqa: E402
+from sqlalchemy import create_engine, insert, update # noqa: E402
+
+import main # noqa: E402
+from app import migrate, models # noqa: E402
+from app.core.cache import LRUCache, NullCache, response_cache # noqa: E402
+from app.core.hashing import Hash # noqa: E402
+from app.database import READ_PRIMARY_COOKIE, get_replicas # noqa: E402
+
+failures = 0
+
+
+def check(name: str, ok: bool, detail: str = '') -> None:
+    global failures
+    failures += not ok
+    print(f"{'ok' if ok else 'FAILED':<8}{name}{f'  ({detail})' if detail else ''}")
+
+
+def seed() -> None:
+    """Creates the primary, then 'replicates' it by copying the file; each copy labels post 1."""
+    migrate.create_schema()
+    engine = create_engine(f'sqlite:///{PRIMARY}')
+    with engine.begin() as conn:
+        conn.execute(insert(models.Users), [
+            {'name': name, 'email': f'{name}@example.com', 'password': Hash.aragon2('pw')}
+            for name in ('bench', 'other')
+        ])
+        conn.execute(insert(models.Blog).values(title='primary', body='post 1', user_id=1))
+    engine.dispose()
+    for index, directory in enumerate(REPLICA_DIRS):
+        os.makedirs(directory)
+        shutil.copy(PRIMARY, os.path.join(directory, 'blog.db'))
+        engine = create_engine(f'sqlite:///{directory}/blog.db')
+        with engine.begin() as conn:
+            conn.execute(update(models.Blog).where(models.Blog.id == 1).values(title=f'replica{index}'))
+        engine.dispose()
+
+
+def main_cli():
+    seed()
+    with TestClient(main.app) as client:
+        def login(name: str) -> dict:
+            token = client.post('/login', data={'username': f'{name}@example.com', 'password': 'pw'}).json()['access_token']
+            return {'Authorization': f'Bearer {token}'}
+
+        auth, other = login('bench'), login('other')
+        client.cookies.clear() # /login is a POST: forget its read-your-writes cookie
+
+        def read_title(headers: dict = other) -> str:
+            return client.get('/blog/1', headers=headers).json()['title']
+
+        titles = [read_title() for _ in range(4)]
+        check('reads rotate over the replicas', sorted(set(titles)) == ['replica0', 'replica1'], ', '.join(titles))
+
+        created = client.post('/blog/', json={'title': 'new', 'body': 'written'}, headers=auth)
+        new_id = created.json()['id']
+        check('writes go to the primary', created.status_code == 201 and READ_PRIMARY_COOKIE in client.cookies)
+        check('the writer reads its write', client.get(f'/blog/{new_id}', headers=auth).status_code == 200)
+        check('the writer reads from the primary', read_title(auth) == 'primary')
+
+        client.cookies.clear() # An API client that doesn't keep cookies: pinned by its token's user
+        check('the writer reads its write without the cookie', client.get(f'/blog/{new_id}', headers=auth).status_code == 200)
+        check('other clients read the replicas', client.get(f'/blog/{new_id}', headers=other).status_code == 404)
+
+        # With a response cache, entries are only ever filled from the primary
+        response_cache.backend = LRUCache()
+        titles = [read_title() for _ in range(4)]
+        check('the response cache is filled from the primary', set(titles) == {'primary'}, ', '.join(titles))
+        response_cache.backend = NullCache()
+
+        # Take replica1 away (a real server going away drops its connections too)
+        replicas = get_replicas()
+        moved = REPLICA_DIRS[1] + '.gone'
+        os.rename(REPLICA_DIRS[1], moved)
+        client.portal.call(replicas.dispose) # Drops pooled connections; new ones open on demand
+        client.portal.call(replicas.check)
+        titles = [read_title() for _ in range(4)]
+        check('a replica failing its health check is skipped',
+              replicas.healthy == [True, False] and set(titles) == {'replica0'}, ', '.join(titles))
+
+        os.rename(moved, REPLICA_DIRS[1])
+        client.portal.call(replicas.check)
+        titles = [read_title() for _ in range(4)]
+        check('it is used again once it recovers', sorted(set(titles)) == ['replica0', 'replica1'], ', '.join(titles))
+
+    shutil.rmtree(_tmpdir)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main_cli()
@@ -0,0 +1,104 @@
+# benchmarks/serialization.py
+"""
+Measures what it costs to turn one page of blogs into JSON, and what ?fields= saves.
+
+Seeds a throwaway SQLite database and times the full GET /blog/ request with and without a
+projection, then loads a page through the repository and times just turning it into JSON:
+  - dict + json.dumps   (validate, dump to Python objects, stdlib json: the JSONResponse path)
+  - dict + orjson       (same, rendered by orjson: FastJSONResponse with FAST_JSON=true)
+  - adapter.dump_json   (precompiled TypeAdapter straight to bytes: model_response)
+
+    python benchmarks/serialization.py --limit 100 --blogs-per-user 50
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+# Point the app at a throwaway SQLite file before anything imports app.database
+_tmpdir = tempfile.mkdtemp(prefix='blog_serialization_')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_tmpdir, 'bench.db')}"
+os.environ.setdefault('SECRET_KEY', 'benchmark-secret')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient # noqa: E402
+from sqlalchemy import insert # noqa: E402
+
+import main # noqa: E402
+from app import migrate, models, schemas # noqa: E402
+from app.core.hashing import Hash # noqa: E402
+from app.core.responses import dump_model, orjson # noqa: E402
+from app.database import SessionLocal # noqa: E402
+from app.repository import blog # noqa: E402
+
+
+def seed(users: int, blogs_per_user: int) -> None:
+    migrate.create_schema()
+    with SessionLocal() as db:
+        db.execute(insert(models.Users), [
+            {'name': f'user {i}', 'email': f'user-{i}@example.com', 'password': Hash.aragon2('pw') if i == 0 else 'x'}
+            for i in range(users)
+        ])
+        db.execute(insert(models.Blog), [
+            {'title': f'post {i}', 'body': 'lorem ipsum ' * 40, 'user_id': i % users + 1}
+            for i in range(users * blogs_per_user)
+        ])
+        db.commit()
+
+
+def best_of(fn, repeat: int) -> float:
+    """Best wall time of 'repeat' calls, in ms."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def serialize_page(args):
+    with SessionLocal() as db:
+        page = blog.get_all(db, limit=args.limit)
+    adapter = schemas.BlogPageAdapter
+
+    def to_python():
+        return adapter.dump_python(adapter.validate_python(page, from_attributes=True), mode='json')
+
+    print(f'page of {args.limit} blogs, creators with {args.blogs_per_user} blogs each (best of {args.repeat}, ms)')
+    print(f"  dict + json.dumps    {best_of(lambda: json.dumps(to_python()).encode(), args.repeat):8.2f}")
+    if orjson is not None:
+        print(f"  dict + orjson        {best_of(lambda: orjson.dumps(to_python()), args.repeat):8.2f}")
+    print(f"  adapter.dump_json    {best_of(lambda: dump_model(adapter, page), args.repeat):8.2f}")
+
+
+def request_page(args):
+    with TestClient(main.app) as client:
+        token = client.post('/login', data={'username': 'user-0@example.com', 'password': 'pw'}).json()['access_token']
+        headers = {'Authorization': f'Bearer {token}'}
+        print('GET /blog/ end to end (ms, bytes)')
+        for fields in (None, 'id,title,body', 'id,title'):
+            params = {'limit': args.limit, **({'fields': fields} if fields else {})}
+            size = len(client.get('/blog/', params=params, headers=headers).content)
+            elapsed = best_of(lambda: client.get('/blog/', params=params, headers=headers), args.repeat)
+            print(f"  fields={fields or '(all)':<16}{elapsed:8.2f}{size:>10}")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--blogs-per-user', type=int, default=50)
+    parser.add_argument('--limit', type=int, default=100, help='page size')
+    parser.add_argument('--repeat', type=int, default=30)
+    args = parser.parse_args()
+
+    seed(args.users, args.blogs_per_user)
+    # End to end first: serialize_page's leftovers must not be garbage-collected in the app's threads
+    request_page(args)
+    serialize_page(args)
+
+
+if __name__ == '__main__':
+    main_cli()
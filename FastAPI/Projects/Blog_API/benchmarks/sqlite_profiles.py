@@ -0,0 +1,133 @@
+# benchmarks/sqlite_profiles.py
+"""
+Compares concurrent read/write throughput of the SQLite engine profiles (DB_PROFILE).
+
+For each profile, seeds a fresh database file with users and posts, then runs reader
+threads (blog.get_all pages of titles and bodies, as GET /blog/?fields=title,body)
+alongside writer threads (blog.create) for a fixed time, and reports reads/s, writes/s,
+read latency and lock errors:
+
+    python benchmarks/sqlite_profiles.py
+    python benchmarks/sqlite_profiles.py --readers 8 --writers 2 --seconds 10
+    python benchmarks/sqlite_profiles.py --profiles default production --dir /mnt/ssd
+"""
+
+import argparse
+import gc
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+os.environ['CACHE_BACKEND'] = 'none' # Every read must reach the database
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert # noqa: E402
+from sqlalchemy.exc import OperationalError # noqa: E402
+from sqlalchemy.orm import sessionmaker # noqa: E402
+
+from app import migrate, models, schemas # noqa: E402
+from app.database import SQLITE_PROFILES, make_engine # noqa: E402
+from app.repository import blog # noqa: E402
+
+
+USERS = 100
+
+def seed(engine, posts: int) -> None:
+    migrate.create_schema(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(models.Users), [
+            {'id': i, 'name': f'user {i}', 'email': f'user{i}@example.com', 'password': 'x'}
+            for i in range(1, USERS + 1)
+        ])
+        conn.execute(insert(models.Blog), [
+            {'title': f'post {i}', 'body': 'lorem ipsum ' * 20, 'user_id': i % USERS + 1} for i in range(posts)
+        ])
+
+
+def run(profile: str, args) -> dict:
+    """Runs readers and writers against a fresh database with this profile for args.seconds."""
+    tmpdir = tempfile.mkdtemp(prefix='blog_profiles_', dir=args.dir)
+    engine = make_engine(f"sqlite:///{os.path.join(tmpdir, 'profile.db')}", profile=profile)
+    seed(engine, args.posts)
+    Session = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    request = schemas.BlogCreate(title='benchmark post', body='lorem ipsum ' * 20)
+
+    stop = threading.Event()
+    barrier = threading.Barrier(args.readers + args.writers + 1)
+    read_latencies, writes, errors = [], [0], [0]
+    lock = threading.Lock()
+
+    def reader():
+        latencies = []
+        barrier.wait()
+        while not stop.is_set():
+            start = time.perf_counter()
+            with Session() as db:
+                blog.get_all(db, limit=20, after=random.randrange(args.posts), fields={'title', 'body'})
+            latencies.append((time.perf_counter() - start) * 1000)
+        with lock:
+            read_latencies.extend(latencies)
+
+    def writer():
+        done = failed = 0
+        barrier.wait()
+        while not stop.is_set():
+            try:
+                with Session() as db:
+                    blog.create(request, db, user_id=random.randint(1, USERS))
+                done += 1
+            except OperationalError: # 'database is locked' once the busy timeout runs out
+                failed += 1
+        with lock:
+            writes[0] += done
+            errors[0] += failed
+
+    threads = ([threading.Thread(target=reader) for _ in range(args.readers)]
+               + [threading.Thread(target=writer) for _ in range(args.writers)])
+    gc.disable() # Keep collector pauses out of the timings
+    for t in threads:
+        t.start()
+    barrier.wait()
+    time.sleep(args.seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    gc.enable()
+    engine.dispose()
+    shutil.rmtree(tmpdir)
+
+    read_latencies.sort()
+    return {
+        'reads': len(read_latencies) / args.seconds,
+        'writes': writes[0] / args.seconds,
+        'p50': statistics.median(read_latencies) if read_latencies else 0.0,
+        'p99': read_latencies[int(len(read_latencies) * 0.99)] if read_latencies else 0.0,
+        'errors': errors[0],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profiles', nargs='+', default=list(SQLITE_PROFILES), choices=list(SQLITE_PROFILES))
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=5.0, help='run time per profile')
+    parser.add_argument('--posts', type=int, default=5000, help='posts seeded before the run')
+    parser.add_argument('--dir', help='directory for the database files (default: the system temp dir)')
+    args = parser.parse_args()
+
+    print(f'{args.readers} readers, {args.writers} writers, {args.seconds:g} s per profile')
+    print(f"{'profile':<12}{'reads/s':>10}{'writes/s':>10}{'read p50 ms':>13}{'read p99 ms':>13}{'errors':>8}")
+    for profile in args.profiles:
+        result = run(profile, args)
+        print(f"{profile:<12}{result['reads']:>10.0f}{result['writes']:>10.0f}"
+              f"{result['p50']:>13.2f}{result['p99']:>13.2f}{result['errors']:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+# benchmarks/startup.py
+"""
+Measures how long a fresh process takes to import the app and run its lifespan startup.
+
+Every run is a new interpreter (what a worker spawn or a test run pays) pointed at a new,
+empty SQLite database, so the startup figure includes creating the schema:
+
+    python benchmarks/startup.py --runs 5
+    python benchmarks/startup.py --top 15                    # slowest imports (-X importtime)
+    python benchmarks/startup.py --max-import-ms 1500 --max-startup-ms 200
+
+With a budget given, the exit status is 1 when the median exceeds it.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child interpreter: time 'import main', then the lifespan startup
+PROBE = """
+import asyncio, json, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+async def startup():
+    async with main.app.router.lifespan_context(main.app):
+        return time.perf_counter()
+
+ready = asyncio.run(startup())
+print(json.dumps({'import_ms': (imported - started) * 1000, 'startup_ms': (ready - imported) * 1000}))
+"""
+
+
+def child_env(db_path: str) -> dict:
+    env = dict(os.environ)
+    env['DATABASE_URL'] = f'sqlite:///{db_path}'
+    env.setdefault('SECRET_KEY', 'benchmark-secret')
+    return env
+
+
+def measure(runs: int) -> dict:
+    """Starts 'runs' fresh interpreters; returns the median import and startup times in ms."""
+    samples = []
+    for i in range(runs):
+        with tempfile.TemporaryDirectory(prefix='blog_startup_') as tmpdir:
+            output = subprocess.run(
+                [sys.executable, '-c', PROBE], cwd=PROJECT_DIR, env=child_env(os.path.join(tmpdir, 'startup.db')),
+                capture_output=True, text=True, check=True
+            ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return {key: statistics.median(sample[key] for sample in samples) for key in ('import_ms', 'startup_ms')}
+
+
+def slowest_imports(top: int) -> list[tuple[int, str]]:
+    """Returns the 'top' slowest top-level modules imported by main, as (cumulative us, name)."""
+    with tempfile.TemporaryDirectory(prefix='blog_startup_') as tmpdir:
+        stderr = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', 'import main'], cwd=PROJECT_DIR,
+            env=child_env(os.path.join(tmpdir, 'startup.db')), capture_output=True, text=True, check=True
+        ).stderr
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Nesting is shown by indentation; two spaces of it means imported by main directly
+        if name.startswith('   ') and not name.startswith('    '):
+            modules.append((int(cumulative), name.strip()))
+    return sorted(modules, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=0, help='also list the N slowest imports')
+    parser.add_argument('--max-import-ms', type=float, help='fail if the median import time exceeds this')
+    parser.add_argument('--max-startup-ms', type=float, help='fail if the median startup time exceeds this')
+    args = parser.parse_args()
+
+    result = measure(args.runs)
+    print(f"import main: {result['import_ms']:.1f} ms, lifespan startup: {result['startup_ms']:.1f} ms "
+          f"(median of {args.runs})")
+
+    if args.top:
+        for cumulative, name in slowest_imports(args.top):
+            print(f'{cumulative / 1000:>10.1f} ms  {name}')
+
+    over_budget = [
+        f'{key} {result[key]:.1f} ms > {budget} ms'
+        for key, budget in (('import_ms', args.max_import_ms), ('startup_ms', args.max_startup_ms))
+        if budget is not None and result[key] > budget
+    ]
+    for line in over_budget:
+        print(f'OVER BUDGET {line}')
+    if over_budget:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+# benchmarks/write_batching.py
+"""
+Measures blog-creation throughput and latency with and without group commit.
+
+Seeds a throwaway SQLite database (on disk, so every commit pays its fsync), then has
+'concurrency' clients create posts as fast as they can, first one transaction per
+post (blog.create, what POST /blog/ does by default), then through the WriteBatcher
+(WRITE_BATCHING=true) at each batch window:
+
+    python benchmarks/write_batching.py
+    python benchmarks/write_batching.py --concurrency 64 --windows 0 1 2 5 10 --max-items 100
+    ASYNC_DB=true python benchmarks/write_batching.py
+    python benchmarks/write_batching.py --dir /mnt/ssd     # where the database file lives
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from sqlalchemy.exc import SQLAlchemyError
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def configure(directory: str | None) -> None:
+    # Point the app at a throwaway SQLite file before anything imports app.database
+    tmpdir = tempfile.mkdtemp(prefix='blog_batching_', dir=directory)
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmpdir, 'batching.db')}"
+
+
+async def run(create, requests: int, concurrency: int) -> dict:
+    """Issues 'requests' creates from 'concurrency' concurrent clients; returns rate, latency and errors."""
+    latencies = []
+    errors = 0
+    next_index = iter(range(requests))
+
+    async def client():
+        nonlocal errors
+        for i in next_index:
+            start = time.perf_counter()
+            try:
+                await create(i)
+            except SQLAlchemyError: # e.g. 'database is locked' once the busy timeout runs out
+                errors += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    wall = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'rate': requests / wall,
+        'p50': statistics.median(latencies),
+        'p99': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        'errors': errors,
+    }
+
+
+async def main_async(args) -> None:
+    from app import migrate, models, schemas
+    from app.core.write_batcher import WriteBatcher
+    from app.database import SessionLocal, dispose_async_engines, open_session, run_db, session_factory
+    from app.repository import blog
+
+    migrate.create_schema()
+    with SessionLocal() as db:
+        db.add(models.Users(id=1, name='bench', email='bench@example.com', password='x'))
+        db.commit()
+    request = schemas.BlogCreate(title='benchmark post', body='lorem ipsum ' * 20)
+
+    async def one_transaction_each(i):
+        async with open_session(session_factory()) as db:
+            await run_db(db, blog.create, request, user_id=1)
+
+    print(f'{args.requests} creates from {args.concurrency} concurrent clients')
+    print(f"{'mode':<26}{'creates/s':>10}{'p50 ms':>9}{'p99 ms':>9}{'mean batch':>12}{'errors':>8}")
+
+    def report(label: str, result: dict, mean_batch: float) -> None:
+        print(f"{label:<26}{result['rate']:>10.0f}{result['p50']:>9.2f}{result['p99']:>9.2f}"
+              f"{mean_batch:>12.1f}{result['errors']:>8}")
+
+    report('one transaction each', await run(one_transaction_each, args.requests, args.concurrency), 1)
+
+    for window in args.windows:
+        batcher = WriteBatcher(blog.create_coalesced, window_ms=window, max_items=args.max_items)
+        result = await run(lambda i: batcher.submit((request, 1)), args.requests, args.concurrency)
+        report(f'batched, {window:g} ms window', result, batcher.stats()['mean_batch'])
+    await dispose_async_engines()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--windows', type=float, nargs='+', default=[0, 1, 2, 5, 10], help='batch windows in ms')
+    parser.add_argument('--max-items', type=int, default=100, help='flush once this many creates are waiting')
+    parser.add_argument('--dir', help='directory for the database file (default: the system temp dir)')
+    args = parser.parse_args()
+
+    configure(args.dir)
+    asyncio.run(main_async(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+# benchmarks/write_path.py
+"""
+Compares the blog write paths: the old "SELECT, then write, then refresh" sequence
+against the single-statement repository functions (INSERT/UPDATE/DELETE ... RETURNING),
+reporting the mean latency and the SQL statements issued per operation. A create still
+reads the creator and their blog list back for the response, so it costs two statements.
+
+Each SQL statement and commit can be given an artificial delay to stand in for a
+networked database, where round trips dominate the cost of a write:
+
+    python benchmarks/write_path.py --ops 500
+    python benchmarks/write_path.py --ops 200 --latency-ms 1
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# Point the app at a throwaway SQLite file before anything imports app.database
+_tmpdir = tempfile.mkdtemp(prefix='blog_bench_')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_tmpdir, 'bench.db')}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event # noqa: E402
+
+from app import migrate, models, schemas # noqa: E402
+from app.core.query_counter import count_queries # noqa: E402
+from app.database import SessionLocal, get_engine # noqa: E402
+from app.repository import blog # noqa: E402
+
+
+# --- LEGACY WRITE PATH (before single-statement writes) ---
+def legacy_create(request, db, user_id):
+    new_blog = models.Blog(title=request.title, body=request.body, user_id=user_id)
+    db.add(new_blog)
+    db.commit()
+    db.refresh(new_blog)
+    # The ShowBlog response then lazily loaded the creator and the creator's blogs
+    new_blog.creator.blogs
+    return new_blog
+
+def legacy_update(id, request, db):
+    blog_query = db.query(models.Blog).filter(models.Blog.id == id)
+    if not blog_query.first():
+        raise LookupError(id)
+    blog_query.update(request.model_dump(exclude_unset=True), synchronize_session=False)
+    db.commit()
+
+def legacy_destroy(id, db):
+    blog_query = db.query(models.Blog).filter(models.Blog.id == id)
+    if not blog_query.first():
+        raise LookupError(id)
+    blog_query.delete(synchronize_session=False)
+    db.commit()
+
+
+def add_latency(seconds: float) -> None:
+    """Sleeps before every statement and commit, like a round trip to a remote server."""
+    def delay(*args, **kwargs):
+        time.sleep(seconds)
+    event.listen(get_engine(), 'before_cursor_execute', delay)
+    event.listen(get_engine(), 'commit', delay)
+
+
+def timed(fn, *args, **kwargs) -> tuple[float, int, object]:
+    """Runs one write on a fresh session, as a request would; returns (ms, statements, result)."""
+    with SessionLocal() as db, count_queries(get_engine()) as counter:
+        start = time.perf_counter()
+        result = fn(*args, db=db, **kwargs)
+        return (time.perf_counter() - start) * 1000, counter.count, result
+
+
+def run(ops: int) -> dict:
+    """
+    Runs create, update and delete 'ops' times per path; returns the mean latency in ms
+    and the mean statement count of each operation.
+    """
+    results = {}
+    user_id = 1
+    with SessionLocal() as db:
+        db.add(models.Users(id=user_id, name='bench', email='bench@example.com', password='x'))
+        db.commit()
+
+    for label, create, update, destroy in (
+        ('legacy', legacy_create, legacy_update, legacy_destroy),
+        ('single-statement', blog.create, blog.update, blog.destroy),
+    ):
+        timings = {'create': [], 'update': [], 'delete': []}
+        statements = {'create': [], 'update': [], 'delete': []}
+        ids = []
+        for i in range(ops):
+            request = schemas.BlogCreate(title=f'title {i}', body='body ' * 20)
+            elapsed, count, new_blog = timed(create, request, user_id=user_id)
+            timings['create'].append(elapsed)
+            statements['create'].append(count)
+            ids.append(new_blog.id)
+        for op, fn, args in (
+            ('update', update, (schemas.BlogUpdate(title='updated'),)),
+            ('delete', destroy, ()),
+        ):
+            for id in ids:
+                elapsed, count, _ = timed(fn, id, *args)
+                timings[op].append(elapsed)
+                statements[op].append(count)
+        results[label] = {
+            'ms': {op: statistics.mean(values) for op, values in timings.items()},
+            'statements': {op: statistics.mean(values) for op, values in statements.items()},
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--ops', type=int, default=500, help='writes per operation and path')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='simulated round-trip time per statement')
+    args = parser.parse_args()
+
+    migrate.create_schema()
+    if args.latency_ms:
+        add_latency(args.latency_ms / 1000)
+
+    results = run(args.ops)
+    backend = f'SQLite + {args.latency_ms} ms/round trip' if args.latency_ms else 'SQLite (local file)'
+    for metric, title, fmt in (('ms', 'mean latency in ms', '.3f'), ('statements', 'SQL statements per op', '.1f')):
+        print(f'{backend}, {args.ops} ops, {title}')
+        print(f"{'path':<18}{'create':>10}{'update':>10}{'delete':>10}")
+        for label, result in results.items():
+            values = result[metric]
+            print(f"{label:<18}{values['create']:>10{fmt}}{values['update']:>10{fmt}}{values['delete']:>10{fmt}}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,44 +1,122 @@
-# main.py
-
-from fastapi import FastAPI
-import uvicorn
-from dotenv import load_dotenv
-
-# Import components using the new structured path
-from app import models
-from app.database import engine
-from app.routers import blog, user, authentication
-
-# Load environment variables from .env file
-load_dotenv()
-
-# --- DATABASE SETUP ---
-# Create the database tables defined in app/models.py
-# This should be done only once at startup.
-models.Base.metadata.create_all(bind=engine)
-
-# --- APPLICATION INITIALIZATION ---
-app = FastAPI(
-    title="Blog API with SQLAlchemy and FastAPI",
-    description="A modular and production-ready structure for a blog application.",
-    version="1.0.0"
-)
-
-# --- ROUTER REGISTRATION ---
-# Include all routers to make their endpoints active
-app.include_router(blog.router)
-app.include_router(user.router)
-app.include_router(authentication.router)
-
-# --- ROOT ENDPOINT ---
-@app.get('/')
-def index():
-    """Returns a simple message for the root endpoint (health check)."""
-    return {'message':'Blog API is running.'}
-
-
-# --- DEBUGGING / DEVELOPMENT RUNNER ---
-if __name__ == "__main__":
-    # Note: Using '0.0.0.0' or '127.0.0.1' is safer than '172.0.0.1' unless specific network setup is needed.
-    # Using '127.0.0.1' (localhost) here.
-    uvicorn.run(app, host='127.0.0.1', port=9000)
\ No newline at end of file
+# main.py
+
+import time
+_import_started = time.perf_counter() # Measures how long importing the app takes
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
+import uvicorn
+
+# Import components using the new structured path
+from app import migrate
+from app.core import metrics
+from app.core.cache import response_cache
+from app.core.config import get_settings
+from app.core.identity_cache import identity_cache
+from app.core.rate_limit import rate_limiter
+from app.core.token_cache import token_cache
+from app.database import (
+    ReadYourWritesMiddleware, dispose_async_engines, dispose_engines, get_async_engine, get_engine, get_replicas,
+    monitor_replicas
+)
+from app.routers import blog, user, authentication
+
+logger = logging.getLogger(__name__)
+
+# --- STARTUP / SHUTDOWN ---
+# Importing this module has no side effects: settings, engines and the password hasher
+# are built on first use, and the work below runs once per process when it starts serving.
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    started = time.perf_counter()
+    settings = get_settings() # Loads .env once
+    if not settings.secret_key:
+        raise RuntimeError('SECRET_KEY is not set; add it to the environment or the .env file')
+
+    # Per-request SQL/Argon2 timings (Server-Timing header) and the /metrics histograms
+    metrics.instrument('sync', get_engine())
+    if settings.async_db:
+        metrics.instrument('async', get_async_engine().sync_engine)
+
+    # --- READ REPLICAS ---
+    # Check every replica before serving, then keep re-checking in the background
+    replicas = get_replicas()
+    for index, engine in enumerate(replicas.engines):
+        metrics.instrument(f'replica{index}', getattr(engine, 'sync_engine', engine))
+    monitor = None
+    if replicas.engines:
+        await replicas.check()
+        monitor = asyncio.create_task(monitor_replicas())
+
+    # --- DATABASE SETUP ---
+    # Apply pending schema migrations (app/migrate.py). With several workers, set
+    # AUTO_CREATE_SCHEMA=false and run 'python -m app.migrate' once before starting them.
+    if settings.auto_create_schema:
+        await run_in_threadpool(migrate.create_schema)
+
+    metrics.record_startup('lifespan', time.perf_counter() - started)
+    logger.info('Startup took %.1f ms (import %.1f ms)',
+                metrics.STARTUP_SECONDS['lifespan'] * 1000, metrics.STARTUP_SECONDS['import'] * 1000)
+    yield
+
+    # Write out creates still queued for a group commit before the engines go
+    await blog.create_batcher.drain()
+    if monitor is not None:
+        monitor.cancel()
+    await dispose_async_engines()
+    dispose_engines()
+
+# --- APPLICATION INITIALIZATION ---
+app = FastAPI(
+    title="Blog API with SQLAlchemy and FastAPI",
+    description="A modular and production-ready structure for a blog application.",
+    version="1.0.0",
+    lifespan=lifespan
+)
+
+# --- INSTRUMENTATION ---
+app.add_middleware(metrics.RequestMetricsMiddleware)
+# Keeps a client's reads on the primary for a few seconds after it writes (replicas only)
+app.add_middleware(ReadYourWritesMiddleware)
+
+# --- ROUTER REGISTRATION ---
+# Include all routers to make their endpoints active
+app.include_router(blog.router)
+app.include_router(user.router)
+app.include_router(authentication.router)
+
+# --- ROOT ENDPOINT ---
+@app.get('/')
+def index():
+    """Returns a simple message for the root endpoint (health check)."""
+    return {'message':'Blog API is running.'}
+
+# --- METRICS ENDPOINT ---
+@app.get('/metrics', response_class=PlainTextResponse, include_in_schema=False)
+def prometheus_metrics():
+    """Exposes request, SQL, connection-pool, cache and rate-limit metrics in the Prometheus text format."""
+    return PlainTextResponse(
+        metrics.render_metrics({
+            'token_cache': token_cache.stats(),
+            'identity_cache': identity_cache.stats(),
+            'response_cache': response_cache.stats(),
+            'rate_limiter': rate_limiter.stats(),
+            'write_batcher': blog.create_batcher.stats(),
+        }),
+        media_type='text/plain; version=0.0.4'
+    )
+
+metrics.record_startup('import', time.perf_counter() - _import_started)
+
+
+# --- DEBUGGING / DEVELOPMENT RUNNER ---
+if __name__ == "__main__":
+    # Development server (one process). In production run `python -m app.serve` (app/serve.py).
+    # Note: Using '0.0.0.0' or '127.0.0.1' is safer than '172.0.0.1' unless specific network setup is needed.
+    # Using '127.0.0.1' (localhost) here.
+    uvicorn.run(app, host='127.0.0.1', port=9000)
@@ -0,0 +1,165 @@
+"""
+Benchmarks and crash check for DurablePostStore (post_store.py).
+
+    python benchmark_log.py throughput     # writes/s per fsync mode and thread count
+    python benchmark_log.py recovery       # startup time: snapshot + log tail
+    python benchmark_log.py crash          # kill -9 a writer mid-write, check recovery
+
+The crash check exits with status 1 if an acknowledged post is missing after recovery
+(without any delete of it having started), an acknowledged delete comes back, or the
+store fails to open.
+"""
+import argparse
+import os
+import random
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from post_store import DurablePostStore
+
+POST = {"title": "benchmark post", "content": "lorem ipsum " * 20, "published": True, "rating": None}
+
+
+def throughput(args):
+    print(f"{'fsync':<8}{'threads':>8}{'writes/s':>12}")
+    for mode in ("always", "batch", "none"):
+        for threads in (1, 8, 32):
+            data_dir = tempfile.mkdtemp(prefix="posts_bench_")
+            store = DurablePostStore(data_dir, fsync=mode)
+            per_thread = args.writes // threads
+
+            def writer():
+                for _ in range(per_thread):
+                    store.add(POST)
+
+            workers = [threading.Thread(target=writer) for _ in range(threads)]
+            start = time.perf_counter()
+            for w in workers:
+                w.start()
+            for w in workers:
+                w.join()
+            elapsed = time.perf_counter() - start
+            store.close()
+            shutil.rmtree(data_dir)
+            print(f"{mode:<8}{threads:>8}{per_thread * threads / elapsed:>12.0f}")
+
+
+def recovery(args):
+    print(f"{'posts':>10}{'log tail':>10}{'startup ms':>12}")
+    for posts in (10_000, 100_000, 1_000_000):
+        if posts > args.max_posts:
+            break
+        data_dir = tempfile.mkdtemp(prefix="posts_bench_")
+        # a snapshot of `posts` posts, then `tail` more changes in the log after it
+        store = DurablePostStore(data_dir, fsync="none", snapshot_every=posts)
+        for _ in range(posts):
+            store.add(POST)
+        store.snapshot()
+        for _ in range(args.tail):
+            store.add(POST)
+        store.close()
+
+        start = time.perf_counter()
+        reopened = DurablePostStore(data_dir, fsync="none", snapshot_every=10 * posts)
+        elapsed = time.perf_counter() - start
+        assert len(reopened) == posts + args.tail
+        reopened.close()
+        shutil.rmtree(data_dir)
+        print(f"{posts:>10}{args.tail:>10}{elapsed * 1000:>12.1f}")
+
+
+# --- crash check ---
+def crash_writer(data_dir):
+    # child process: add posts (and delete some) forever, printing each acknowledged change.
+    # "D? <id>" goes out before a delete starts: the kill may land after the delete reached
+    # the log but before its "d <id>", and either outcome is then correct for that post.
+    store = DurablePostStore(data_dir, fsync="batch", snapshot_every=500)
+    out = sys.stdout
+    while True:
+        post = store.add({**POST, "content": "x" * random.randint(10, 20000)})
+        out.write(f"a {post['id']}\n")
+        if post["id"] % 7 == 0:
+            out.write(f"D? {post['id'] - 3}\n")
+            out.flush()
+            if store.delete(post["id"] - 3):
+                out.write(f"d {post['id'] - 3}\n")
+        out.flush()
+
+
+def crash(args):
+    failures = 0
+    for run in range(args.runs):
+        data_dir = tempfile.mkdtemp(prefix="posts_crash_")
+        # restart the same directory several times, so recovery also starts from recovered state
+        acked, attempted, deleted = set(), set(), set()
+        for restart in range(3):
+            child = subprocess.Popen(
+                [sys.executable, __file__, "_crash_writer", data_dir],
+                stdout=subprocess.PIPE, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+            )
+            threading.Timer(random.uniform(0.2, 1.0), child.send_signal, [signal.SIGKILL]).start()
+            for line in child.stdout:
+                op, id = line.split()
+                {"a": acked, "D?": attempted, "d": deleted}[op].add(int(id))
+            child.wait()
+
+        try:
+            store = DurablePostStore(data_dir, fsync="none")
+        except Exception as e:
+            print(f"run {run}: FAILED to recover: {e!r}")
+            failures += 1
+            continue
+        recovered = {post["id"] for post in store.all()}
+        # a post may only be gone if a delete of it was at least attempted
+        missing = acked - attempted - recovered
+        resurrected = deleted & recovered
+        store.close()
+        status = "ok" if not missing and not resurrected else "FAILED"
+        failures += status != "ok"
+        print(f"run {run}: {status}: {len(acked)} acked adds, {len(deleted)} acked deletes, "
+              f"{len(recovered)} recovered, {len(missing)} missing, {len(resurrected)} resurrected")
+        shutil.rmtree(data_dir)
+
+    # a torn last line must be dropped, not break startup
+    data_dir = tempfile.mkdtemp(prefix="posts_crash_")
+    store = DurablePostStore(data_dir)
+    store.add(POST)
+    store.close()
+    with open(os.path.join(data_dir, "posts.0.log"), "ab") as f:
+        f.write(b'1234abcd {"op":"add","post":{"ti')
+    store = DurablePostStore(data_dir)
+    torn_ok = len(store) == 1 and store.add(POST)["id"] == 2
+    store.close()
+    reopened_ok = len(DurablePostStore(data_dir)) == 2
+    shutil.rmtree(data_dir)
+    print(f"torn write: {'ok' if torn_ok and reopened_ok else 'FAILED'}")
+    failures += not (torn_ok and reopened_ok)
+
+    if failures:
+        sys.exit(1)
+
+
+def main():
+    if len(sys.argv) == 3 and sys.argv[1] == "_crash_writer":
+        return crash_writer(sys.argv[2])
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("throughput")
+    p.add_argument("--writes", type=int, default=4000, help="writes per fsync mode and thread count")
+    p = sub.add_parser("recovery")
+    p.add_argument("--max-posts", type=int, default=1_000_000)
+    p.add_argument("--tail", type=int, default=10_000, help="changes logged after the snapshot")
+    p = sub.add_parser("crash")
+    p.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    {"throughput": throughput, "recovery": recovery, "crash": crash}[args.command](args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Microbenchmark: PostStore vs the old list + linear scan, at 1M posts.
+
+    python benchmark_store.py
+    python benchmark_store.py --posts 200000 --ops 50000
+
+The list version is only run for a few hundred lookups/deletes (each one scans
+the list), and reported per operation like the store.
+"""
+import argparse
+import random
+import time
+
+from post_store import PostStore
+
+
+def per_op(seconds, ops):
+    return f"{seconds / ops * 1e6:10.3f} us/op"
+
+
+def bench_store(n, ops, rng):
+    store = PostStore()
+    start = time.perf_counter()
+    for i in range(n):
+        store.add({"title": f"post {i}", "content": "hello"})
+    print(f"store  add      {per_op(time.perf_counter() - start, n)}  ({n} posts)")
+
+    ids = [rng.randint(1, n) for _ in range(ops)]
+    start = time.perf_counter()
+    for id in ids:
+        store.get(id)
+    print(f"store  get      {per_op(time.perf_counter() - start, ops)}")
+
+    start = time.perf_counter()
+    for _ in range(ops):
+        store.latest()
+    print(f"store  latest   {per_op(time.perf_counter() - start, ops)}")
+
+    start = time.perf_counter()
+    for id in set(ids):
+        store.delete(id)
+    print(f"store  delete   {per_op(time.perf_counter() - start, len(set(ids)))}")
+
+    # latest must stay O(1) even after the newest posts were deleted
+    for id in range(n, n - ops, -1):
+        store.delete(id)
+    start = time.perf_counter()
+    for _ in range(ops):
+        store.latest()
+    print(f"store  latest   {per_op(time.perf_counter() - start, ops)}  (after deleting the newest {ops})")
+
+
+def bench_list(n, ops, rng):
+    # the old implementation: a list, find by scanning, list.pop(index)
+    posts = [{"id": i, "title": f"post {i}", "content": "hello"} for i in range(1, n + 1)]
+
+    def find_post_index(id):
+        for i, p in enumerate(posts):
+            if p["id"] == id:
+                return i
+
+    ids = rng.sample(range(1, n + 1), ops)
+    start = time.perf_counter()
+    for id in ids:
+        find_post_index(id)
+    print(f"list   get      {per_op(time.perf_counter() - start, ops)}")
+
+    start = time.perf_counter()
+    for id in ids:
+        posts.pop(find_post_index(id))
+    print(f"list   delete   {per_op(time.perf_counter() - start, ops)}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--posts", type=int, default=1_000_000)
+    parser.add_argument("--ops", type=int, default=100_000, help="store operations per measurement")
+    parser.add_argument("--list-ops", type=int, default=200, help="operations for the (slow) list version")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    bench_store(args.posts, args.ops, rng)
+    bench_list(args.posts, args.list_ops, rng)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,82 +1,86 @@
-from fastapi import FastAPI, Response, status, HTTPException
-from fastapi.params import Body
-from pydantic import BaseModel
-from typing import Optional
-from random import randrange
-
-app = FastAPI()
-
-class Post(BaseModel):
-    title: str
-    content: str
-    published: bool = True
-    rating: Optional[int] = None
-
-my_posts = [{"id": 1, "title": "This is post 1", "Content": "This is content of post 1"}]
-
-def find_post(id):
-    for p in my_posts:
-        if p["id"] == id:
-            return p
-
-def find_post_index(id):
-    for i, p in enumerate(my_posts):
-        if p["id"] == id:
-            return i
-
-@app.get("/")
-def root():
-    return {"message": "Hello World"}
-
-
-@app.get("/posts")
-def get_posts():
-    return {"data": my_posts}
-
-
-@app.get("/posts/latest")
-def get_latest_post():
-    post = my_posts[len(my_posts) - 1]
-    return post
-
-@app.get("/posts/{id}")
-def get_post(id: int, response: Response):
-    post = find_post(id)
-    if not post:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Post not found with the id {id}")
-        # to writing this we have another way given above of HTTPException
-        # response.status_code = status.HTTP_404_NOT_FOUND #404
-        # return{"mesage": "Not found"}
-    return {"post": post}
-
-
-
-@app.post("/posts", status_code=status.HTTP_201_CREATED)
-#* payload/body anything need to send data in our post request. the Body is from fastapi.param and we declare a variabel name as payload/body which is of dictionary type and anything we pass in our request body for post method will be stored there.
-def create_post(post: Post):  #?payload: dict = Body(...)
-    post_dict = post.dict()
-    post_dict['id'] = randrange(0,100000)
-    my_posts.append(post_dict)
-    return {'post': post_dict}
-    # print(post.rating )
-    #! for converting our pydantic model into dictionary
-    # print(post.dict()) 
-    # return {"message": "Post created successfully"}
-
-
-@app.delete("/posts/{id}", status_code=status.HTTP_204_NO_CONTENT)
-def del_post(id: int):
-    # * Delete Post
-    # * Find index of Post that has required ID
-    # * Post.pop
-    post_index = find_post_index(id)
-    if post_index == None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Post with the id {id} is not exists")
-    my_posts.pop(post_index)
-    return Response(status_code=status.HTTP_204_NO_CONTENT)
-
-
-@app.put("/post/{id}")
-def update_post(id: int, post: Post):
-    print(post)
+import os
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Response, status, HTTPException
+from fastapi.params import Body
+from pydantic import BaseModel
+from typing import Optional
+
+from post_store import DurablePostStore, PostStore
+
+#* persistence is optional: set POSTS_DATA_DIR to keep posts across restarts (see DurablePostStore)
+POSTS_DATA_DIR = os.getenv("POSTS_DATA_DIR")
+POSTS_FSYNC = os.getenv("POSTS_FSYNC", "batch") # "batch", "always" or "none"
+POSTS_SNAPSHOT_EVERY = int(os.getenv("POSTS_SNAPSHOT_EVERY", "10000"))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    my_posts.close() #* flushes the log on shutdown
+
+app = FastAPI(lifespan=lifespan)
+
+class Post(BaseModel):
+    title: str
+    content: str
+    published: bool = True
+    rating: Optional[int] = None
+
+#* posts live in a PostStore (post_store.py): O(1) lookup/delete/latest by id, thread safe
+if POSTS_DATA_DIR:
+    my_posts = DurablePostStore(POSTS_DATA_DIR, fsync=POSTS_FSYNC, snapshot_every=POSTS_SNAPSHOT_EVERY)
+else:
+    my_posts = PostStore([{"id": 1, "title": "This is post 1", "Content": "This is content of post 1"}])
+
+@app.get("/")
+def root():
+    return {"message": "Hello World"}
+
+
+@app.get("/posts")
+def get_posts():
+    return {"data": my_posts.all()}
+
+
+@app.get("/posts/latest")
+def get_latest_post():
+    post = my_posts.latest()
+    if not post:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="There are no posts yet")
+    return post
+
+@app.get("/posts/{id}")
+def get_post(id: int, response: Response):
+    post = my_posts.get(id)
+    if not post:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Post not found with the id {id}")
+        # to writing this we have another way given above of HTTPException
+        # response.status_code = status.HTTP_404_NOT_FOUND #404
+        # return{"mesage": "Not found"}
+    return {"post": post}
+
+
+
+@app.post("/posts", status_code=status.HTTP_201_CREATED)
+#* payload/body anything need to send data in our post request. the Body is from fastapi.param and we declare a variabel name as payload/body which is of dictionary type and anything we pass in our request body for post method will be stored there.
+def create_post(post: Post):  #?payload: dict = Body(...)
+    post_dict = my_posts.add(post.dict()) #* the store assigns the next id, so ids never collide
+    return {'post': post_dict}
+    # print(post.rating )
+    #! for converting our pydantic model into dictionary
+    # print(post.dict()) 
+    # return {"message": "Post created successfully"}
+
+
+@app.delete("/posts/{id}", status_code=status.HTTP_204_NO_CONTENT)
+def del_post(id: int):
+    # * Delete Post by its ID (no index lookup or list.pop needed)
+    if not my_posts.delete(id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Post with the id {id} is not exists")
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@app.put("/post/{id}")
+def update_post(id: int, post: Post):
+    print(post)
     return{'mesase': 'updated data'}
\ No newline at end of file
@@ -0,0 +1,372 @@
+import json
+import os
+import threading
+import zlib
+from collections import OrderedDict, deque
+from typing import Optional
+
+
+class PostStore:
+    """
+    In-memory posts, indexed by id.
+
+    An OrderedDict keeps insertion order, so the newest post is simply its last
+    key: get, add, delete and latest are all O(1). (A plain dict would do too,
+    except that finding its last key slows down after many deletes at the end,
+    because deleted slots are only skipped, not removed, until it resizes.)
+    Ids come from a counter and are never reused, even after a delete. One lock
+    guards every operation, because FastAPI runs these (sync) endpoints on a
+    threadpool.
+    """
+
+    def __init__(self, posts: Optional[list] = None):
+        self._posts = OrderedDict()
+        self._lock = threading.Lock()
+        for post in posts or []:
+            self._posts[post["id"]] = post
+        # continue after the highest id we were given
+        self._next_id = max(self._posts, default=0) + 1
+
+    def add(self, data: dict) -> dict:
+        """Stores a copy of data under the next free id and returns it."""
+        with self._lock:
+            return self._add(data)
+
+    def _add(self, data: dict) -> dict:
+        # caller holds the lock
+        post = {**data, "id": self._next_id}
+        self._next_id += 1
+        self._posts[post["id"]] = post
+        return post
+
+    def get(self, id: int) -> Optional[dict]:
+        with self._lock:
+            return self._posts.get(id)
+
+    def delete(self, id: int) -> bool:
+        """Removes a post; returns False if there was no post with that id."""
+        with self._lock:
+            return self._posts.pop(id, None) is not None
+
+    def latest(self) -> Optional[dict]:
+        """The most recently added post that still exists."""
+        with self._lock:
+            if not self._posts:
+                return None
+            return self._posts[next(reversed(self._posts))]
+
+    def all(self) -> list:
+        """A snapshot of every post, oldest first."""
+        with self._lock:
+            return list(self._posts.values())
+
+    def close(self):
+        pass
+
+    def __len__(self) -> int:
+        return len(self._posts)
+
+
+class DurablePostStore(PostStore):
+    """
+    A PostStore that survives restarts.
+
+    Every add/delete is appended to a log file (one checksummed JSON line per
+    change) before the call returns, and becomes visible to readers only once
+    it is durable, so get/all/latest never show a change a crash could still
+    take back. If a log write or fsync fails, the store stops accepting writes
+    (they raise the error) rather than guess what reached the disk; the failed
+    change is not applied and its id is not used. Every `snapshot_every` changes, the whole
+    store is written to snapshot.json in the background and a new log file is
+    started, so startup only reads the latest snapshot plus the log written
+    after it.
+
+    fsync modes:
+      "batch"  - (default) callers wait until their change is fsynced, but one
+                 fsync covers every change written meanwhile (group commit)
+      "always" - fsync after every single change (slow, for comparison)
+      "none"   - leave flushing to the OS: survives a process crash, but the
+                 last changes can be lost if the machine goes down
+
+    Files in data_dir: snapshot.json and posts.<generation>.log. A snapshot
+    records the generation of the first log written after it; older logs are
+    deleted only once the snapshot is safely on disk.
+    """
+
+    SNAPSHOT = "snapshot.json"
+    FSYNC_MODES = ("batch", "always", "none")
+
+    def __init__(self, data_dir: str, fsync: str = "batch", snapshot_every: int = 10000):
+        super().__init__()
+        if fsync not in self.FSYNC_MODES:
+            raise ValueError(f"fsync must be one of {self.FSYNC_MODES}, not {fsync!r}")
+        self.data_dir = data_dir
+        self.fsync = fsync
+        self.snapshot_every = snapshot_every
+        os.makedirs(data_dir, exist_ok=True)
+
+        self._generation = self._recover()
+        self._fd = os.open(self._log_path(self._generation), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._fsync_dir()
+        self._changes_since_snapshot = 0
+        self._snapshot_thread = None
+
+        # logged changes not yet applied to _posts, in log order, and the latest
+        # pending op ("add"/"del", seq) per post id, so writes see them
+        self._pending = deque()
+        self._pending_ops = {}
+
+        # group commit bookkeeping: changes written vs. changes known to be on disk
+        self._written = 0
+        self._synced = 0
+        self._closed = False
+        self._error = None
+        self._cond = threading.Condition()
+        self._fd_lock = threading.Lock() # an fsync and a log rotation never overlap
+        self._flusher = None
+        if fsync == "batch":
+            self._flusher = threading.Thread(target=self._flush_loop, name="post-log-fsync", daemon=True)
+            self._flusher.start()
+
+    # --- writes ---
+    def add(self, data: dict) -> dict:
+        with self._lock:
+            post = {**data, "id": self._next_id}
+            seq = self._append({"op": "add", "post": post}, post["id"])
+            self._next_id += 1 # only once the add is logged
+            self._maybe_snapshot()
+        self._apply_durable(seq)
+        return post
+
+    def delete(self, id: int) -> bool:
+        with self._lock:
+            if not self._exists(id):
+                return False
+            seq = self._append({"op": "del", "id": id}, id)
+            self._maybe_snapshot()
+        self._apply_durable(seq)
+        return True
+
+    def _exists(self, id: int) -> bool:
+        # caller holds self._lock: a pending change to the post decides over _posts
+        pending = self._pending_ops.get(id)
+        if pending is not None:
+            return pending[0] == "add"
+        return id in self._posts
+
+    def _append(self, record: dict, id: int) -> int:
+        # caller holds self._lock, so pending changes are queued in log order
+        with self._cond:
+            if self._error is not None:
+                raise self._error
+        payload = json.dumps(record, separators=(",", ":"))
+        line = f"{zlib.crc32(payload.encode()):08x} {payload}\n".encode()
+        try:
+            os.write(self._fd, line) # one write() per line: a crash can only tear the last one
+            if self.fsync == "always":
+                os.fsync(self._fd)
+        except OSError as e:
+            self._fail(e)
+            raise
+
+        with self._cond:
+            self._written += 1
+            seq = self._written
+            self._cond.notify_all()
+        self._pending.append((seq, record))
+        self._pending_ops[id] = (record["op"], seq)
+        self._changes_since_snapshot += 1
+        return seq
+
+    def _maybe_snapshot(self):
+        # caller holds self._lock, after the change is fully recorded (next_id included)
+        if self._changes_since_snapshot >= self.snapshot_every and self._snapshot_thread is None:
+            self._start_snapshot()
+
+    def _fail(self, error: OSError):
+        # the log may or may not hold the last change: refuse further writes
+        with self._cond:
+            self._error = error
+            self._cond.notify_all()
+
+    def _apply_durable(self, seq: int):
+        # waits until change seq is on disk, then makes it (and every change logged
+        # before it, which is on disk too) visible
+        self._wait_durable(seq)
+        with self._lock:
+            while self._pending and self._pending[0][0] <= seq:
+                applied, record = self._pending.popleft()
+                id = self._apply(self._posts, record)
+                if self._pending_ops[id][1] == applied:
+                    del self._pending_ops[id]
+
+    @staticmethod
+    def _apply(posts: OrderedDict, record: dict) -> int:
+        """Applies one log record to posts; returns the id of the post it changed."""
+        if record["op"] == "add":
+            post = record["post"]
+            posts[post["id"]] = post
+            return post["id"]
+        posts.pop(record["id"], None)
+        return record["id"]
+
+    def _wait_durable(self, seq: int):
+        if self.fsync != "batch":
+            return
+        with self._cond:
+            while self._synced < seq and self._error is None:
+                self._cond.wait()
+            if self._synced < seq:
+                raise self._error
+
+    def _flush_loop(self):
+        # changes written while one fsync runs are all covered by the next one
+        while True:
+            with self._cond:
+                while self._synced == self._written and not self._closed:
+                    self._cond.wait()
+                if self._closed and self._synced == self._written:
+                    return
+                target = self._written
+            try:
+                with self._fd_lock:
+                    os.fsync(self._fd)
+            except OSError as e:
+                self._fail(e)
+                return
+            with self._cond:
+                self._synced = max(self._synced, target)
+                self._cond.notify_all()
+
+    # --- snapshots ---
+    def _start_snapshot(self):
+        # caller holds self._lock: switch to a new log and copy the state it starts from
+        try:
+            with self._fd_lock:
+                os.fsync(self._fd)
+                os.close(self._fd)
+                self._generation += 1
+                self._fd = os.open(self._log_path(self._generation), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            self._fsync_dir()
+        except OSError as e:
+            self._fail(e)
+            raise
+        self._changes_since_snapshot = 0
+        # the old log's pending changes belong in the snapshot, as that log goes away
+        posts = OrderedDict(self._posts)
+        for _, record in self._pending:
+            self._apply(posts, record)
+        state = {"generation": self._generation, "next_id": self._next_id, "posts": list(posts.values())}
+        self._snapshot_thread = threading.Thread(target=self._write_snapshot, args=(state,), name="post-snapshot")
+        self._snapshot_thread.start()
+
+    def _write_snapshot(self, state: dict):
+        path = os.path.join(self.data_dir, self.SNAPSHOT)
+        tmp = path + ".tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(state, f, separators=(",", ":"))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path) # atomic: readers see the old or the new snapshot, never half of one
+            self._fsync_dir()
+            # only now is it safe to drop the logs the snapshot replaces
+            self._delete_logs_before(state["generation"])
+        finally:
+            with self._lock:
+                self._snapshot_thread = None
+
+    def snapshot(self):
+        """Writes a snapshot now (or waits for the one in progress), e.g. before a planned restart."""
+        with self._lock:
+            if self._snapshot_thread is None:
+                self._start_snapshot()
+            thread = self._snapshot_thread
+        if thread is not None:
+            thread.join()
+
+    # --- startup ---
+    def _recover(self) -> int:
+        """Loads the snapshot and replays the logs after it; returns the generation to append to."""
+        snapshot_path = os.path.join(self.data_dir, self.SNAPSHOT)
+        generation = 0
+        if os.path.exists(snapshot_path):
+            with open(snapshot_path) as f:
+                state = json.load(f)
+            generation = state["generation"]
+            self._next_id = state["next_id"]
+            for post in state["posts"]:
+                self._posts[post["id"]] = post
+
+        # logs older than the snapshot are left over from a crash right after it was written
+        self._delete_logs_before(generation)
+        generations = self._log_generations()
+        for i, gen in enumerate(generations):
+            self._replay(self._log_path(gen), is_last=i == len(generations) - 1)
+        return generations[-1] if generations else generation
+
+    def _replay(self, path: str, is_last: bool):
+        good_until = 0
+        with open(path, "rb") as f:
+            for line in f:
+                record = self._parse(line)
+                if record is None:
+                    if not is_last:
+                        raise ValueError(f"{path} is corrupt at byte {good_until}")
+                    # the process died in the middle of this write: drop the torn tail
+                    break
+                id = self._apply(self._posts, record)
+                if record["op"] == "add":
+                    self._next_id = max(self._next_id, id + 1)
+                good_until += len(line)
+        if os.path.getsize(path) != good_until:
+            os.truncate(path, good_until)
+
+    @staticmethod
+    def _parse(line: bytes) -> Optional[dict]:
+        if not line.endswith(b"\n"):
+            return None
+        checksum, _, payload = line.rstrip(b"\n").partition(b" ")
+        try:
+            if int(checksum, 16) != zlib.crc32(payload):
+                return None
+            return json.loads(payload)
+        except ValueError:
+            return None
+
+    # --- files ---
+    def _log_path(self, generation: int) -> str:
+        return os.path.join(self.data_dir, f"posts.{generation}.log")
+
+    def _log_generations(self) -> list:
+        return sorted(
+            int(name.split(".")[1]) for name in os.listdir(self.data_dir)
+            if name.startswith("posts.") and name.endswith(".log")
+        )
+
+    def _delete_logs_before(self, generation: int):
+        for gen in self._log_generations():
+            if gen < generation:
+                os.remove(self._log_path(gen))
+
+    def _fsync_dir(self):
+        # makes file creations/renames in data_dir durable, not just the file contents
+        fd = os.open(self.data_dir, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def close(self):
+        """Waits for pending fsyncs and snapshots, then closes the log."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._flusher is not None:
+            self._flusher.join()
+        thread = self._snapshot_thread
+        if thread is not None:
+            thread.join()
+        with self._fd_lock:
+            os.fsync(self._fd)
+            os.close(self._fd)